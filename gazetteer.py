@@ -0,0 +1,296 @@
+import bisect
+import json
+import math
+import openlocationcode as olc
+import pyproj as p
+import sqlite3
+import struct
+import unicodedata
+
+
+
+# global constants
+
+GAZETTEER_EPSG_ = 4326
+BUCKET_CODE_LENGTH_ = 6 # i.e. level 3 Plus codes
+BUCKET_SIZE_ = 0.05 # degrees, i.e. the size of level 3 Plus codes
+WKB_POLYGON_ = 3
+WKB_MULTIPOLYGON_ = 6
+GEOPACKAGE_ENVELOPE_SIZES_ = [0, 32, 48, 48, 64] # bytes, by envelope contents indicator
+NGRAM_SIZE_ = 3
+NAME_FOLDING_TABLE_ = str.maketrans({ 'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss', '-': ' ', '.': ' ', ',': ' ', '/': ' ', '(': ' ', ')': ' ' })
+
+
+
+# custom functions: reading municipalities
+
+# returns the municipalities (as a list of name/rings pairs) from a GeoJSON (*.geojson, *.json) or GeoPackage (*.gpkg) file
+def municipalities_reader(file_name, name_field, layer = None):
+
+  if file_name.lower().endswith('.gpkg'):
+    return geopackage_reader(file_name, name_field, layer)
+  return geojson_reader(file_name, name_field)
+
+
+# returns the municipalities from a GeoJSON file (coordinates in EPSG:4326, as required by RFC 7946)
+def geojson_reader(file_name, name_field):
+
+  with open(file_name, encoding = 'utf-8') as file:
+    feature_collection = json.load(file)
+
+  municipalities = []
+  for feature in feature_collection['features']:
+    geometry, properties = feature.get('geometry'), feature.get('properties') or {}
+    if geometry is None or properties.get(name_field) is None:
+      continue
+    if geometry['type'] == 'Polygon':
+      polygons = [geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+      polygons = geometry['coordinates']
+    else:
+      continue
+    rings = [[(float(point[0]), float(point[1])) for point in ring] for polygon in polygons for ring in polygon]
+    municipalities.append((str(properties[name_field]), rings))
+  return municipalities
+
+
+# returns the municipalities from a layer (the first one if none is provided) of a GeoPackage file, reprojected to EPSG:4326 if necessary
+def geopackage_reader(file_name, name_field, layer = None):
+
+  connection = sqlite3.connect('file:' + file_name + '?mode=ro', uri = True)
+  try:
+    # get table, geometry column and spatial reference system of the layer
+    query = 'SELECT g.table_name, g.column_name, s.organization, s.organization_coordsys_id FROM gpkg_geometry_columns g JOIN gpkg_spatial_ref_sys s ON s.srs_id = g.srs_id'
+    row = connection.execute(query + ' WHERE g.table_name = ?', (layer,)).fetchone() if layer is not None else connection.execute(query).fetchone()
+    if row is None:
+      raise ValueError('no layer with geometries found in GeoPackage ' + file_name)
+    table_name, column_name, organization, epsg = row
+    rows = connection.execute('SELECT "' + name_field.replace('"', '""') + '", "' + column_name.replace('"', '""') + '" FROM "' + table_name.replace('"', '""') + '"').fetchall()
+  finally:
+    connection.close()
+
+  # reproject to EPSG:4326 if necessary
+  transformer = None
+  if organization is not None and organization.upper() == 'EPSG' and epsg != GAZETTEER_EPSG_:
+    transformer = p.Transformer.from_crs(epsg, GAZETTEER_EPSG_, always_xy = True)
+
+  municipalities = []
+  for name, blob in rows:
+    if name is None or blob is None:
+      continue
+    rings = geopackage_geometry_reader(bytes(blob))
+    if transformer is not None:
+      rings = [list(zip(*transformer.transform([point[0] for point in ring], [point[1] for point in ring]))) for ring in rings]
+    if rings:
+      municipalities.append((str(name), rings))
+  return municipalities
+
+
+# returns the rings of a (multi)polygon in GeoPackage binary format (a header followed by well-known binary)
+def geopackage_geometry_reader(blob):
+
+  if blob[:2] != b'GP':
+    raise ValueError('geometry not in GeoPackage binary format')
+  flags = blob[3]
+  # empty geometry
+  if flags & 0x10:
+    return []
+  rings = []
+  wkb_reader(blob, 8 + GEOPACKAGE_ENVELOPE_SIZES_[(flags >> 1) & 0x07], rings)
+  return rings
+
+
+# appends the rings of a (multi)polygon in well-known binary (ISO or extended, with or without Z and M values) starting at an offset to a list and returns the offset after it
+def wkb_reader(wkb, offset, rings):
+
+  byte_order = '<' if wkb[offset] == 1 else '>'
+  geometry_type, = struct.unpack_from(byte_order + 'I', wkb, offset + 1)
+  offset += 5
+  dimensions = 2 + (1 if geometry_type & 0x80000000 else 0) + (1 if geometry_type & 0x40000000 else 0)
+  geometry_type &= 0x0fffffff
+  dimensions += (1, 1, 2)[geometry_type // 1000 - 1] if geometry_type >= 1000 else 0
+  geometry_type %= 1000
+
+  if geometry_type == WKB_MULTIPOLYGON_:
+    count, = struct.unpack_from(byte_order + 'I', wkb, offset)
+    offset += 4
+    for _ in range(count):
+      offset = wkb_reader(wkb, offset, rings)
+  elif geometry_type == WKB_POLYGON_:
+    count, = struct.unpack_from(byte_order + 'I', wkb, offset)
+    offset += 4
+    for _ in range(count):
+      points, = struct.unpack_from(byte_order + 'I', wkb, offset)
+      offset += 4
+      values = struct.unpack_from(byte_order + str(points * dimensions) + 'd', wkb, offset)
+      offset += 8 * points * dimensions
+      rings.append(list(zip(values[0::dimensions], values[1::dimensions])))
+  else:
+    raise ValueError('geometry neither a polygon nor a multipolygon')
+  return offset
+
+
+
+# custom functions: spatial index
+
+# returns the spatial index of municipalities, i.e. buckets keyed by level 3 Plus codes, each with a list of name/edges pairs:
+# the edges are None if the bucket lies completely within the municipality, otherwise they are the edges of the municipality relevant for a point-in-polygon test within the bucket
+def index_builder(municipalities):
+
+  index = {}
+  for name, rings in municipalities:
+    edges = [(ring[i][0], ring[i][1], ring[i + 1][0], ring[i + 1][1]) for ring in rings for i in range(len(ring) - 1) if ring[i][1] != ring[i + 1][1]]
+    if not edges:
+      continue
+    x_min, x_max = min(min(edge[0], edge[2]) for edge in edges), max(max(edge[0], edge[2]) for edge in edges)
+    y_min, y_max = min(min(edge[1], edge[3]) for edge in edges), max(max(edge[1], edge[3]) for edge in edges)
+
+    # enumerate the buckets covering the municipality
+    num_rows, num_cols = olc.gridDimensions(y_min, x_min, y_max, x_max, BUCKET_CODE_LENGTH_)
+    buckets = list(olc.gridCells(y_min, x_min, y_max, x_max, BUCKET_CODE_LENGTH_))
+    if not buckets:
+      continue
+    y_first, x_first = buckets[0][1], buckets[0][2]
+
+    # assign the edges to the rows of buckets they cross and mark the buckets they touch (generously, by one bucket more on each side, so that no bucket touched is missed)
+    row_edges = [[] for _ in range(num_rows)]
+    touched = [[False] * num_cols for _ in range(num_rows)]
+    for edge in edges:
+      row_first = max(int(math.floor((min(edge[1], edge[3]) - y_first) / BUCKET_SIZE_)) - 1, 0)
+      row_last = min(int(math.floor((max(edge[1], edge[3]) - y_first) / BUCKET_SIZE_)) + 1, num_rows - 1)
+      col_first = max(int(math.floor((min(edge[0], edge[2]) - x_first) / BUCKET_SIZE_)) - 1, 0)
+      col_last = min(int(math.floor((max(edge[0], edge[2]) - x_first) / BUCKET_SIZE_)) + 1, num_cols - 1)
+      for row in range(row_first, row_last + 1):
+        row_edges[row].append(edge)
+        touched_row = touched[row]
+        for col in range(col_first, col_last + 1):
+          touched_row[col] = True
+
+    # buckets touched by an edge keep the edges east of their west bound (the rays of point-in-polygon tests are cast eastwards)…
+    # …while all other buckets lie either completely within or completely outside the municipality, which a single point-in-polygon test decides
+    for i, (code, bucket_y_lo, bucket_x_lo, bucket_y_hi, bucket_x_hi) in enumerate(buckets):
+      row, col = divmod(i, num_cols)
+      if touched[row][col]:
+        bucket_edges = [edge for edge in row_edges[row] if max(edge[0], edge[2]) >= bucket_x_lo]
+        index.setdefault(code, []).append((name, bucket_edges))
+      elif point_in_polygon_tester(bucket_x_lo + (bucket_x_hi - bucket_x_lo) / 2, bucket_y_lo + (bucket_y_hi - bucket_y_lo) / 2, row_edges[row]):
+        index.setdefault(code, []).append((name, None))
+
+  # within each bucket, test municipalities which the bucket lies completely within first
+  for entries in index.values():
+    entries.sort(key = lambda entry: entry[1] is not None)
+  return index
+
+
+# returns whether a point lies within a polygon (given by its edges) via ray casting (even–odd rule)
+def point_in_polygon_tester(x, y, edges):
+
+  inside = False
+  for x1, y1, x2, y2 in edges:
+    if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+      inside = not inside
+  return inside
+
+
+# returns the name of the municipality a point lies within (or None if none), optionally using the level 3 Plus code of the point if already known
+def municipality_finder(index, x, y, bucket_code = None):
+
+  if bucket_code is None:
+    bucket_code = olc.encode(y, x, BUCKET_CODE_LENGTH_)
+  for name, edges in index.get(bucket_code, ()):
+    if edges is None or point_in_polygon_tester(x, y, edges):
+      return name
+  return None
+
+
+
+# custom functions: name index
+
+# returns a municipality name folded for comparisons (case-folded, umlauts and ß transcribed, other diacritics and punctuation removed, whitespace collapsed)
+def name_folder(name):
+
+  folded = unicodedata.normalize('NFC', name).casefold().translate(NAME_FOLDING_TABLE_)
+  folded = ''.join(character for character in unicodedata.normalize('NFKD', folded) if not unicodedata.combining(character))
+  return ' '.join(folded.split())
+
+
+# returns the n-grams of a folded municipality name (padded with a space on both sides, so that beginnings and ends of names count)
+def ngrams_extractor(folded_name):
+
+  padded = ' ' + folded_name + ' '
+  return { padded[i:i + NGRAM_SIZE_] for i in range(len(padded) - NGRAM_SIZE_ + 1) }
+
+
+# returns the centroid of the largest ring of a municipality (i.e. of its main polygon)
+def centroid_calculator(rings):
+
+  best_area, best_centroid = -1, None
+  for ring in rings:
+    if not ring:
+      continue
+    # calculate relative to the first point of the ring to keep the precision
+    x0, y0 = ring[0]
+    area = x_sum = y_sum = 0
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+      x1, y1, x2, y2 = x1 - x0, y1 - y0, x2 - x0, y2 - y0
+      cross = x1 * y2 - x2 * y1
+      area += cross
+      x_sum += (x1 + x2) * cross
+      y_sum += (y1 + y2) * cross
+    if area != 0 and abs(area) > best_area:
+      best_area, best_centroid = abs(area), (x0 + x_sum / (3 * area), y0 + y_sum / (3 * area))
+  return best_centroid
+
+
+# returns the name index of municipalities, i.e. the centroids (and original names) by folded names, the folded names in sorted order (for prefix lookups) and the folded names by n-grams (for fuzzy lookups)
+def name_index_builder(municipalities):
+
+  entries, ngrams = {}, {}
+  for name, rings in municipalities:
+    folded_name = name_folder(name)
+    centroid = centroid_calculator(rings)
+    # the first municipality of a name wins
+    if not folded_name or centroid is None or folded_name in entries:
+      continue
+    entries[folded_name] = (name, centroid[0], centroid[1])
+    for ngram in ngrams_extractor(folded_name):
+      ngrams.setdefault(ngram, []).append(folded_name)
+  return { 'entries': entries, 'sorted_names': sorted(entries), 'ngrams': ngrams }
+
+
+# returns the best matching municipality for a name as a tuple of name, centroid x, centroid y and match score (between 0 and 1), or None if nothing matches at all:
+# exact matches score 1, prefix matches score the share of the municipality name typed, fuzzy matches score the Dice coefficient of the n-grams
+def name_finder(index, name):
+
+  folded_name = name_folder(name)
+  if not folded_name:
+    return None
+  entries = index['entries']
+
+  # exact match
+  if folded_name in entries:
+    return entries[folded_name] + (1.0,)
+
+  scores = {}
+  # prefix matches
+  sorted_names = index['sorted_names']
+  position = bisect.bisect_left(sorted_names, folded_name)
+  while position < len(sorted_names) and sorted_names[position].startswith(folded_name):
+    scores[sorted_names[position]] = len(folded_name) / len(sorted_names[position])
+    position += 1
+  # fuzzy matches
+  name_ngrams = ngrams_extractor(folded_name)
+  shared = {}
+  for ngram in name_ngrams:
+    for candidate in index['ngrams'].get(ngram, ()):
+      shared[candidate] = shared.get(candidate, 0) + 1
+  for candidate, count in shared.items():
+    score = 2 * count / (len(name_ngrams) + len(ngrams_extractor(candidate)))
+    if score > scores.get(candidate, 0):
+      scores[candidate] = score
+
+  if not scores:
+    return None
+  # best score first, shorter names first on a tie
+  best = min(scores, key = lambda candidate: (-scores[candidate], len(candidate), candidate))
+  return entries[best] + (scores[best],)
@@ -0,0 +1,123 @@
+from collections import OrderedDict
+import bisect
+import math
+import threading
+
+
+
+# global constants
+
+EXPOSITION_MIMETYPE_ = 'text/plain; version=0.0.4; charset=utf-8'
+METRIC_TYPE_COUNTER_ = 'counter'
+METRIC_TYPE_GAUGE_ = 'gauge'
+METRIC_TYPE_HISTOGRAM_ = 'histogram'
+DEFAULT_DURATION_BUCKETS_ = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10) # seconds
+DEFAULT_COUNT_BUCKETS_ = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+
+# custom functions: registry
+
+# returns an empty registry of metrics (shared by all threads, hence guarded by a lock)
+def registry_builder():
+
+  return { 'lock': threading.Lock(), 'metrics': OrderedDict() }
+
+
+# defines a metric (a counter, a gauge or a histogram with the given upper bounds of its buckets) in a registry
+def metric_definer(registry, name, metric_type, help_text, buckets = None):
+
+  with registry['lock']:
+    registry['metrics'][name] = { 'type': metric_type, 'help': help_text, 'buckets': tuple(buckets) if buckets is not None else None, 'samples': OrderedDict() }
+
+
+# returns the key of the labels of a sample (its label names and values, sorted by name)
+def labels_key(labels):
+
+  return tuple(sorted((name, str(value)) for name, value in labels.items())) if labels else ()
+
+
+# increases the counter (or the gauge) of the given labels by a value
+def counter_incrementer(registry, name, labels = None, value = 1):
+
+  key = labels_key(labels)
+  with registry['lock']:
+    samples = registry['metrics'][name]['samples']
+    samples[key] = samples.get(key, 0) + value
+
+
+# sets the gauge of the given labels to a value
+def gauge_setter(registry, name, labels = None, value = 0):
+
+  key = labels_key(labels)
+  with registry['lock']:
+    registry['metrics'][name]['samples'][key] = value
+
+
+# returns the counter (or the gauge) of the given labels, 0 if it has never been increased or set
+def counter_getter(registry, name, labels = None):
+
+  key = labels_key(labels)
+  with registry['lock']:
+    return registry['metrics'][name]['samples'].get(key, 0)
+
+
+# adds a value to the histogram of the given labels (i.e. to the first bucket whose upper bound it does not exceed, to its sum and to its count)
+def histogram_observer(registry, name, value, labels = None):
+
+  key = labels_key(labels)
+  with registry['lock']:
+    metric = registry['metrics'][name]
+    sample = metric['samples'].get(key)
+    if sample is None:
+      # one count per bucket (plus one for values exceeding all upper bounds), sum and count
+      sample = metric['samples'][key] = [ [0] * (len(metric['buckets']) + 1), 0.0, 0 ]
+    sample[0][bisect.bisect_left(metric['buckets'], value)] += 1
+    sample[1] += value
+    sample[2] += 1
+
+
+
+# custom functions: exposition
+
+# formats a number as a sample value
+def value_formatter(value):
+
+  if isinstance(value, float):
+    if math.isnan(value):
+      return 'NaN'
+    if math.isinf(value):
+      return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+  return str(value)
+
+
+# formats the labels of a sample (with an additional label if provided), escaping backslashes, double quotes and line feeds in their values
+def labels_formatter(key, additional_label = None):
+
+  labels = list(key) + ([ additional_label ] if additional_label is not None else [])
+  if not labels:
+    return ''
+  return '{' + ','.join(name + '="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"' for name, value in labels) + '}'
+
+
+# returns all metrics of a registry in the Prometheus text-based exposition format (version 0.0.4)
+def exposition_builder(registry):
+
+  lines = []
+  with registry['lock']:
+    for name, metric in registry['metrics'].items():
+      lines.append('# HELP ' + name + ' ' + metric['help'].replace('\\', '\\\\').replace('\n', '\\n'))
+      lines.append('# TYPE ' + name + ' ' + metric['type'])
+      for key, sample in metric['samples'].items():
+        if metric['type'] != METRIC_TYPE_HISTOGRAM_:
+          lines.append(name + labels_formatter(key) + ' ' + value_formatter(sample))
+          continue
+        # histogram buckets are cumulative
+        cumulative_count = 0
+        for upper_bound, count in zip(metric['buckets'] + (math.inf, ), sample[0]):
+          cumulative_count += count
+          lines.append(name + '_bucket' + labels_formatter(key, ('le', value_formatter(float(upper_bound)))) + ' ' + str(cumulative_count))
+        lines.append(name + '_sum' + labels_formatter(key) + ' ' + value_formatter(sample[1]))
+        lines.append(name + '_count' + labels_formatter(key) + ' ' + str(sample[2]))
+  return '\n'.join(lines) + '\n'
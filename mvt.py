@@ -0,0 +1,120 @@
+import struct
+
+
+
+# global constants
+
+MVT_VERSION_ = 2
+DEFAULT_EXTENT_ = 4096
+GEOMETRY_TYPE_POINT_ = 1
+GEOMETRY_TYPE_POLYGON_ = 3
+COMMAND_MOVE_TO_ = 1
+COMMAND_LINE_TO_ = 2
+COMMAND_CLOSE_PATH_ = 7
+WIRE_TYPE_VARINT_ = 0
+WIRE_TYPE_64_BIT_ = 1
+WIRE_TYPE_LENGTH_DELIMITED_ = 2
+
+
+
+# custom functions: Protocol Buffers encoding
+
+# encodes an unsigned integer as a varint
+def varint_encoder(value):
+
+  encoded = bytearray()
+  while value > 0x7f:
+    encoded.append((value & 0x7f) | 0x80)
+    value >>= 7
+  encoded.append(value)
+  return bytes(encoded)
+
+
+# encodes a signed integer via zigzag encoding (so that small negative numbers stay small)
+def zigzag_encoder(value):
+
+  return (value << 1) ^ (value >> 63)
+
+
+# encodes a geometry command and the number of its parameter pairs as a command integer
+def command_encoder(command, count):
+
+  return (command & 0x7) | (count << 3)
+
+
+# encodes the key of a field (its number and its wire type)
+def key_encoder(field_number, wire_type):
+
+  return varint_encoder((field_number << 3) | wire_type)
+
+
+# encodes a length-delimited field (bytes, strings, embedded messages and packed repeated fields)
+def length_delimited_encoder(field_number, data):
+
+  return key_encoder(field_number, WIRE_TYPE_LENGTH_DELIMITED_) + varint_encoder(len(data)) + data
+
+
+# encodes a packed repeated field of unsigned integers
+def packed_encoder(field_number, values):
+
+  return length_delimited_encoder(field_number, b''.join(varint_encoder(value) for value in values))
+
+
+
+# custom functions: geometries (as command integers, with pixel coordinates within the extent of the tile, y axis pointing down)
+
+# returns the geometry of a point
+def point_geometry(x, y):
+
+  return [ command_encoder(COMMAND_MOVE_TO_, 1), zigzag_encoder(x), zigzag_encoder(y) ]
+
+
+# returns the geometry of a polygon with a single ring (given by its distinct vertices, without repeating the first one, in clockwise order as seen on screen)
+def polygon_geometry(ring):
+
+  geometry = [ command_encoder(COMMAND_MOVE_TO_, 1), zigzag_encoder(ring[0][0]), zigzag_encoder(ring[0][1]), command_encoder(COMMAND_LINE_TO_, len(ring) - 1) ]
+  for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+    geometry.append(zigzag_encoder(x2 - x1))
+    geometry.append(zigzag_encoder(y2 - y1))
+  geometry.append(command_encoder(COMMAND_CLOSE_PATH_, 1))
+  return geometry
+
+
+
+# custom functions: tiles
+
+# encodes a value of the value table of a layer (strings, integers and floating point numbers)
+def value_encoder(value):
+
+  if isinstance(value, str):
+    return length_delimited_encoder(1, value.encode('utf-8'))
+  if isinstance(value, bool):
+    return key_encoder(7, WIRE_TYPE_VARINT_) + varint_encoder(int(value))
+  if isinstance(value, int):
+    return key_encoder(5, WIRE_TYPE_VARINT_) + varint_encoder(value) if value >= 0 else key_encoder(6, WIRE_TYPE_VARINT_) + varint_encoder(zigzag_encoder(value))
+  return key_encoder(3, WIRE_TYPE_64_BIT_) + struct.pack('<d', value)
+
+
+# returns a Mapbox Vector Tile (version 2) with a single layer:
+# the features are tuples of geometry type, properties (as a list of values in the order of the keys, None for missing ones) and geometry (as command integers)
+def tile_encoder(layer_name, keys, features, extent = DEFAULT_EXTENT_):
+
+  # build the value table (each distinct value only once) and the features referring to it
+  value_indexes = {}
+  encoded_features = []
+  for geometry_type, properties, geometry in features:
+    tags = []
+    for key_index, value in enumerate(properties):
+      if value is None:
+        continue
+      value_index = value_indexes.setdefault((type(value), value), len(value_indexes))
+      tags.append(key_index)
+      tags.append(value_index)
+    encoded_features.append(length_delimited_encoder(2, packed_encoder(2, tags) + key_encoder(3, WIRE_TYPE_VARINT_) + varint_encoder(geometry_type) + packed_encoder(4, geometry)))
+
+  layer = [ key_encoder(15, WIRE_TYPE_VARINT_) + varint_encoder(MVT_VERSION_), length_delimited_encoder(1, layer_name.encode('utf-8')) ]
+  layer.extend(encoded_features)
+  layer.extend(length_delimited_encoder(3, key.encode('utf-8')) for key in keys)
+  layer.extend(length_delimited_encoder(4, value_encoder(value)) for (_, value) in value_indexes)
+  layer.append(key_encoder(5, WIRE_TYPE_VARINT_) + varint_encoder(extent))
+  return length_delimited_encoder(3, b''.join(layer))
@@ -1,11 +1,30 @@
-from flask import Flask, jsonify, redirect, request
+from collections import namedtuple, OrderedDict
+from contextlib import contextmanager
+from flask import abort, Flask, g, has_request_context, redirect, request, Response, stream_with_context
 from flask_compress import Compress
+import gazetteer
+import hashlib
+import itertools
+import json
 import math
+import metrics
+import mvt
+import numpy as np
 import openlocationcode as olc
 import pyproj as p
 import re
 import requests as req
-from urllib.parse import quote_plus, unquote
+from requests.adapters import HTTPAdapter
+import sqlite3
+import struct
+import threading
+import time
+from urllib3.util.retry import Retry
+# optional: fast JSON serialisation (falling back to the standard library if not available)
+try:
+  import orjson
+except ImportError:
+  orjson = None
 
 
 
@@ -13,9 +32,22 @@ from urllib.parse import quote_plus, unquote
 
 QUERY_SEPARATOR_ = ','
 QUERY_ADDITIONAL_SEPARATOR_ = ' '
+QUERY_SEPARATORS_PATTERN_ = re.compile('[' + re.escape(QUERY_SEPARATOR_ + QUERY_ADDITIONAL_SEPARATOR_) + ']+')
+QUERY_CODE_CHARACTERS_ = frozenset(olc.CODE_ALPHABET_)
 OLC_EPSG_ = 4326
 OLC_PRECISION_ = len(str(0.000125)[2:])
-EARTH_RADIUS_ = 6371 # kilometers
+CODE_REGIONAL_NOT_DEFINABLE_ = 'not definable'
+DEFAULT_TRANSFORMER_CACHE_SIZE_ = 16
+DEFAULT_MUNICIPALITY_REVERSE_CACHE_LEVEL_ = 4
+DEFAULT_MUNICIPALITY_CACHE_TTL_ = 2592000 # seconds
+DEFAULT_MUNICIPALITY_CACHE_NEGATIVE_TTL_ = 86400 # seconds
+DEFAULT_MUNICIPALITY_CACHE_SIZE_ = 100000
+DEFAULT_MUNICIPALITY_POOL_SIZE_ = 10
+DEFAULT_MUNICIPALITY_RETRIES_ = 0
+DEFAULT_MUNICIPALITY_GAZETTEER_NAME_FIELD_ = 'name'
+DEFAULT_MUNICIPALITY_NAME_MIN_SCORE_ = 0.5
+DEFAULT_MAP_CHUNK_SIZE_ = 1000
+DEFAULT_TILE_LEVELS_ = { 1: 0, 2: 5, 3: 9, 4: 14, 5: 18 } # OLC level: minimum zoom level
 
 
 
@@ -28,6 +60,34 @@ DEFAULT_EPSG_OUT_ERROR_MESSAGE_ = 'value of optional \'epsg_out\' parameter is n
 DEFAULT_ERROR_MESSAGE_ = 'value of required \'query\' parameter is neither a valid pair of coordinates (required order: longitude/x,latitude/y) nor a valid Plus code'
 DEFAULT_ERROR_REGIONAL_MESSAGE_ = 'provided regional Plus code is not valid or could not be resolved due to a non-reachable third party API'
 DEFAULT_MAP_ERROR_MESSAGE_ = 'value of required \'bbox\' parameter is not a valid quadruple of coordinates (required order: southwest longitude/x,southwest latitude/y,northeast longitude/x,northeast latitude/y)'
+DEFAULT_PRETTY_ = True
+DEFAULT_RESPONSE_CACHE_SIZE_ = 10000
+DEFAULT_RESPONSE_CACHE_MAX_AGE_ = 3600 # seconds
+DEFAULT_BATCH_MAX_QUERIES_ = 10000
+DEFAULT_BATCH_MAX_UPSTREAM_LOOKUPS_ = 10
+DEFAULT_MAP_FORMATS_ = ['geojson', 'ndjson', 'topojson', 'mvt']
+DEFAULT_MAP_FORMAT_ = 'geojson'
+DEFAULT_MAP_STREAM_ = False
+DEFAULT_MAP_TARGET_FEATURES_ = 400
+DEFAULT_MAP_MAX_FEATURES_ = 10000
+NDJSON_MIMETYPE_ = 'application/x-ndjson'
+MVT_MIMETYPE_ = 'application/vnd.mapbox-vector-tile'
+DEFAULT_MVT_EXTENT_ = 4096
+DEFAULT_TILE_FORMATS_ = ['geojson', 'mvt']
+DEFAULT_TILE_FORMAT_ = 'geojson'
+DEFAULT_TILE_MAX_ZOOM_ = 22
+DEFAULT_TILE_CACHE_SIZE_ = 10000
+DEFAULT_TILE_MAX_AGE_ = 86400 # seconds
+DEFAULT_METRICS_ = True
+DEFAULT_SERVER_TIMING_ = True
+INSTRUMENTED_CACHES_ = ['response', 'tile', 'municipality_forward', 'municipality_reverse', 'gazetteer_forward', 'gazetteer_reverse']
+
+
+
+# global types
+
+# typed query (as returned by the query tokeniser): its type ('coordinates', 'full', 'short' or 'regional'), the pair of coordinates (if of type 'coordinates') and the Plus code and the municipality name (if of type 'regional', the Plus code only if of type 'full' or 'short')
+Query = namedtuple('Query', ['type', 'x', 'y', 'code', 'municipality_name'])
 
 
 
@@ -49,6 +109,90 @@ Compress(app)
 
 
 
+# initialise transformer registry:
+# definitions of transformations (shared by all threads) and transformers (per thread, since they are not thread-safe)
+
+transformer_definitions_ = OrderedDict()
+transformer_definitions_lock_ = threading.Lock()
+transformer_instances_ = threading.local()
+
+
+
+# initialise cache:
+# connections to the (persistent) cache database (per thread, since SQLite connections must not be shared between threads)
+
+cache_connections_ = threading.local()
+
+
+
+# initialise gazetteer:
+# spatial index of municipality boundaries for reverse lookups and name index of municipalities for forward lookups without Nominatim (loaded at startup if a file of municipality boundaries is configured in settings)
+
+municipality_gazetteer_ = None
+municipality_names_ = None
+
+
+
+# initialise tile cache:
+# generated tiles (serialised, with their ETag) by tile and EPSG code, the least recently used ones first (shared by all threads)
+
+tile_cache_ = OrderedDict()
+tile_cache_lock_ = threading.Lock()
+
+
+
+# initialise response cache:
+# serialised responses of the main entry point (with their ETag and expiry time) by normalised query and EPSG codes, the least recently used ones first (shared by all threads)
+
+response_cache_ = OrderedDict()
+response_cache_lock_ = threading.Lock()
+
+
+
+# initialise metrics:
+# durations of requests and of their stages, requests to third party APIs, cache lookups and grid cells, aggregated per process (shared by all threads)
+
+metrics_ = metrics.registry_builder()
+metrics.metric_definer(metrics_, 'olca_request_duration_seconds', metrics.METRIC_TYPE_HISTOGRAM_, 'Duration of requests (streamed ones until their last chunk) by entry point and HTTP status.', metrics.DEFAULT_DURATION_BUCKETS_)
+metrics.metric_definer(metrics_, 'olca_stage_duration_seconds', metrics.METRIC_TYPE_HISTOGRAM_, 'Duration of the stages of requests (excluding the stages nested within them, summed up per request) by entry point and stage.', metrics.DEFAULT_DURATION_BUCKETS_)
+metrics.metric_definer(metrics_, 'olca_upstream_requests_total', metrics.METRIC_TYPE_COUNTER_, 'Requests to third party APIs by API and outcome.')
+metrics.metric_definer(metrics_, 'olca_upstream_duration_seconds', metrics.METRIC_TYPE_HISTOGRAM_, 'Duration of requests to third party APIs by API.', metrics.DEFAULT_DURATION_BUCKETS_)
+metrics.metric_definer(metrics_, 'olca_cache_lookups_total', metrics.METRIC_TYPE_COUNTER_, 'Cache lookups by cache and result.')
+metrics.metric_definer(metrics_, 'olca_cache_hit_ratio', metrics.METRIC_TYPE_GAUGE_, 'Share of cache lookups resulting in a hit by cache.')
+metrics.metric_definer(metrics_, 'olca_cache_entries', metrics.METRIC_TYPE_GAUGE_, 'Entries of the in-process caches by cache.')
+metrics.metric_definer(metrics_, 'olca_grid_cells', metrics.METRIC_TYPE_HISTOGRAM_, 'Grid cells produced per request by entry point.', metrics.DEFAULT_COUNT_BUCKETS_)
+metrics.metric_definer(metrics_, 'olca_upstream_budget_exhausted_total', metrics.METRIC_TYPE_COUNTER_, 'Lookups not querying a third party API since the budget of lookups of their batch was used up.')
+metrics.metric_definer(metrics_, 'olca_map_budget_total', metrics.METRIC_TYPE_COUNTER_, 'Requests to the map-like entry point exceeding the maximum number of features even on OLC level 1 by outcome (rejected).')
+
+
+
+# initialise HTTP session:
+# pooled keep-alive connections to Nominatim (shared by all threads), with proxy, request header(s) and retries from settings
+
+municipality_retries_ = app.config['MUNICIPALITY_RETRIES'] if 'MUNICIPALITY_RETRIES' in app.config else DEFAULT_MUNICIPALITY_RETRIES_
+municipality_session_ = req.Session()
+municipality_adapter_ = HTTPAdapter(
+  pool_connections = 2,
+  pool_maxsize = app.config['MUNICIPALITY_POOL_SIZE'] if 'MUNICIPALITY_POOL_SIZE' in app.config else DEFAULT_MUNICIPALITY_POOL_SIZE_,
+  # retry on connection errors only (which fail fast), never on read timeouts or error responses, which would hold the thread for another timeout or for the Retry-After of a rate limit
+  max_retries = Retry(
+    total = municipality_retries_,
+    connect = municipality_retries_,
+    read = 0,
+    status = 0,
+    backoff_factor = 0.1,
+    allowed_methods = ['GET']
+  )
+)
+municipality_session_.mount('http://', municipality_adapter_)
+municipality_session_.mount('https://', municipality_adapter_)
+if 'MUNICIPALITY_PROXY' in app.config:
+  municipality_session_.proxies.update(app.config['MUNICIPALITY_PROXY'])
+if 'CUSTOM_REQUEST_HEADERS' in app.config:
+  municipality_session_.headers.update(app.config['CUSTOM_REQUEST_HEADERS'])
+
+
+
 # custom functions: core functionality
 
 # extracts digits from a text
@@ -62,20 +206,147 @@ def digit_extractor(text):
     return text
 
 
-# calculates the great circle distance of two geographical points
-def distance_calculator(from_point_x, from_point_y, to_point_x, to_point_y):
+# returns the instrumentation record of the current request (its start, the durations of its stages, the stack of its running stages, its number of grid cells and its HTTP status), None outside of requests
+def instrumentation_getter():
+
+  if not has_request_context():
+    return None
+  record = getattr(g, 'instrumentation', None)
+  if record is None:
+    record = g.instrumentation = { 'start': time.perf_counter(), 'stages': OrderedDict(), 'stack': [], 'cells': 0, 'status': None }
+  return record
+
+
+# times a stage of the current request (as a context manager):
+# the durations of stages nested within it are excluded, so that the durations of all stages of a request add up
+@contextmanager
+def stage_timer(stage):
+
+  record = instrumentation_getter()
+  if record is None:
+    yield
+    return
+  record['stack'].append(0.0)
+  start = time.perf_counter()
+  try:
+    yield
+  finally:
+    duration = time.perf_counter() - start
+    nested_duration = record['stack'].pop()
+    record['stages'][stage] = record['stages'].get(stage, 0.0) + duration - nested_duration
+    if record['stack']:
+      record['stack'][-1] += duration
+
+
+# counts a cache lookup (either a hit or a miss)
+def cache_lookup_counter(cache, hit):
+
+  metrics.counter_incrementer(metrics_, 'olca_cache_lookups_total', { 'cache': cache, 'result': 'hit' if hit else 'miss' })
+
+
+# counts a request to a third party API (either successful or not) and observes its duration
+def upstream_request_counter(upstream, success, duration):
 
-  from_point_x, from_point_y, to_point_x, to_point_y = map(math.radians, [from_point_x, from_point_y, to_point_x, to_point_y])
-  dlon = to_point_x - from_point_x
-  dlat = to_point_y - from_point_y
-  a = math.sin(dlat / 2) ** 2 + math.cos(from_point_y) * math.cos(to_point_y) * math.sin(dlon / 2) ** 2
+  metrics.counter_incrementer(metrics_, 'olca_upstream_requests_total', { 'upstream': upstream, 'outcome': 'success' if success else 'error' })
+  metrics.histogram_observer(metrics_, 'olca_upstream_duration_seconds', duration, { 'upstream': upstream })
 
-  # return calculated distance
-  return 2 * EARTH_RADIUS_ * math.asin(math.sqrt(a))
 
+# counts grid cells produced for the current request
+def grid_cells_counter(count):
 
-# returns a municipality centroid on querying a municipality name
-def municipality_forward_searcher(municipality_name):
+  record = instrumentation_getter()
+  if record is not None:
+    record['cells'] += count
+
+
+# returns the connection of the current thread to the cache database, creating the database if necessary
+def cache_connector():
+
+  connection = getattr(cache_connections_, 'connection', None)
+  if connection is None:
+    # autocommit mode and write-ahead logging, so that readers (in other threads or processes) are never blocked
+    connection = sqlite3.connect(app.config['MUNICIPALITY_CACHE_FILE'], timeout = 3, isolation_level = None)
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('CREATE TABLE IF NOT EXISTS cache (namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT, expires REAL NOT NULL, PRIMARY KEY (namespace, key))')
+    connection.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (namespace, expires)')
+    cache_connections_.connection = connection
+  return connection
+
+
+# returns whether a key was found in the cache and its (JSON-decoded) value if so
+def cache_getter(namespace, key):
+
+  # no cache if not configured in settings
+  if 'MUNICIPALITY_CACHE_FILE' not in app.config:
+    return False, None
+  try:
+    row = cache_connector().execute('SELECT value, expires FROM cache WHERE namespace = ? AND key = ?', (namespace, key)).fetchone()
+  except sqlite3.Error as e:
+    app.logger.warning('cache not readable: %s', e)
+    cache_lookup_counter(namespace, False)
+    return False, None
+  # expired entries are treated as missing
+  if row is None or row[1] < time.time():
+    cache_lookup_counter(namespace, False)
+    return False, None
+  cache_lookup_counter(namespace, True)
+  return True, json.loads(row[0])
+
+
+# stores a (JSON-encodable) value for a key in the cache for its time to live, evicting expired and the soonest expiring entries beyond the size limit
+def cache_setter(namespace, key, value, ttl, size):
+
+  # no cache if not configured in settings
+  if 'MUNICIPALITY_CACHE_FILE' not in app.config:
+    return
+  now = time.time()
+  try:
+    connection = cache_connector()
+    connection.execute('INSERT OR REPLACE INTO cache (namespace, key, value, expires) VALUES (?, ?, ?, ?)', (namespace, key, json.dumps(value), now + ttl))
+    connection.execute('DELETE FROM cache WHERE namespace = ? AND expires < ?', (namespace, now))
+    # evict only if the size limit is exceeded, and then only the excess soonest expiring entries (walking the index on expiry instead of sorting the whole namespace)
+    excess = connection.execute('SELECT COUNT(*) FROM cache WHERE namespace = ?', (namespace, )).fetchone()[0] - size
+    if excess > 0:
+      connection.execute('DELETE FROM cache WHERE namespace = ? AND key IN (SELECT key FROM cache WHERE namespace = ? ORDER BY expires LIMIT ?)', (namespace, namespace, excess))
+  except sqlite3.Error as e:
+    app.logger.warning('cache not writable: %s', e)
+
+
+# returns whether a lookup may query a third party API, using up one of the lookups left of a budget if provided (so that a batch cannot query it without limit)
+def upstream_budget_spender(upstream_budget):
+
+  if upstream_budget is None:
+    return True
+  if upstream_budget['lookups'] <= 0:
+    metrics.counter_incrementer(metrics_, 'olca_upstream_budget_exhausted_total')
+    return False
+  upstream_budget['lookups'] -= 1
+  return True
+
+
+# returns a municipality centroid and the score of the match (between 0 and 1) on querying a municipality name, querying Nominatim only if a budget of lookups is not provided or not used up yet
+def municipality_forward_searcher(municipality_name, upstream_budget = None):
+
+  # return the centroid of the best matching municipality from the name index if possible (if nothing matches well enough to be accepted, Nominatim is queried)
+  if municipality_names_ is not None:
+    with stage_timer('gazetteer'):
+      match = gazetteer.name_finder(municipality_names_, municipality_name)
+    min_score = app.config['MUNICIPALITY_NAME_MIN_SCORE'] if 'MUNICIPALITY_NAME_MIN_SCORE' in app.config else DEFAULT_MUNICIPALITY_NAME_MIN_SCORE_
+    accepted = match is not None and match[3] >= min_score
+    cache_lookup_counter('gazetteer_forward', accepted)
+    if accepted:
+      return match[1], match[2], match[3]
+
+  # return the municipality centroid (or the information that none was found) from the cache if possible, using the case-folded and whitespace-collapsed municipality name as key
+  key = ' '.join(municipality_name.split()).casefold()
+  with stage_timer('municipality_cache'):
+    found, centroid = cache_getter('municipality_forward', key)
+  if found:
+    return (centroid[0], centroid[1], 1.0) if centroid is not None else (None, None, 0.0)
+
+  # give up if the budget of lookups querying Nominatim is used up
+  if not upstream_budget_spender(upstream_budget):
+    return None, None, 0.0
 
   # get Nominatim base URL in forward geocoder mode (returning municipality centroids on querying municipality names) from settings
   municipality_forward_url = app.config['MUNICIPALITY_FORWARD_URL']
@@ -83,22 +354,53 @@ def municipality_forward_searcher(municipality_name):
   # build the query string
   query = '&city=' + municipality_name
 
-  # set request header(s)
-  headers = app.config['CUSTOM_REQUEST_HEADERS']
-
-  # query Nominatim (via proxy if necessary), process the response and return the centroid pair of coordinates of the first municipality found
+  # query Nominatim (via the pooled session), process the response and take the centroid pair of coordinates of the first municipality found
+  start = time.perf_counter()
   try:
-    response = req.get(municipality_forward_url + query, proxies = app.config['MUNICIPALITY_PROXY'], headers = headers, timeout = 3).json() if 'MUNICIPALITY_PROXY' in app.config else req.get(municipality_forward_url + query, headers = headers, timeout = 3).json()
+    with stage_timer('nominatim'):
+      response = municipality_session_.get(municipality_forward_url + query, timeout = 3).json()
+    centroid = None
     for response_item in response:
       if response_item['type'] == 'administrative' or response_item['type'] == 'city' or response_item['type'] == 'town':
-        return float(response_item['lon']), float(response_item['lat'])
-    return None, None
+        centroid = [float(response_item['lon']), float(response_item['lat'])]
+        break
   except:
-    return None, None
-
+    upstream_request_counter('nominatim_forward', False, time.perf_counter() - start)
+    return None, None, 0.0
+  upstream_request_counter('nominatim_forward', True, time.perf_counter() - start)
 
-# returns a municipality name on querying a pair of coordinates (i.e. a municipality centroid)
-def municipality_reverse_searcher(x, y, code_local):
+  # store the municipality centroid in the cache, or the information that none was found (so that unknown municipality names fail fast), but not errors (so that these are retried)
+  if centroid is not None:
+    ttl = app.config['MUNICIPALITY_CACHE_TTL'] if 'MUNICIPALITY_CACHE_TTL' in app.config else DEFAULT_MUNICIPALITY_CACHE_TTL_
+  else:
+    ttl = app.config['MUNICIPALITY_CACHE_NEGATIVE_TTL'] if 'MUNICIPALITY_CACHE_NEGATIVE_TTL' in app.config else DEFAULT_MUNICIPALITY_CACHE_NEGATIVE_TTL_
+  size = app.config['MUNICIPALITY_CACHE_SIZE'] if 'MUNICIPALITY_CACHE_SIZE' in app.config else DEFAULT_MUNICIPALITY_CACHE_SIZE_
+  with stage_timer('municipality_cache'):
+    cache_setter('municipality_forward', key, centroid, ttl, size)
+  return (centroid[0], centroid[1], 1.0) if centroid is not None else (None, None, 0.0)
+
+
+# returns a municipality name (or None if none was found) on querying a pair of coordinates (i.e. a municipality centroid)
+def municipality_reverse_searcher(x, y, parent_code = None, bucket_code = None, upstream_budget = None):
+
+  # return the name of the municipality the pair of coordinates lies within from the gazetteer if possible (using the level 3 Plus code of the pair of coordinates if provided)
+  if municipality_gazetteer_ is not None:
+    with stage_timer('gazetteer'):
+      municipality_name = gazetteer.municipality_finder(municipality_gazetteer_, x, y, bucket_code)
+    cache_lookup_counter('gazetteer_reverse', municipality_name is not None)
+    if municipality_name is not None:
+      return municipality_name
+
+  # return the municipality name of the parent Plus code from the cache if possible
+  if parent_code is not None:
+    with stage_timer('municipality_cache'):
+      found, municipality_name = cache_getter('municipality_reverse', parent_code)
+    if found:
+      return municipality_name
+
+  # give up if the budget of lookups querying Nominatim is used up
+  if not upstream_budget_spender(upstream_budget):
+    return None
 
   # get Nominatim base URL in reverse geocoder mode (returning a municipality name on querying pairs of coordinates) from settings
   municipality_reverse_url = app.config['MUNICIPALITY_REVERSE_URL']
@@ -106,15 +408,102 @@ def municipality_reverse_searcher(x, y, code_local):
   # build the query string
   query = '&lon=' + str(x) + '&lat=' + str(y)
 
-  # set request header(s)
-  headers = app.config['CUSTOM_REQUEST_HEADERS']
-
-  # query Nominatim (via proxy if necessary) and return the municipality name
+  # query Nominatim (via the pooled session) and return the municipality name
+  start = time.perf_counter()
   try:
-    response = req.get(municipality_reverse_url + query, proxies = app.config['MUNICIPALITY_PROXY'], headers = headers, timeout = 3).json() if 'MUNICIPALITY_PROXY' in app.config else req.get(municipality_reverse_url + query, headers = headers, timeout = 3).json()
-    return code_local + ', ' + response['name']
+    with stage_timer('nominatim'):
+      response = municipality_session_.get(municipality_reverse_url + query, timeout = 3).json()
+    municipality_name = response['name']
   except:
-    return 'not definable'
+    upstream_request_counter('nominatim_reverse', False, time.perf_counter() - start)
+    return None
+  upstream_request_counter('nominatim_reverse', True, time.perf_counter() - start)
+
+  # store the municipality name of the parent Plus code in the cache (only if found, so that errors are retried)
+  if parent_code is not None:
+    ttl = app.config['MUNICIPALITY_CACHE_TTL'] if 'MUNICIPALITY_CACHE_TTL' in app.config else DEFAULT_MUNICIPALITY_CACHE_TTL_
+    size = app.config['MUNICIPALITY_CACHE_SIZE'] if 'MUNICIPALITY_CACHE_SIZE' in app.config else DEFAULT_MUNICIPALITY_CACHE_SIZE_
+    with stage_timer('municipality_cache'):
+      cache_setter('municipality_reverse', parent_code, municipality_name, ttl, size)
+  return municipality_name
+
+
+# returns a (cached) transformer from one EPSG code to another
+def transformer_getter(source_epsg, target_epsg):
+
+  # get maximum number of transformers to keep (per thread) from settings
+  cache_size = app.config['TRANSFORMER_CACHE_SIZE'] if 'TRANSFORMER_CACHE_SIZE' in app.config else DEFAULT_TRANSFORMER_CACHE_SIZE_
+  key = (source_epsg, target_epsg)
+
+  # return the transformer of the current thread if there is one already, marking it as the most recently used one
+  transformers = getattr(transformer_instances_, 'transformers', None)
+  if transformers is None:
+    transformers = transformer_instances_.transformers = OrderedDict()
+  if key in transformers:
+    transformers.move_to_end(key)
+    return transformers[key]
+
+  # build the transformer from the definition another thread already determined if possible (cheap)…
+  transformer = None
+  with transformer_definitions_lock_:
+    definition = transformer_definitions_.get(key)
+    if definition is not None:
+      transformer_definitions_.move_to_end(key)
+  if definition is not None:
+    try:
+      transformer = p.Transformer.from_pipeline(definition)
+    except p.exceptions.ProjError:
+      transformer = None
+  # …and from scratch if not (expensive, since the transformation has to be looked up in the CRS database)
+  if transformer is None:
+    source_projection = p.Proj(init = 'epsg:' + str(source_epsg))
+    target_projection = p.Proj(init = 'epsg:' + str(target_epsg))
+    transformer = p.Transformer.from_proj(source_projection, target_projection)
+    # share the definition with all other threads (only possible if the transformation is a single operation)
+    try:
+      definition = transformer.to_json()
+    except p.exceptions.ProjError:
+      definition = None
+    if definition is not None:
+      with transformer_definitions_lock_:
+        transformer_definitions_[key] = definition
+        while len(transformer_definitions_) > cache_size:
+          transformer_definitions_.popitem(last = False)
+
+  # keep the transformer for the current thread, evicting the least recently used one(s) if necessary
+  transformers[key] = transformer
+  while len(transformers) > cache_size:
+    transformers.popitem(last = False)
+  return transformer
+
+
+# returns the spatial index and the name index of the municipality boundaries in the file configured in settings (or None for both if the file is not readable, so that Nominatim is used instead)
+def gazetteer_loader():
+
+  try:
+    municipalities = gazetteer.municipalities_reader(
+      app.config['MUNICIPALITY_GAZETTEER_FILE'],
+      app.config['MUNICIPALITY_GAZETTEER_NAME_FIELD'] if 'MUNICIPALITY_GAZETTEER_NAME_FIELD' in app.config else DEFAULT_MUNICIPALITY_GAZETTEER_NAME_FIELD_,
+      app.config['MUNICIPALITY_GAZETTEER_LAYER'] if 'MUNICIPALITY_GAZETTEER_LAYER' in app.config else None
+    )
+  except (OSError, ValueError, KeyError, TypeError, struct.error, sqlite3.Error, p.exceptions.CRSError) as e:
+    app.logger.warning('municipality boundaries could not be loaded: %s', e)
+    return None, None
+  return gazetteer.index_builder(municipalities), gazetteer.name_index_builder(municipalities)
+
+
+# prepares the transformers from and to all EPSG codes listed in settings
+def transformer_prewarmer():
+
+  epsg_codes = set(app.config['TRANSFORMER_PREWARM_EPSG_CODES'] if 'TRANSFORMER_PREWARM_EPSG_CODES' in app.config else [])
+  epsg_codes.update(app.config[key] for key in ('DEFAULT_EPSG_IN', 'DEFAULT_EPSG_OUT', 'DEFAULT_MAP_EPSG_IN', 'DEFAULT_MAP_EPSG_OUT') if key in app.config)
+  epsg_codes.discard(OLC_EPSG_)
+  for epsg_code in sorted(epsg_codes):
+    try:
+      transformer_getter(epsg_code, OLC_EPSG_)
+      transformer_getter(OLC_EPSG_, epsg_code)
+    except p.exceptions.CRSError:
+      app.logger.warning('transformations from and to EPSG code %s could not be prepared', epsg_code)
 
 
 # reprojects (transforms) a point from one EPSG code to another
@@ -124,126 +513,318 @@ def point_reprojector(transformer, source_x, source_y):
   return transformer.transform(source_x, source_y)
 
 
-# Open Location Code (OLC) handler
-def olc_handler(x, y, query, epsg_in, epsg_out, code_regional):
+# reprojects (transforms) multiple points from one EPSG code to another at once
+def points_reprojector(transformer, source_xs, source_ys):
 
-  # if necessary…
-  if code_regional:
-    # decode queried regional Plus code if it is valid, return an error if not
-    municipality_centroid_x, municipality_centroid_y = municipality_forward_searcher(query[1])
-    try:
-      query = olc.recoverNearest(query[0], municipality_centroid_y, municipality_centroid_x)
-      recovered_coord = olc.decode(query)
-      recovered_center_x, recovered_center_y = recovered_coord.longitudeCenter, recovered_coord.latitudeCenter
-      # return an error if municipality centroid is further away than 0.25 degrees from the centroid of the recovered nearest matching code
-      if abs(abs(municipality_centroid_x) - abs(recovered_center_x)) > 0.25 or abs(abs(municipality_centroid_y) - abs(recovered_center_y)) > 0.25:
-        return { 'message': DEFAULT_ERROR_REGIONAL_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
-    except:
-      return { 'message': DEFAULT_ERROR_REGIONAL_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
+  # transform all points in one go
+  target_xs, target_ys = transformer.transform(np.asarray(source_xs, dtype = float), np.asarray(source_ys, dtype = float))
 
-  # if a pair of coordinates was queried…
-  if query is None:
-    # transform if EPSG code of queried pair of coordinates is not equal to default EPSG code of OLC
-    if epsg_in != OLC_EPSG_:
-      try:
-        source_projection = p.Proj(init = 'epsg:' + str(epsg_in))
-        target_projection = p.Proj(init = 'epsg:' + str(OLC_EPSG_))
-        transformer = p.Transformer.from_proj(source_projection, target_projection)
-        x, y = point_reprojector(transformer, x, y)
-      except:
-        return { 'message': 'transformation of provided pair of coordinates (required order: longitude/x,latitude/y) not possible', 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
-    # encode queried pair of coordinates
-    code = olc.encode(y, x)
-  # if not…
+  # return reprojected (transformed) points if all of them could be transformed, raise an error if not
+  if not (np.isfinite(target_xs).all() and np.isfinite(target_ys).all()):
+    raise ValueError('transformation of at least one pair of coordinates not possible')
+  return target_xs.tolist(), target_ys.tolist()
+
+
+# returns the regional Plus code of a Plus code of level 5 (or 'not definable' if the municipality lookup failed), looking the municipality up for the parent Plus code of the level configured in settings:
+# municipality names already looked up for parent Plus codes are reused if a dictionary of them is provided
+def regional_code_getter(coord, code_local, code_hierarchy, municipality_names = None, upstream_budget = None):
+
+  cache_level = app.config['MUNICIPALITY_REVERSE_CACHE_LEVEL'] if 'MUNICIPALITY_REVERSE_CACHE_LEVEL' in app.config else DEFAULT_MUNICIPALITY_REVERSE_CACHE_LEVEL_
+  parent_code = code_hierarchy[cache_level - 1]
+  if municipality_names is not None and parent_code in municipality_names:
+    municipality_name = municipality_names[parent_code]
   else:
-    # take query (as is) as the Plus code
-    code = query
+    municipality_name = municipality_reverse_searcher(coord.longitudeCenter, coord.latitudeCenter, parent_code, code_hierarchy[2], upstream_budget)
+    if municipality_names is not None:
+      municipality_names[parent_code] = municipality_name
+  return code_local + ', ' + municipality_name if municipality_name is not None else CODE_REGIONAL_NOT_DEFINABLE_
+
+
+# returns the Plus code recovered from a regional Plus code as the nearest matching code to a municipality centroid, or None if the regional Plus code is not valid:
+# that is if the municipality name matched too weakly or if the municipality centroid is further away than 0.25 degrees from the centroid of the recovered nearest matching code
+def regional_code_recoverer(code, municipality_centroid_x, municipality_centroid_y, municipality_score):
+
+  # reject weakly matching municipality names right away
+  min_score = app.config['MUNICIPALITY_NAME_MIN_SCORE'] if 'MUNICIPALITY_NAME_MIN_SCORE' in app.config else DEFAULT_MUNICIPALITY_NAME_MIN_SCORE_
+  if municipality_score < min_score:
+    return None
+  try:
+    recovered_code = olc.recoverNearest(code, municipality_centroid_y, municipality_centroid_x)
+    recovered_coord = olc.decode(recovered_code)
+    recovered_center_x, recovered_center_y = recovered_coord.longitudeCenter, recovered_coord.latitudeCenter
+    if abs(abs(municipality_centroid_x) - abs(recovered_center_x)) > 0.25 or abs(abs(municipality_centroid_y) - abs(recovered_center_y)) > 0.25:
+      return None
+  except:
+    return None
+  return recovered_code
+
+
+# describes a Plus code (taking care of short Plus codes), returning its decoded area and its properties (except for the center pair of coordinates):
+# the short Plus code is built relative to the reference pair of coordinates if provided, relative to the code center if not
+def olc_describer(code, epsg_in, epsg_out, reference_x = None, reference_y = None, municipality_names = None, upstream_budget = None):
+
+  # classify the Plus code once, so that decoding does not have to validate it again
+  classified_code = olc.classify(code)
 
   # take care of short Plus code if necessary
-  code = code.split(olc.SEPARATOR_)[0].ljust(8, olc.PADDING_CHARACTER_) + olc.SEPARATOR_ if olc.isShort(code) else code
+  if classified_code.short:
+    code = code.split(olc.SEPARATOR_)[0].ljust(8, olc.PADDING_CHARACTER_) + olc.SEPARATOR_
+    classified_code = olc.classify(code)
 
   # determine the level
   level = len(code.replace(olc.SEPARATOR_, '').rstrip(olc.PADDING_CHARACTER_)) / 2
 
   # decode the Plus code to calculate the center pair of coordinates and the bbox
-  coord = olc.decode(code)
-  center_x, center_y = coord.longitudeCenter, coord.latitudeCenter
-  bbox_sw_x, bbox_sw_y = coord.longitudeLo, coord.latitudeLo
-  bbox_ne_x, bbox_ne_y = coord.longitudeHi, coord.latitudeHi
+  coord = olc.decode(classified_code)
 
-  # get the full Plus code
-  code = olc.encode(center_y, center_x)
-
-  # transform all pairs of coordinates to be returned if EPSG code for all returned pairs of coordinates is not equal to default EPSG code of OLC, round to six decimals each if not
-  if epsg_out != OLC_EPSG_:
-    try:
-      source_projection = p.Proj(init = 'epsg:' + str(OLC_EPSG_))
-      target_projection = p.Proj(init = 'epsg:' + str(epsg_out))
-      transformer = p.Transformer.from_proj(source_projection, target_projection)
-      center_x, center_y = point_reprojector(transformer, center_x, center_y)
-      bbox_sw_x, bbox_sw_y = point_reprojector(transformer, bbox_sw_x, bbox_sw_y)
-      bbox_ne_x, bbox_ne_y = point_reprojector(transformer, bbox_ne_x, bbox_ne_y)
-    except Exception as e:
-      return { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
-  else:
-    center_x, center_y = round(center_x, OLC_PRECISION_), round(center_y, OLC_PRECISION_)
-    bbox_sw_x, bbox_sw_y = round(bbox_sw_x, OLC_PRECISION_), round(bbox_sw_y, OLC_PRECISION_)
-    bbox_ne_x, bbox_ne_y = round(bbox_ne_x, OLC_PRECISION_), round(bbox_ne_y, OLC_PRECISION_)
-
-  # build the bbox
-  bbox = [
-    [
-      [ bbox_sw_x, bbox_sw_y ],
-      [ bbox_ne_x, bbox_sw_y ],
-      [ bbox_ne_x, bbox_ne_y ],
-      [ bbox_sw_x, bbox_ne_y ],
-      [ bbox_sw_x, bbox_sw_y ]
-    ]
-  ]
+  # get the Plus codes of all levels containing the Plus code (the last one being the full Plus code)
+  code_hierarchy = olc.codeHierarchy(classified_code)
+  code = code_hierarchy[-1]
 
   # build the properties
   properties = {
-    # longitude/x of the center pair of coordinates
-    'center_x': center_x,
-    # latitude/y of the center pair of coordinates
-    'center_y': center_y,
-    # grid level 1 code
-    'code_level_1': olc.encode(coord.latitudeCenter, coord.longitudeCenter, 2),
     'epsg_in': epsg_in,
     'epsg_out': epsg_out,
     # grid level
     'level': level
   }
-  if level > 1:
-    # grid level 2 code
-    properties.update( { 'code_level_2': olc.encode(coord.latitudeCenter, coord.longitudeCenter, 4) } )
-  if level > 2:
-    # grid level 3 code
-    properties.update( { 'code_level_3': olc.encode(coord.latitudeCenter, coord.longitudeCenter, 6) } )
-  if level > 3:
-    # grid level 4 code
-    properties.update( { 'code_level_4': olc.encode(coord.latitudeCenter, coord.longitudeCenter, 8) } )
+  # grid level 1 to 4 codes (as far as the level reaches)
+  for code_level, code_level_code in enumerate(code_hierarchy[:4], start = 1):
+    properties['code_level_' + str(code_level)] = code_level_code
   if level > 4:
     # grid level 5 code, local code and short code (depending on the distance between the code center and the reference pair of coordinates)
     code_local = code[4:]
-    properties.update( { 'code_level_5': code, 'code_local': code_local, 'code_short': olc.shorten(code, y, x) if query is None else olc.shorten(code, coord.latitudeCenter, coord.longitudeCenter) } )
+    properties.update( { 'code_level_5': code, 'code_local': code_local, 'code_short': olc.shorten(code, reference_y, reference_x) if reference_x is not None else olc.shorten(code, coord.latitudeCenter, coord.longitudeCenter) } )
     # get all information for adding the regional Plus code if necessary
     if app.config['CODE_REGIONAL_OUT']:
-      properties.update( { 'code_regional': municipality_reverse_searcher(coord.longitudeCenter, coord.latitudeCenter, code_local) } )
+      properties.update( { 'code_regional': regional_code_getter(coord, code_local, code_hierarchy, municipality_names, upstream_budget) } )
+
+  return coord, properties
+
+
+# returns valid GeoJSON for a Plus code from its properties, its center pair of coordinates and its bbox
+def olc_feature_builder(properties, center_x, center_y, bbox_sw_x, bbox_sw_y, bbox_ne_x, bbox_ne_y):
+
+  # longitude/x of the center pair of coordinates
+  properties['center_x'] = center_x
+  # latitude/y of the center pair of coordinates
+  properties['center_y'] = center_y
 
-  # return valid GeoJSON
   return {
     'type': 'Feature',
     'properties': properties,
     'geometry': {
       'type': 'Polygon',
-      'coordinates': bbox
+      'coordinates': [
+        [
+          [ bbox_sw_x, bbox_sw_y ],
+          [ bbox_ne_x, bbox_sw_y ],
+          [ bbox_ne_x, bbox_ne_y ],
+          [ bbox_sw_x, bbox_ne_y ],
+          [ bbox_sw_x, bbox_sw_y ]
+        ]
+      ]
     }
-  }, HTTP_OK_STATUS_
+  }
+
+
+# Open Location Code (OLC) handler, taking a typed query
+def olc_handler(query, epsg_in, epsg_out):
+
+  x, y = query.x, query.y
+
+  # if a regional Plus code was queried…
+  if query.type == 'regional':
+    # decode queried regional Plus code if it is valid, return an error if not
+    municipality_centroid = municipality_forward_searcher(query.municipality_name)
+    with stage_timer('decode'):
+      code = regional_code_recoverer(query.code, *municipality_centroid)
+    if code is None:
+      return { 'message': DEFAULT_ERROR_REGIONAL_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
+  # if a pair of coordinates was queried…
+  elif query.type == 'coordinates':
+    # transform if EPSG code of queried pair of coordinates is not equal to default EPSG code of OLC
+    if epsg_in != OLC_EPSG_:
+      try:
+        with stage_timer('reprojection'):
+          transformer = transformer_getter(epsg_in, OLC_EPSG_)
+          x, y = point_reprojector(transformer, x, y)
+      except:
+        return { 'message': 'transformation of provided pair of coordinates (required order: longitude/x,latitude/y) not possible', 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
+    # encode queried pair of coordinates
+    with stage_timer('encode'):
+      code = olc.encode(y, x)
+  # if not…
+  else:
+    # take query (as is) as the Plus code
+    code = query.code
+
+  # decode and describe the Plus code
+  with stage_timer('decode'):
+    coord, properties = olc_describer(code, epsg_in, epsg_out, x, y)
+  center_x, center_y = coord.longitudeCenter, coord.latitudeCenter
+  bbox_sw_x, bbox_sw_y = coord.longitudeLo, coord.latitudeLo
+  bbox_ne_x, bbox_ne_y = coord.longitudeHi, coord.latitudeHi
+
+  # transform all pairs of coordinates to be returned if EPSG code for all returned pairs of coordinates is not equal to default EPSG code of OLC, round to six decimals each if not
+  if epsg_out != OLC_EPSG_:
+    try:
+      with stage_timer('reprojection'):
+        transformer = transformer_getter(OLC_EPSG_, epsg_out)
+        center_x, center_y = point_reprojector(transformer, center_x, center_y)
+        bbox_sw_x, bbox_sw_y = point_reprojector(transformer, bbox_sw_x, bbox_sw_y)
+        bbox_ne_x, bbox_ne_y = point_reprojector(transformer, bbox_ne_x, bbox_ne_y)
+    except Exception as e:
+      return { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
+  else:
+    center_x, center_y = round(center_x, OLC_PRECISION_), round(center_y, OLC_PRECISION_)
+    bbox_sw_x, bbox_sw_y = round(bbox_sw_x, OLC_PRECISION_), round(bbox_sw_y, OLC_PRECISION_)
+    bbox_ne_x, bbox_ne_y = round(bbox_ne_x, OLC_PRECISION_), round(bbox_ne_y, OLC_PRECISION_)
+
+  # return valid GeoJSON
+  return olc_feature_builder(properties, center_x, center_y, bbox_sw_x, bbox_sw_y, bbox_ne_x, bbox_ne_y), HTTP_OK_STATUS_
+
+
+# OLC batch handler
+def olc_batch_handler(items):
+
+  # prepare list to fill with a GeoJSON feature or an error message per item (in input order)
+  results = [None] * len(items)
+
+  # parse all items (each one either a query or an object with a query and optional EPSG codes) and group them by the type of their query
+  coordinates, regional_codes, codes = {}, [], []
+  epsg_outs = [None] * len(items)
+  for index, item in enumerate(items):
+    if not isinstance(item, dict):
+      item = { 'query': item }
+    query = item.get('query')
+    epsg_in = item.get('epsg_in') if item.get('epsg_in') is not None else app.config['DEFAULT_EPSG_IN']
+    epsg_out = item.get('epsg_out') if item.get('epsg_out') is not None else app.config['DEFAULT_EPSG_OUT']
+    if not isinstance(query, str) or not query:
+      results[index] = 'missing required \'query\' or query empty'
+      continue
+    try:
+      epsg_in = int(digit_extractor(epsg_in))
+    except (TypeError, ValueError):
+      results[index] = DEFAULT_EPSG_IN_ERROR_MESSAGE_
+      continue
+    try:
+      epsg_out = int(digit_extractor(epsg_out))
+    except (TypeError, ValueError):
+      results[index] = DEFAULT_EPSG_OUT_ERROR_MESSAGE_
+      continue
+    epsg_outs[index] = epsg_out
+    try:
+      query = query_tokenizer(query)
+    except ValueError as e:
+      results[index] = str(e)
+      continue
+    if query.type == 'coordinates':
+      coordinates.setdefault(epsg_in, []).append((index, query.x, query.y))
+    elif query.type == 'regional':
+      regional_codes.append((index, epsg_in, query.code, query.municipality_name))
+    else:
+      codes.append((index, epsg_in, query.code, None, None))
+
+  # pairs of coordinates: transform them with one transformer per EPSG code and encode all of them at once
+  encodable = []
+  for epsg_in, group in coordinates.items():
+    xs, ys = [item[1] for item in group], [item[2] for item in group]
+    if epsg_in != OLC_EPSG_:
+      try:
+        xs, ys = transformer_getter(epsg_in, OLC_EPSG_).transform(np.asarray(xs, dtype = float), np.asarray(ys, dtype = float))
+        xs, ys = xs.tolist(), ys.tolist()
+      except:
+        xs = ys = [math.inf] * len(group)
+    for (index, _, _), x, y in zip(group, xs, ys):
+      if math.isfinite(x) and math.isfinite(y):
+        encodable.append((index, epsg_in, x, y))
+      else:
+        results[index] = 'transformation of provided pair of coordinates (required order: longitude/x,latitude/y) not possible'
+  if encodable:
+    encoded_codes = olc.encode_many([item[3] for item in encodable], [item[2] for item in encodable]).tolist()
+    codes.extend((index, epsg_in, code, x, y) for (index, epsg_in, x, y), code in zip(encodable, encoded_codes))
+
+  # limit the lookups querying Nominatim (i.e. those neither answered by the gazetteer nor by the cache) per batch to the number configured in settings:
+  # regional Plus codes beyond are not valid then, and regional Plus codes to be returned beyond are not definable
+  upstream_budget = { 'lookups': app.config['BATCH_MAX_UPSTREAM_LOOKUPS'] if 'BATCH_MAX_UPSTREAM_LOOKUPS' in app.config else DEFAULT_BATCH_MAX_UPSTREAM_LOOKUPS_ }
+
+  # regional Plus codes: look up every (case-folded and whitespace-collapsed) municipality name only once
+  municipality_centroids = {}
+  for index, epsg_in, code, municipality_name in regional_codes:
+    key = ' '.join(municipality_name.split()).casefold()
+    if key not in municipality_centroids:
+      municipality_centroids[key] = municipality_forward_searcher(municipality_name, upstream_budget)
+    recovered_code = regional_code_recoverer(code, *municipality_centroids[key])
+    if recovered_code is None:
+      results[index] = DEFAULT_ERROR_REGIONAL_MESSAGE_
+    else:
+      codes.append((index, epsg_in, recovered_code, None, None))
+
+  # decode and describe all Plus codes, grouped by the EPSG code for all returned pairs of coordinates:
+  # municipality names are looked up only once per parent Plus code, unless the gazetteer is able to look them up for each pair of coordinates
+  described = {}
+  municipality_names = {} if municipality_gazetteer_ is None else None
+  for index, epsg_in, code, x, y in codes:
+    try:
+      coord, properties = olc_describer(code, epsg_in, epsg_outs[index], x, y, municipality_names, upstream_budget)
+    except:
+      results[index] = DEFAULT_ERROR_MESSAGE_
+      continue
+    described.setdefault(epsg_outs[index], []).append((index, coord, properties))
+
+  # transform the center pairs of coordinates and the bboxes with one transformer per EPSG code, round to six decimals each if not necessary
+  for epsg_out, group in described.items():
+    xs = [value for _, coord, _ in group for value in (coord.longitudeCenter, coord.longitudeLo, coord.longitudeHi)]
+    ys = [value for _, coord, _ in group for value in (coord.latitudeCenter, coord.latitudeLo, coord.latitudeHi)]
+    if epsg_out != OLC_EPSG_:
+      try:
+        xs, ys = transformer_getter(OLC_EPSG_, epsg_out).transform(np.asarray(xs, dtype = float), np.asarray(ys, dtype = float))
+        xs, ys = xs.tolist(), ys.tolist()
+      except:
+        xs = ys = [math.inf] * len(xs)
+    else:
+      xs, ys = [round(x, OLC_PRECISION_) for x in xs], [round(y, OLC_PRECISION_) for y in ys]
+    for i, (index, _, properties) in enumerate(group):
+      center_x, bbox_sw_x, bbox_ne_x = xs[3 * i:3 * i + 3]
+      center_y, bbox_sw_y, bbox_ne_y = ys[3 * i:3 * i + 3]
+      if all(math.isfinite(value) for value in (center_x, bbox_sw_x, bbox_ne_x, center_y, bbox_sw_y, bbox_ne_y)):
+        results[index] = olc_feature_builder(properties, center_x, center_y, bbox_sw_x, bbox_sw_y, bbox_ne_x, bbox_ne_y)
+      else:
+        results[index] = 'transformation of at least one pair of coordinates not possible'
+
+  # return valid GeoJSON, with a feature without geometry (but with the error message) for each item not valid
+  features = []
+  for result in results:
+    if isinstance(result, dict):
+      features.append(result)
+    else:
+      features.append({ 'type': 'Feature', 'properties': { 'message': result, 'status': HTTP_ERROR_STATUS_ }, 'geometry': None })
+  return multiple_features_handler(features), HTTP_OK_STATUS_
+
+
+# returns the exact number of cells of the grid of a given code length within a bbox (without producing any of them)
+def grid_size_calculator(min_x, min_y, max_x, max_y, code_length):
+
+  num_lines, num_rows = olc.gridDimensions(min_y, min_x, max_y, max_x, code_length)
+  return num_lines * num_rows
+
+
+# builds the (multiline) map label of a Plus code of a given code length
+def label_builder(code, code_length):
+
+  if code_length == 10:
+      return code[:4] + '\n' + code[4:9] + '\n' + code[9:]
+  elif code_length == 8:
+      return code[:4] + '\n' + code[4:]
+  elif code_length == 6:
+      return code[:4] + '\n' + code[4:6]
+  else:
+      return code[:code_length]
 
 
 # OLC loop handler
-def olc_loop_handler(min_x, min_y, max_x, max_y, epsg_in, epsg_out, mode):
+def olc_loop_handler(min_x, min_y, max_x, max_y, epsg_in, epsg_out, mode, stream = False, map_format = DEFAULT_MAP_FORMAT_):
 
   # return points only if in labels mode, polygons if not
   if mode == 'labels':
@@ -251,88 +832,115 @@ def olc_loop_handler(min_x, min_y, max_x, max_y, epsg_in, epsg_out, mode):
   else:
     points_only = False
 
+  # keep the provided bbox as the extent of the tile if a Mapbox Vector Tile is requested
+  tile_bbox = (min_x, min_y, max_x, max_y)
+
   # transform if EPSG code of input min/max x/y is not equal to default EPSG code of OLC
   if epsg_in != OLC_EPSG_:
     try:
-      source_projection = p.Proj(init = 'epsg:' + str(epsg_in))
-      target_projection = p.Proj(init = 'epsg:' + str(OLC_EPSG_))
-      transformer = p.Transformer.from_proj(source_projection, target_projection)
-      min_x, min_y = point_reprojector(transformer, min_x, min_y)
-      max_x, max_y = point_reprojector(transformer, max_x, max_y)
+      with stage_timer('reprojection'):
+        transformer = transformer_getter(epsg_in, OLC_EPSG_)
+        min_x, min_y = point_reprojector(transformer, min_x, min_y)
+        max_x, max_y = point_reprojector(transformer, max_x, max_y)
     except:
       return { 'message': 'transformation of provided quadruple of coordinates (required order: southwest longitude/x,southwest latitude/y,northeast longitude/x,northeast latitude/y) not possible', 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
 
-  # calculate the OLC level the loop will take place within
-  distance = distance_calculator(min_x, min_y, max_x, max_y)
-  if distance <= 0.5:
-    level = 5
-  elif distance <= 5:
-    level = 4
-  elif distance <= 100:
-    level = 3
-  elif distance <= 500:
-    level = 2
-  else:
-    level = 1
   # manipulate min/max x/y a bit to create a 10 % buffer around the initially provided bbox
   bbox_width_buffer, bbox_height_buffer = (max_x - min_x) / 10, (max_y - min_y) / 10
   min_x, max_x, min_y, max_y = min_x - bbox_width_buffer, max_x + bbox_width_buffer, min_y - bbox_height_buffer, max_y + bbox_height_buffer
-  # calculate the OLC level resolution value
-  level_resolution = olc.PAIR_RESOLUTIONS_[level - 1]
+
+  # calculate the OLC level the loop will take place within, i.e. the highest one keeping within the target number of features configured in settings (so that features are about as dense for all bboxes), counting the cells of the grid exactly before producing any of them:
+  # step down one OLC level after the other while exceeding the target number of features (or the maximum number of features, if lower), return an error if not even OLC level 1 keeps within the maximum number of features
+  target_features = app.config['MAP_TARGET_FEATURES'] if 'MAP_TARGET_FEATURES' in app.config else DEFAULT_MAP_TARGET_FEATURES_
+  max_features = app.config['MAP_MAX_FEATURES'] if 'MAP_MAX_FEATURES' in app.config else DEFAULT_MAP_MAX_FEATURES_
+  level = 5
+  num_cells = grid_size_calculator(min_x, min_y, max_x, max_y, level * 2)
+  while num_cells > min(target_features, max_features) and level > 1:
+    level -= 1
+    num_cells = grid_size_calculator(min_x, min_y, max_x, max_y, level * 2)
+  if num_cells > max_features:
+    metrics.counter_incrementer(metrics_, 'olca_map_budget_total', { 'outcome': 'rejected' })
+    return { 'message': 'provided bbox would result in ' + str(num_cells) + ' features on OLC level 1, more than the maximum of ' + str(max_features) + ' features', 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
+
   # calculate the OLC code length
   code_length = level * 2
-  # calculate the precision of level resolution
-  level_resolution_precision = len(str(level_resolution - int(level_resolution))[2:])
-  # calculate the buffer in degrees to prevent multiple encodings
-  buffer = 10**-level_resolution_precision if level_resolution_precision > 1 else 1
-  # calculate the number of lines (of encodings)
-  num_lines = int(math.ceil((round(round(max_y, level_resolution_precision) - round(min_y, level_resolution_precision), level_resolution_precision)) / level_resolution))
-  # calculate the number of rows (of encodings)
-  num_rows = int(math.ceil((round(round(max_x, level_resolution_precision) - round(min_x, level_resolution_precision), level_resolution_precision)) / level_resolution))
-
-  # prepare list to fill with data and to finally return later on
-  data_list = []
-
-  # prepare transformation of center pairs of coordinates if EPSG code for all returned pairs of coordinates is not equal to default EPSG code of OLC
-  if epsg_out != OLC_EPSG_:
-    source_projection = p.Proj(init = 'epsg:' + str(OLC_EPSG_))
-    target_projection = p.Proj(init = 'epsg:' + str(epsg_out))
-    transformer = p.Transformer.from_proj(source_projection, target_projection)
 
-  # loop through all lines
-  for line in range(num_lines):
-    # calculate current y
-    y = min_y + (level_resolution * line) + buffer
-    # loop through all rows
-    for row in range(num_rows):
-      # calculate current x
-      x = min_x + (level_resolution * row) + buffer
-      # encode
-      code = olc.encode(y, x, code_length)
-      # decode again to calculate the center pair of coordinates
-      coord = olc.decode(code)
-      center_x, center_y = coord.longitudeCenter, coord.latitudeCenter
-      # transform the center pair of coordinates if EPSG code for all returned pairs of coordinates is not equal to default EPSG code of OLC, round to six decimals if not
-      if epsg_out != OLC_EPSG_:
-        try:
-          center_x, center_y = point_reprojector(transformer, center_x, center_y)
-        except Exception as e:
-          return { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
-      else:
-        center_x, center_y = round(center_x, OLC_PRECISION_), round(center_y, OLC_PRECISION_)
-      # build the label
-      if code_length == 10:
-          label = code[:4] + '\n' + code[4:9] + '\n' + code[9:]
-      elif code_length == 8:
-          label = code[:4] + '\n' + code[4:]
-      elif code_length == 6:
-          label = code[:4] + '\n' + code[4:6]
+  # prepare the transformer for all center pairs of coordinates to be returned if EPSG code for all returned pairs of coordinates is not equal to default EPSG code of OLC
+  transformer = transformer_getter(OLC_EPSG_, epsg_out) if epsg_out != OLC_EPSG_ else None
+
+  # produce a Mapbox Vector Tile of all cells of the grid if requested, its extent being the provided bbox (transformed to the EPSG code for all returned pairs of coordinates if necessary)
+  if map_format == 'mvt':
+    try:
+      with stage_timer('grid'):
+        if epsg_in != epsg_out:
+          tile_xs, tile_ys = points_reprojector(transformer_getter(epsg_in, epsg_out), [tile_bbox[0], tile_bbox[0], tile_bbox[2], tile_bbox[2]], [tile_bbox[1], tile_bbox[3], tile_bbox[3], tile_bbox[1]])
+          tile_bbox = (min(tile_xs), min(tile_ys), max(tile_xs), max(tile_ys))
+        pixel_mapper = bbox_pixel_mapper_getter(*tile_bbox, transformer)
+        return olc_grid_mvt_builder(min_x, min_y, max_x, max_y, code_length, level, pixel_mapper, mode), HTTP_OK_STATUS_
+    except Exception as e:
+      return { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
+
+  # produce a TopoJSON topology of all cells of the grid if requested
+  if map_format == 'topojson':
+    try:
+      with stage_timer('grid'):
+        return olc_grid_topology_builder(min_x, min_y, max_x, max_y, code_length, level, transformer, mode), HTTP_OK_STATUS_
+    except Exception as e:
+      return { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
+
+  # produce the features of all cells of the grid lazily if streaming is requested, all at once if not
+  features = olc_grid_features_generator(min_x, min_y, max_x, max_y, code_length, level, transformer, points_only)
+  if stream:
+    return features, HTTP_OK_STATUS_
+  try:
+    with stage_timer('grid'):
+      data_list = list(features)
+  except Exception as e:
+    return { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
+
+  # return valid GeoJSON (the filled data list, to be precise)
+  return data_list, HTTP_OK_STATUS_
+
+
+# OLC grid features generator, yielding the features of all cells of the grid (line by line, row by row), chunk by chunk:
+# only cells with their center pair of coordinates within the bbox (its south and west edges included, its north and east edges excluded) are considered if requested, so that adjacent bboxes never share a cell
+def olc_grid_features_generator(min_x, min_y, max_x, max_y, code_length, level, transformer, points_only, centers_only = False):
+
+  chunk_size = app.config['MAP_CHUNK_SIZE'] if 'MAP_CHUNK_SIZE' in app.config else DEFAULT_MAP_CHUNK_SIZE_
+  cells = olc.gridCells(min_y, min_x, max_y, max_x, code_length)
+  while True:
+    # collect the codes and the center pairs of coordinates (or, if not in labels mode, the corners: southwest, southeast, northeast and northwest, i.e. counterclockwise) of the cells of the next chunk
+    chunk = list(itertools.islice(cells, chunk_size))
+    if not chunk:
+      return
+    codes, xs, ys = [], [], []
+    for code, bbox_sw_y, bbox_sw_x, bbox_ne_y, bbox_ne_x in chunk:
+      center_x, center_y = bbox_sw_x + (bbox_ne_x - bbox_sw_x) / 2, bbox_sw_y + (bbox_ne_y - bbox_sw_y) / 2
+      if centers_only and not (min_x <= center_x < max_x and min_y <= center_y < max_y):
+        continue
+      codes.append(code)
+      if points_only:
+        xs.append(center_x)
+        ys.append(center_y)
       else:
-          label = code[:code_length]
+        xs.extend((bbox_sw_x, bbox_ne_x, bbox_ne_x, bbox_sw_x))
+        ys.extend((bbox_sw_y, bbox_sw_y, bbox_ne_y, bbox_ne_y))
+    if not codes:
+      continue
+    grid_cells_counter(len(codes))
+
+    # transform all center pairs of coordinates (or corners) of the chunk at once if necessary, round to six decimals each if not
+    if transformer is not None:
+      xs, ys = points_reprojector(transformer, xs, ys)
+    else:
+      xs, ys = [round(x, OLC_PRECISION_) for x in xs], [round(y, OLC_PRECISION_) for y in ys]
+
+    # loop through all cells of the chunk
+    for index, code in enumerate(codes):
       # build the properties
       properties = {
         # label
-        'label': label,
+        'label': label_builder(code, code_length),
         # code
         'code': code,
         # grid level
@@ -345,18 +953,203 @@ def olc_loop_handler(min_x, min_y, max_x, max_y, epsg_in, epsg_out, mode):
           'properties': properties,
           'geometry': {
             'type': 'Point',
-            'coordinates': [ center_x, center_y ]
+            'coordinates': [ xs[index], ys[index] ]
           }
         }
       else:
-        data = {}
-      data_list.append(data)
+        ring = [ [ xs[corner], ys[corner] ] for corner in range(index * 4, index * 4 + 4) ]
+        data = {
+          'type': 'Feature',
+          'properties': properties,
+          'geometry': {
+            'type': 'Polygon',
+            'coordinates': [ ring + ring[:1] ]
+          }
+        }
+      yield data
+
+
+
+# OLC grid MVT builder, returning all cells of the grid as a Mapbox Vector Tile with a single layer named after the mode (points if in labels mode, polygons if not):
+# the pixel mapper maps lists of longitudes and latitudes to lists of pixel coordinates within the extent of the tile,
+# only cells with their center pair of coordinates within the bbox (its south and west edges included, its north and east edges excluded) are considered if requested, so that adjacent bboxes never share a cell
+def olc_grid_mvt_builder(min_x, min_y, max_x, max_y, code_length, level, pixel_mapper, mode, centers_only = False):
+
+  points_only = mode == 'labels'
+
+  # collect the codes and either the center pairs of coordinates or the corners (southwest, northwest, northeast and southeast, i.e. clockwise as seen on screen) of all cells
+  codes, xs, ys = [], [], []
+  for code, bbox_sw_y, bbox_sw_x, bbox_ne_y, bbox_ne_x in olc.gridCells(min_y, min_x, max_y, max_x, code_length):
+    center_x, center_y = bbox_sw_x + (bbox_ne_x - bbox_sw_x) / 2, bbox_sw_y + (bbox_ne_y - bbox_sw_y) / 2
+    if centers_only and not (min_x <= center_x < max_x and min_y <= center_y < max_y):
+      continue
+    codes.append(code)
+    if points_only:
+      xs.append(center_x)
+      ys.append(center_y)
+    else:
+      xs.extend((bbox_sw_x, bbox_sw_x, bbox_ne_x, bbox_ne_x))
+      ys.extend((bbox_sw_y, bbox_ne_y, bbox_ne_y, bbox_sw_y))
+
+  # map all of them to pixel coordinates at once
+  pixels_x, pixels_y = pixel_mapper(xs, ys) if codes else ([], [])
+
+  # build the features, with label, code and grid level as properties
+  features = []
+  for index, code in enumerate(codes):
+    properties = [ code, label_builder(code, code_length), level ]
+    if points_only:
+      features.append((mvt.GEOMETRY_TYPE_POINT_, properties, mvt.point_geometry(pixels_x[index], pixels_y[index])))
+    else:
+      ring = list(zip(pixels_x[index * 4:index * 4 + 4], pixels_y[index * 4:index * 4 + 4]))
+      # skip cells collapsing to less than a pixel
+      if sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1])) <= 0:
+        continue
+      features.append((mvt.GEOMETRY_TYPE_POLYGON_, properties, mvt.polygon_geometry(ring)))
+  grid_cells_counter(len(features))
+  extent = app.config['MVT_EXTENT'] if 'MVT_EXTENT' in app.config else DEFAULT_MVT_EXTENT_
+  return mvt.tile_encoder(mode, [ 'code', 'label', 'level' ], features, extent)
+
+
+# returns a pixel mapper for a bbox, mapping longitudes and latitudes (transformed first if a transformer is provided) linearly to pixel coordinates within the extent of the tile
+def bbox_pixel_mapper_getter(min_x, min_y, max_x, max_y, transformer = None):
+
+  # a bbox of zero width or zero height cannot be mapped to pixel coordinates
+  if not (max_x > min_x and max_y > min_y):
+    raise ValueError('bbox of zero width or zero height cannot be mapped to pixel coordinates')
+  extent = app.config['MVT_EXTENT'] if 'MVT_EXTENT' in app.config else DEFAULT_MVT_EXTENT_
+
+  def pixel_mapper(xs, ys):
+    if transformer is not None:
+      xs, ys = points_reprojector(transformer, xs, ys)
+    xs, ys = np.asarray(xs, dtype = float), np.asarray(ys, dtype = float)
+    pixels_x = np.rint((xs - min_x) / (max_x - min_x) * extent)
+    pixels_y = np.rint((max_y - ys) / (max_y - min_y) * extent)
+    return pixels_x.astype(np.int64).tolist(), pixels_y.astype(np.int64).tolist()
+
+  return pixel_mapper
+
+
+# returns a pixel mapper for a Web Mercator tile, mapping longitudes and latitudes to pixel coordinates within the extent of the tile
+def tile_pixel_mapper_getter(z, x, y):
+
+  extent = app.config['MVT_EXTENT'] if 'MVT_EXTENT' in app.config else DEFAULT_MVT_EXTENT_
+  num_tiles = 2 ** z
+
+  def pixel_mapper(xs, ys):
+    lons, lats = np.asarray(xs, dtype = float), np.radians(np.asarray(ys, dtype = float))
+    pixels_x = np.rint(((lons + 180) / 360 * num_tiles - x) * extent)
+    pixels_y = np.rint(((1 - np.arcsinh(np.tan(lats)) / math.pi) / 2 * num_tiles - y) * extent)
+    return pixels_x.astype(np.int64).tolist(), pixels_y.astype(np.int64).tolist()
+
+  return pixel_mapper
+
+
+# OLC grid topology builder, returning all cells of the grid (line by line, row by row) as a TopoJSON topology with a single object named after the mode (points if in labels mode, polygons if not):
+# each polygon references the arcs of its four edges, each arc (i.e. each edge of the grid) being stored only once and shared by the adjacent cells,
+# the positions are the integer indexes of the grid (at half the cell size, so that center pairs of coordinates are included) quantized by a transform if no transformer is provided, pairs of coordinates transformed (vertex by vertex, each one only once) if it is
+def olc_grid_topology_builder(min_x, min_y, max_x, max_y, code_length, level, transformer, mode):
+
+  points_only = mode == 'labels'
+
+  # the size of the cells in degrees (the same for longitude and latitude on all OLC levels)
+  resolution = 20 / 20 ** (level - 1)
+
+  # collect the geometries, with the arcs of all edges of the grid referenced in the order of their first occurrence:
+  # edges are keyed by their western or southern vertex (as row and column index of the grid) and their direction (eastwards or northwards)
+  geometries, arcs_indexes = [], {}
+  def arc_getter(row, column, direction):
+    return arcs_indexes.setdefault((row, column, direction), len(arcs_indexes))
+  for code, bbox_sw_y, bbox_sw_x, bbox_ne_y, bbox_ne_x in olc.gridCells(min_y, min_x, max_y, max_x, code_length):
+    row, column = round((bbox_sw_y + 90) / resolution), round((bbox_sw_x + 180) / resolution)
+    geometry = {
+      'type': 'Point' if points_only else 'Polygon',
+      'properties': {
+        # label
+        'label': label_builder(code, code_length),
+        # code
+        'code': code,
+        # grid level
+        'level': level
+      }
+    }
+    if points_only:
+      geometry['coordinates'] = [ 2 * column + 1, 2 * row + 1 ]
+    else:
+      # southern, eastern, northern (reversed) and western (reversed) edge, i.e. counterclockwise
+      geometry['arcs'] = [ [ arc_getter(row, column, 'e'), arc_getter(row, column + 1, 'n'), ~arc_getter(row + 1, column, 'e'), ~arc_getter(row, column, 'n') ] ]
+    geometries.append(geometry)
+  grid_cells_counter(len(geometries))
+
+  topology = {
+    'type': 'Topology',
+    'objects': {
+      mode: {
+        'type': 'GeometryCollection',
+        'geometries': geometries
+      }
+    }
+  }
+
+  # quantize the positions (and delta-encode the arcs) by the grid if possible
+  if transformer is None:
+    topology['transform'] = { 'scale': [ resolution / 2, resolution / 2 ], 'translate': [ -180, -90 ] }
+    topology['arcs'] = [ [ [ 2 * column, 2 * row ], [ 2, 0 ] if direction == 'e' else [ 0, 2 ] ] for row, column, direction in arcs_indexes ]
+    return topology
+
+  # transform the positions (each vertex of the grid only once) if not
+  topology['arcs'] = []
+  if points_only:
+    xs, ys = points_reprojector(transformer, [ geometry['coordinates'][0] * resolution / 2 - 180 for geometry in geometries ], [ geometry['coordinates'][1] * resolution / 2 - 90 for geometry in geometries ])
+    for geometry, x, y in zip(geometries, xs, ys):
+      geometry['coordinates'] = [ x, y ]
+    return topology
+  vertexes = {}
+  for row, column, direction in arcs_indexes:
+    vertexes.setdefault((row, column), len(vertexes))
+    vertexes.setdefault((row, column + 1) if direction == 'e' else (row + 1, column), len(vertexes))
+  xs, ys = points_reprojector(transformer, [ column * resolution - 180 for row, column in vertexes ], [ row * resolution - 90 for row, column in vertexes ])
+  for row, column, direction in arcs_indexes:
+    start, end = vertexes[(row, column)], vertexes[(row, column + 1) if direction == 'e' else (row + 1, column)]
+    topology['arcs'].append([ [ xs[start], ys[start] ], [ xs[end], ys[end] ] ])
+  return topology
+
+
+# OLC tile handler
+def olc_tile_handler(z, x, y, epsg_out, mode = 'labels', tile_format = DEFAULT_TILE_FORMAT_):
+
+  # calculate the bbox of the Web Mercator tile
+  num_tiles = 2 ** z
+  min_x, max_x = x / num_tiles * 360 - 180, (x + 1) / num_tiles * 360 - 180
+  min_y = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / num_tiles))))
+  max_y = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / num_tiles))))
+
+  # take the OLC level of the zoom level (i.e. the highest OLC level with its minimum zoom level reached)
+  tile_levels = app.config['TILE_LEVELS'] if 'TILE_LEVELS' in app.config else DEFAULT_TILE_LEVELS_
+  level = max(tile_level for tile_level, min_zoom in tile_levels.items() if z >= min_zoom)
+
+  # produce a Mapbox Vector Tile (in pixel coordinates, hence regardless of the EPSG code for all returned pairs of coordinates) of all cells of the grid with their center pair of coordinates within the tile if requested
+  if tile_format == 'mvt':
+    try:
+      with stage_timer('grid'):
+        return olc_grid_mvt_builder(min_x, min_y, max_x, max_y, level * 2, level, tile_pixel_mapper_getter(z, x, y), mode, True), HTTP_OK_STATUS_
+    except Exception as e:
+      return { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
+
+  # prepare the transformer for all center pairs of coordinates to be returned if EPSG code for all returned pairs of coordinates is not equal to default EPSG code of OLC
+  transformer = transformer_getter(OLC_EPSG_, epsg_out) if epsg_out != OLC_EPSG_ else None
+
+  # produce the features of all cells of the grid with their center pair of coordinates within the tile, so that every cell belongs to exactly one tile
+  try:
+    with stage_timer('grid'):
+      data_list = list(olc_grid_features_generator(min_x, min_y, max_x, max_y, level * 2, level, transformer, mode == 'labels', True))
+  except Exception as e:
+    return { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }, HTTP_ERROR_STATUS_
 
   # return valid GeoJSON (the filled data list, to be precise)
   return data_list, HTTP_OK_STATUS_
 
 
-
 # custom functions: API
 
 # multiple GeoJSON features (i.e. within a FeatureCollection) handler
@@ -368,6 +1161,84 @@ def multiple_features_handler(geojson):
   }
 
 
+# checks whether a word consists of code characters only (with its length within the given range)
+def code_characters_checker(word, min_length, max_length):
+
+  return min_length <= len(word) <= max_length and all(character in QUERY_CODE_CHARACTERS_ for character in word)
+
+
+# query tokeniser, normalising and classifying a query in a single pass over its words (i.e. its parts between runs of query separators):
+# returns a typed query, raises a ValueError with the corresponding error message if the query is neither a valid regional Plus code nor a valid pair of coordinates nor a valid Plus code
+def query_tokenizer(query):
+
+  # split the query (converted to upper case) into its words, with (regular) query separators before (if leading), between and after (if trailing) them
+  words = QUERY_SEPARATORS_PATTERN_.split(query.upper())
+  leading, trailing = len(words) > 1 and words[0] == '', len(words) > 1 and words[-1] == ''
+  words = words[1 if leading else 0:len(words) - 1 if trailing else len(words)]
+  if not words:
+    raise ValueError(DEFAULT_ERROR_MESSAGE_)
+  separators = [ QUERY_SEPARATOR_ if leading else '' ] + [ QUERY_SEPARATOR_ ] * (len(words) - 1) + [ QUERY_SEPARATOR_ if trailing else '' ]
+
+  # restore the plus sign (wherever it was), i.e. replace the query separator…
+  # …before a last word of two code characters
+  if not trailing and separators[-2] == QUERY_SEPARATOR_ and code_characters_checker(words[-1], 2, 2):
+    separators[-2] = olc.SEPARATOR_
+  # …before each word of two or three code characters followed by a query separator (which cannot precede the next word restored this way then)
+  restored = -2
+  for i, word in enumerate(words):
+    if i != restored + 1 and separators[i] == QUERY_SEPARATOR_ and separators[i + 1] == QUERY_SEPARATOR_ and code_characters_checker(word, 2, 3):
+      separators[i] = olc.SEPARATOR_
+      restored = i
+  # …after the last word
+  if trailing:
+    separators[-1] = olc.SEPARATOR_
+
+  # cut off characters beyond level 5, i.e. the third code character after a plus sign followed by a query separator
+  for i, word in enumerate(words):
+    if separators[i + 1] == QUERY_SEPARATOR_:
+      position = word.rfind(olc.SEPARATOR_)
+      if (position != -1 or separators[i] == olc.SEPARATOR_) and code_characters_checker(word[position + 1:], 3, 3):
+        words[i] = word[:-1]
+
+  # join the words to the parts of the query (i.e. its parts between query separators)
+  parts, part = [], ''
+  for i, separator in enumerate(separators):
+    if separator == QUERY_SEPARATOR_:
+      parts.append(part)
+      part = ''
+    else:
+      part += separator
+    if i < len(words):
+      part += words[i]
+  parts.append(part)
+
+  # classify the query
+  if len(parts) > 1:
+    # regional Plus code if necessary
+    if app.config['CODE_REGIONAL_IN'] and any(olc.SEPARATOR_ in part for part in parts):
+      # code is first part of query, municipality name is the remaining parts
+      # don't let regional Plus codes shorter than 7 or longer than 8 chars pass through!
+      if olc.SEPARATOR_ in parts[0] and len(parts[0]) in (7, 8):
+        return Query('regional', None, None, parts[0], ' '.join(parts[1:]))
+      # code is last part of query, municipality name is the remaining parts
+      # don't let regional Plus codes shorter than 7 or longer than 8 chars pass through!
+      elif olc.SEPARATOR_ in parts[-1] and len(parts[-1]) in (7, 8):
+        return Query('regional', None, None, parts[-1], ' '.join(parts[:-1]))
+      raise ValueError(DEFAULT_ERROR_REGIONAL_MESSAGE_)
+    # pair of coordinates
+    try:
+      return Query('coordinates', float(parts[0]), float(parts[1]), None, None)
+    except ValueError:
+      raise ValueError(DEFAULT_ERROR_MESSAGE_)
+  # full or short Plus code
+  classified_code = olc.classify(parts[0])
+  if classified_code.full:
+    return Query('full', None, None, parts[0], None)
+  elif classified_code.short:
+    return Query('short', None, None, parts[0], None)
+  raise ValueError(DEFAULT_ERROR_MESSAGE_)
+
+
 # request handler
 def request_handler(request, arg_name):
 
@@ -388,21 +1259,43 @@ def request_handler(request, arg_name):
     return None
 
 
+# GeoJSON coordinate reference system builder
+def crs_builder(epsg_out):
+
+  return {
+    'type': 'link',
+    'properties': {
+      'type': 'proj4',
+      'href': 'https://spatialreference.org/ref/epsg/' + str(epsg_out) + '/proj4/'
+    }
+  }
+
+
+# JSON serialiser, returning UTF-8 encoded JSON, compact unless pretty-printing is requested (per request, hence without touching any global state):
+# via orjson if available (and if neither ASCII-only output is configured in settings nor the data contains anything orjson cannot serialise), via the standard library if not
+def json_serializer(data, pretty = False):
+
+  sort_keys = app.config['JSON_SORT_KEYS'] if 'JSON_SORT_KEYS' in app.config else True
+  ensure_ascii = app.config['JSON_AS_ASCII'] if 'JSON_AS_ASCII' in app.config else False
+  if orjson is not None and not ensure_ascii:
+    try:
+      return orjson.dumps(data, option = (orjson.OPT_SORT_KEYS if sort_keys else 0) | (orjson.OPT_INDENT_2 if pretty else 0))
+    except TypeError:
+      pass
+  if pretty:
+    return json.dumps(data, ensure_ascii = ensure_ascii, sort_keys = sort_keys, indent = 2).encode('utf-8')
+  return json.dumps(data, ensure_ascii = ensure_ascii, sort_keys = sort_keys, separators = (',', ':')).encode('utf-8')
+
+
 # response handler
-def response_handler(data, status, epsg_out):
+def response_handler(data, status, epsg_out, pretty = False):
 
   # add GeoJSON coordinate reference system if necessary
   if status == 200 and epsg_out is not None and epsg_out != OLC_EPSG_:
-    data['crs'] = {
-      'type': 'link',
-      'properties': {
-        'type': 'proj4',
-        'href': 'https://spatialreference.org/ref/epsg/' + str(epsg_out) + '/proj4/'
-      }
-    }
+    data['crs'] = crs_builder(epsg_out)
 
   # always JSON
-  response = jsonify(data)
+  response = Response(json_serializer(data, pretty), mimetype = app.config['JSONIFY_MIMETYPE'] if 'JSONIFY_MIMETYPE' in app.config else 'application/json')
 
   # CORS response header indicating whether the response can be shared with requesting code from the given origin:
   # set to corresponding value if provided in settings
@@ -411,6 +1304,139 @@ def response_handler(data, status, epsg_out):
   return response, status
 
 
+# streamed response handler, writing GeoJSON features chunk by chunk as they are produced:
+# either newline-delimited (ndjson format) or within a GeoJSON FeatureCollection, both followed by an error (with status and message) if producing the features fails midway
+def streamed_response_handler(features, epsg_out, map_format):
+
+  chunk_size = app.config['MAP_CHUNK_SIZE'] if 'MAP_CHUNK_SIZE' in app.config else DEFAULT_MAP_CHUNK_SIZE_
+
+  def chunks_generator():
+    if map_format == 'ndjson':
+      separator, ending = b'\n', b'\n'
+    else:
+      separator, ending = b',', b''
+      # add GeoJSON coordinate reference system if necessary
+      crs = b'"crs":' + json_serializer(crs_builder(epsg_out)) + b',' if epsg_out != OLC_EPSG_ else b''
+      yield b'{"type":"FeatureCollection",' + crs + b'"features":['
+    first = True
+    try:
+      while True:
+        # (producing and serialising the features of a chunk are interleaved, hence timed as one stage)
+        with stage_timer('stream'):
+          chunk = [json_serializer(feature) for feature in itertools.islice(features, chunk_size)]
+        if not chunk:
+          break
+        yield (b'' if first else separator) + separator.join(chunk) + ending
+        first = False
+      error = None
+    except Exception as e:
+      error = { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }
+    if map_format == 'ndjson':
+      if error is not None:
+        yield json_serializer(error) + b'\n'
+    else:
+      yield b']' + (b',"message":' + json_serializer(error['message']) + b',"status":' + str(error['status']).encode('utf-8') if error is not None else b'') + b'}'
+
+  response = Response(stream_with_context(chunks_generator()), mimetype = NDJSON_MIMETYPE_ if map_format == 'ndjson' else app.config['JSONIFY_MIMETYPE'] if 'JSONIFY_MIMETYPE' in app.config else 'application/json')
+
+  # CORS response header indicating whether the response can be shared with requesting code from the given origin:
+  # set to corresponding value if provided in settings
+  if 'ACCESS_CONTROL_ALLOW_ORIGIN' in app.config:
+    response.headers['Access-Control-Allow-Origin'] = app.config['ACCESS_CONTROL_ALLOW_ORIGIN']
+  return response
+
+
+# returns a response from the response cache (marking it as the most recently used one) or None if it is not cached or expired
+def response_cache_getter(key):
+
+  with response_cache_lock_:
+    cached_response = response_cache_.get(key)
+    if cached_response is not None and cached_response[2] <= time.time():
+      del response_cache_[key]
+      cached_response = None
+    if cached_response is not None:
+      response_cache_.move_to_end(key)
+  cache_lookup_counter('response', cached_response is not None)
+  return cached_response
+
+
+# stores a serialised response in the response cache (with its ETag and expiry time), evicting the least recently used ones beyond the size configured in settings
+def response_cache_setter(key, body):
+
+  max_age = app.config['RESPONSE_CACHE_MAX_AGE'] if 'RESPONSE_CACHE_MAX_AGE' in app.config else DEFAULT_RESPONSE_CACHE_MAX_AGE_
+  cache_size = app.config['RESPONSE_CACHE_SIZE'] if 'RESPONSE_CACHE_SIZE' in app.config else DEFAULT_RESPONSE_CACHE_SIZE_
+  cached_response = (body, hashlib.sha1(body).hexdigest(), time.time() + max_age)
+  with response_cache_lock_:
+    response_cache_[key] = cached_response
+    while len(response_cache_) > cache_size:
+      response_cache_.popitem(last = False)
+  return cached_response
+
+
+# cacheable response handler, responding with a serialised response (or with 304 Not Modified if the client already has it) and allowing clients and proxies to cache it
+def cacheable_response_handler(body, etag, max_age, mimetype = None):
+
+  response = Response(body, mimetype = mimetype if mimetype is not None else app.config['JSONIFY_MIMETYPE'] if 'JSONIFY_MIMETYPE' in app.config else 'application/json')
+  response.set_etag(etag)
+  response.cache_control.public = True
+  response.cache_control.max_age = max_age
+  # CORS response header indicating whether the response can be shared with requesting code from the given origin:
+  # set to corresponding value if provided in settings
+  if 'ACCESS_CONTROL_ALLOW_ORIGIN' in app.config:
+    response.headers['Access-Control-Allow-Origin'] = app.config['ACCESS_CONTROL_ALLOW_ORIGIN']
+  return response.make_conditional(request)
+
+
+# Mapbox Vector Tile response handler
+def mvt_response_handler(tile):
+
+  response = Response(tile, mimetype = MVT_MIMETYPE_)
+
+  # CORS response header indicating whether the response can be shared with requesting code from the given origin:
+  # set to corresponding value if provided in settings
+  if 'ACCESS_CONTROL_ALLOW_ORIGIN' in app.config:
+    response.headers['Access-Control-Allow-Origin'] = app.config['ACCESS_CONTROL_ALLOW_ORIGIN']
+  return response
+
+
+
+
+# instrumentation
+
+# start the instrumentation record of each request
+@app.before_request
+def instrumentation_starter():
+
+  instrumentation_getter()
+
+
+# add the durations of the stages of each request so far (in milliseconds, hence without the stages of streamed responses after their first chunk) and its total duration as a Server-Timing header if configured in settings
+@app.after_request
+def server_timing_adder(response):
+
+  record = instrumentation_getter()
+  record['status'] = response.status_code
+  if app.config['SERVER_TIMING'] if 'SERVER_TIMING' in app.config else DEFAULT_SERVER_TIMING_:
+    timings = [ stage + ';dur=' + str(round(duration * 1e3, 3)) for stage, duration in record['stages'].items() ]
+    timings.append('total;dur=' + str(round((time.perf_counter() - record['start']) * 1e3, 3)))
+    response.headers['Server-Timing'] = ', '.join(timings)
+  return response
+
+
+# aggregate the durations of each request and of its stages and its number of grid cells (after its last chunk if streamed, since the request context lasts until then)
+@app.teardown_request
+def metrics_observer(exception):
+
+  record = instrumentation_getter()
+  endpoint = request.endpoint if request.endpoint is not None else 'none'
+  status = record['status'] if record['status'] is not None else 500
+  metrics.histogram_observer(metrics_, 'olca_request_duration_seconds', time.perf_counter() - record['start'], { 'endpoint': endpoint, 'status': status })
+  for stage, duration in record['stages'].items():
+    metrics.histogram_observer(metrics_, 'olca_stage_duration_seconds', duration, { 'endpoint': endpoint, 'stage': stage })
+  if record['cells'] > 0:
+    metrics.histogram_observer(metrics_, 'olca_grid_cells', record['cells'], { 'endpoint': endpoint })
+
+
 
 
 # routing
@@ -424,20 +1450,7 @@ def query():
   # set to corresponding value if provided via request arguments, return an error if not
   handled_request = request_handler(request, 'query')
   if handled_request is not None:
-    # replace all additional query separators with (regular) query separators
-    query = handled_request.replace(QUERY_ADDITIONAL_SEPARATOR_, QUERY_SEPARATOR_)
-    # careful with the plus sign!
-    query = unquote(quote_plus(query.encode('utf-8')))
-    # convert to upper case
-    query = str.upper(query)
-    # replace all multiple occurences of query separators in a row with only one query separator each
-    query = re.sub(r',+', ',', query)
-    # restore the plus sign (wherever it was)
-    query = re.sub(r',([23456789CFGHJMPQRVWX]{2})$', r'+\1', query)
-    query = re.sub(r',([23456789CFGHJMPQRVWX]{2,3}),', r'+\1,', query)
-    query = re.sub(r',$', r'+', query)
-    # cut off characters beyond level 5
-    query = re.sub(r'\+([23456789CFGHJMPQRVWX]{2})[23456789CFGHJMPQRVWX],', r'+\1,', query)
+    query = handled_request
   else:
     data = { 'message': 'missing required \'query\' parameter or parameter empty', 'status': HTTP_ERROR_STATUS_ }
     return response_handler(data, HTTP_ERROR_STATUS_, None)
@@ -460,6 +1473,19 @@ def query():
   else:
     epsg_out = app.config['DEFAULT_EPSG_OUT']
 
+  # optional pretty parameter, i.e. whether to pretty-print JSONified output or not:
+  # set to corresponding value if provided via request arguments, set to corresponding default value in settings if not
+  handled_request = request_handler(request, 'pretty')
+  if handled_request is not None and (handled_request in [0, 1, False, True, '0', '1', 'f', 't', 'False', 'True', 'false', 'true', 'n', 'y', 'no', 'yes']):
+    if handled_request in [0, '0', 'f', 'False', 'false', 'n', 'no']:
+      pretty = False
+    elif handled_request in [1, '1', 't', 'True', 'true', 'y', 'yes']:
+      pretty = True
+    else:
+      pretty = handled_request
+  else:
+    pretty = app.config['DEFAULT_PRETTY'] if 'DEFAULT_PRETTY' in app.config else DEFAULT_PRETTY_
+
   # query processing
 
   # return an error if optional EPSG code parameter for queried pair of coordinates is not a number
@@ -467,58 +1493,153 @@ def query():
     epsg_in = int(epsg_in)
   except ValueError:
     data = { 'message': DEFAULT_EPSG_IN_ERROR_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }
-    return response_handler(data, HTTP_ERROR_STATUS_, None)
+    return response_handler(data, HTTP_ERROR_STATUS_, None, pretty)
 
   # return an error if optional EPSG code parameter for all returned pairs of coordinates is not a number
   try:
     epsg_out = int(epsg_out)
   except ValueError:
     data = { 'message': DEFAULT_EPSG_OUT_ERROR_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }
-    return response_handler(data, HTTP_ERROR_STATUS_, None)
+    return response_handler(data, HTTP_ERROR_STATUS_, None, pretty)
 
   # required query parameter, i.e. what to look for:
-  if QUERY_SEPARATOR_ in query:
-    # if necessary: decode queried regional Plus code if it is valid, return an error if not
-    if app.config['CODE_REGIONAL_IN'] and olc.SEPARATOR_ in query:
-      query = query.split(QUERY_SEPARATOR_)
-      #data = { 'message': '|'.join(query), 'status': HTTP_ERROR_STATUS_ }
-      #return response_handler(data, HTTP_ERROR_STATUS_, None)
-      # code is first part of query, municipality name is the remaining parts
-      # don't let regional Plus codes shorter than 7 or longer than 8 chars pass through!
-      if olc.SEPARATOR_ in query[0] and len(query[0]) in (7, 8):
-        code = query[0]
-        municipality_name = ' '.join(query[1:])
-      # code is last part of query, municipality name is the remaining parts
-      # don't let regional Plus codes shorter than 7 or longer than 8 chars pass through!
-      elif olc.SEPARATOR_ in query[len(query) - 1] and len(query[len(query) - 1]) in (7, 8):
-        code = query[len(query) - 1]
-        municipality_name = ' '.join(query[:len(query) - 1])
-      else:
-        data = { 'message': DEFAULT_ERROR_REGIONAL_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }
-        return response_handler(data, HTTP_ERROR_STATUS_, None)
-      try:
-        data, status = olc_handler(None, None, [code, municipality_name], epsg_in, epsg_out, True)
-        return response_handler(data, status, epsg_out)
-      except:
-        data = { 'message': DEFAULT_ERROR_REGIONAL_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }
-        return response_handler(data, HTTP_ERROR_STATUS_, None)
-    # encode queried pair of coordinates if they are valid, return an error if not
-    else:
-      query = query.split(QUERY_SEPARATOR_)
-      try:
-        data, status = olc_handler(float(query[0]), float(query[1]), None, epsg_in, epsg_out, False)
-        return response_handler(data, status, epsg_out)
-      except:
-        data = { 'message': DEFAULT_ERROR_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }
-        return response_handler(data, HTTP_ERROR_STATUS_, None)
-  # decode queried Plus code if it is valid, return an error if not
+  # normalise and classify it, return an error if the query is neither a valid regional Plus code nor a valid pair of coordinates nor a valid Plus code
+  try:
+    with stage_timer('parse'):
+      query = query_tokenizer(query)
+  except ValueError as e:
+    data = { 'message': str(e), 'status': HTTP_ERROR_STATUS_ }
+    return response_handler(data, HTTP_ERROR_STATUS_, None, pretty)
+
+  # respond from the response cache if possible
+  max_age = app.config['RESPONSE_CACHE_MAX_AGE'] if 'RESPONSE_CACHE_MAX_AGE' in app.config else DEFAULT_RESPONSE_CACHE_MAX_AGE_
+  key = (query, epsg_in, epsg_out, pretty)
+  with stage_timer('response_cache'):
+    cached_response = response_cache_getter(key)
+  if cached_response is not None:
+    return cacheable_response_handler(cached_response[0], cached_response[1], max_age)
+
+  # decode queried (regional) Plus code or encode queried pair of coordinates if valid, return an error if not
+  try:
+    data, status = olc_handler(query, epsg_in, epsg_out)
+  except:
+    data = { 'message': DEFAULT_ERROR_REGIONAL_MESSAGE_ if query.type == 'regional' else DEFAULT_ERROR_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }
+    return response_handler(data, HTTP_ERROR_STATUS_, None, pretty)
+
+  # cache successful responses only (since errors may be caused by a non-reachable third party API)
+  if status != HTTP_OK_STATUS_:
+    return response_handler(data, status, None, pretty)
+  # neither cache nor allow caching responses whose regional Plus code is not definable since the municipality lookup failed (so that a non-reachable third party API is retried with the next request)
+  if data['properties'].get('code_regional') == CODE_REGIONAL_NOT_DEFINABLE_:
+    with stage_timer('serialisation'):
+      return response_handler(data, status, epsg_out, pretty)
+  with stage_timer('serialisation'):
+    response, status = response_handler(data, status, epsg_out, pretty)
+    cached_response = response_cache_setter(key, response.get_data())
+  return cacheable_response_handler(cached_response[0], cached_response[1], max_age)
+
+
+@app.route('/batch', methods=['POST'])
+def batch_query():
+
+  # request handling
+
+  # required JSON array of queries (each one either a query or an object with a query and optional 'epsg_in' and 'epsg_out' keys):
+  # return an error if not provided or if containing more queries than allowed in settings
+  queries = request.get_json(silent = True)
+  if not isinstance(queries, list) or not queries:
+    data = { 'message': 'missing required JSON array of queries or array empty', 'status': HTTP_ERROR_STATUS_ }
+    return response_handler(data, HTTP_ERROR_STATUS_, None)
+  max_queries = app.config['BATCH_MAX_QUERIES'] if 'BATCH_MAX_QUERIES' in app.config else DEFAULT_BATCH_MAX_QUERIES_
+  if len(queries) > max_queries:
+    data = { 'message': 'JSON array of queries contains more than ' + str(max_queries) + ' queries', 'status': HTTP_ERROR_STATUS_ }
+    return response_handler(data, HTTP_ERROR_STATUS_, None)
+
+  # query processing
+
+  data, status = olc_batch_handler(queries)
+  # add the GeoJSON coordinate reference system only if all returned pairs of coordinates share the same EPSG code
+  epsg_outs = { feature['properties']['epsg_out'] for feature in data['features'] if feature['geometry'] is not None }
+  return response_handler(data, status, epsg_outs.pop() if len(epsg_outs) == 1 else None)
+
+
+@app.route('/tiles/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def tile_query(z, x, y):
+
+  # request handling
+
+  # optional EPSG code parameter for all returned pairs of coordinates:
+  # set to corresponding value if provided via request arguments, set to corresponding default value in settings if not
+  handled_request = request_handler(request, 'epsg_out')
+  if handled_request is not None:
+    # a little trick here: extract digits only
+    epsg_out = digit_extractor(handled_request)
+  else:
+    epsg_out = app.config['DEFAULT_MAP_EPSG_OUT']
+
+  # optional mode parameter, i.e. which operation mode to run in:
+  # set to corresponding value if provided via request arguments, set to corresponding default value in settings if not
+  handled_request = request_handler(request, 'mode')
+  if handled_request is not None and handled_request in app.config['MAP_MODES']:
+    mode = handled_request
+  else:
+    mode = app.config['DEFAULT_MAP_MODE']
+
+  # optional format parameter, i.e. which output format to return:
+  # set to corresponding value if provided via request arguments, set to corresponding default value in settings if not
+  handled_request = request_handler(request, 'format')
+  if handled_request is not None and handled_request in (app.config['TILE_FORMATS'] if 'TILE_FORMATS' in app.config else DEFAULT_TILE_FORMATS_):
+    tile_format = handled_request
   else:
+    tile_format = app.config['DEFAULT_TILE_FORMAT'] if 'DEFAULT_TILE_FORMAT' in app.config else DEFAULT_TILE_FORMAT_
+
+  # query processing
+
+  # return an error if optional EPSG code parameter for all returned pairs of coordinates is not a number
+  try:
+    epsg_out = int(epsg_out)
+  except ValueError:
+    data = { 'message': DEFAULT_EPSG_OUT_ERROR_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }
+    return response_handler(data, HTTP_ERROR_STATUS_, None)
+
+  # return an error if the tile does not exist
+  max_zoom = app.config['TILE_MAX_ZOOM'] if 'TILE_MAX_ZOOM' in app.config else DEFAULT_TILE_MAX_ZOOM_
+  if z > max_zoom or x >= 2 ** z or y >= 2 ** z:
+    data = { 'message': 'tile ' + str(z) + '/' + str(x) + '/' + str(y) + ' does not exist (maximum zoom level: ' + str(max_zoom) + ')', 'status': HTTP_ERROR_STATUS_ }
+    return response_handler(data, HTTP_ERROR_STATUS_, None)
+
+  # take the tile from the cache if possible (marking it as the most recently used one), generate and cache it if not
+  key = (z, x, y, epsg_out if tile_format != 'mvt' else None, mode, tile_format)
+  with tile_cache_lock_:
+    cached_tile = tile_cache_.get(key)
+    if cached_tile is not None:
+      tile_cache_.move_to_end(key)
+  cache_lookup_counter('tile', cached_tile is not None)
+  if cached_tile is None:
     try:
-      data, status = olc_handler(None, None, query, epsg_in, epsg_out, False)
-      return response_handler(data, status, epsg_out)
+      data_list, status = olc_tile_handler(z, x, y, epsg_out, mode, tile_format)
     except:
-      data = { 'message': DEFAULT_ERROR_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }
+      data = { 'message': 'tile ' + str(z) + '/' + str(x) + '/' + str(y) + ' could not be generated', 'status': HTTP_ERROR_STATUS_ }
       return response_handler(data, HTTP_ERROR_STATUS_, None)
+    if status != HTTP_OK_STATUS_:
+      return response_handler(data_list, status, None)
+    if tile_format == 'mvt':
+      body = data_list
+    else:
+      data = multiple_features_handler(data_list)
+      if epsg_out != OLC_EPSG_:
+        data['crs'] = crs_builder(epsg_out)
+      with stage_timer('serialisation'):
+        body = json_serializer(data)
+    cached_tile = (body, hashlib.sha1(body).hexdigest())
+    cache_size = app.config['TILE_CACHE_SIZE'] if 'TILE_CACHE_SIZE' in app.config else DEFAULT_TILE_CACHE_SIZE_
+    with tile_cache_lock_:
+      tile_cache_[key] = cached_tile
+      while len(tile_cache_) > cache_size:
+        tile_cache_.popitem(last = False)
+
+  # respond with the tile (or with 304 Not Modified if the client already has it), allowing clients and proxies to cache it since the grid never changes
+  return cacheable_response_handler(cached_tile[0], cached_tile[1], app.config['TILE_MAX_AGE'] if 'TILE_MAX_AGE' in app.config else DEFAULT_TILE_MAX_AGE_, MVT_MIMETYPE_ if tile_format == 'mvt' else None)
 
 
 @app.route('/map', methods=['GET', 'POST'])
@@ -543,6 +1664,14 @@ def map_query():
   else:
     mode = app.config['DEFAULT_MAP_MODE']
 
+  # optional format parameter, i.e. which output format to return:
+  # set to corresponding value if provided via request arguments, set to corresponding default value in settings if not
+  handled_request = request_handler(request, 'format')
+  if handled_request is not None and handled_request in (app.config['MAP_FORMATS'] if 'MAP_FORMATS' in app.config else DEFAULT_MAP_FORMATS_):
+    map_format = handled_request
+  else:
+    map_format = app.config['DEFAULT_MAP_FORMAT'] if 'DEFAULT_MAP_FORMAT' in app.config else DEFAULT_MAP_FORMAT_
+
   # optional EPSG code parameter for provided bbox:
   # set to corresponding value if provided via request arguments, set to corresponding default value in settings if not
   handled_request = request_handler(request, 'epsg_in')
@@ -574,6 +1703,21 @@ def map_query():
   else:
     pretty = app.config['DEFAULT_MAP_PRETTY']
 
+  # optional stream parameter, i.e. whether to stream the output chunk by chunk or not (output in ndjson format is always streamed):
+  # set to corresponding value if provided via request arguments, set to corresponding default value in settings if not
+  handled_request = request_handler(request, 'stream')
+  if handled_request is not None and (handled_request in [0, 1, False, True, '0', '1', 'f', 't', 'False', 'True', 'false', 'true', 'n', 'y', 'no', 'yes']):
+    if handled_request in [0, '0', 'f', 'False', 'false', 'n', 'no']:
+      stream = False
+    elif handled_request in [1, '1', 't', 'True', 'true', 'y', 'yes']:
+      stream = True
+    else:
+      stream = handled_request
+  else:
+    stream = app.config['DEFAULT_MAP_STREAM'] if 'DEFAULT_MAP_STREAM' in app.config else DEFAULT_MAP_STREAM_
+  # (output in topojson and mvt format is never streamed, since neither a TopoJSON topology nor a Mapbox Vector Tile can be decoded before it is complete)
+  stream = (stream or map_format == 'ndjson') and map_format not in ['topojson', 'mvt']
+
   # query processing
 
   # return an error if optional EPSG code parameter for provided bbox is not a number
@@ -597,17 +1741,30 @@ def map_query():
     try:
       bbox_sw_x, bbox_sw_y = float(bbox[0]), float(bbox[1])
       bbox_ne_x, bbox_ne_y = float(bbox[2]), float(bbox[3])
-      # if bbox is a true bbox: loop through it and encode all pairs of coordinates if possible, return an error if not
-      if bbox_ne_x >= bbox_sw_x and bbox_ne_y >= bbox_sw_y:
-        data_list, status = olc_loop_handler(bbox_sw_x, bbox_sw_y, bbox_ne_x, bbox_ne_y, epsg_in, epsg_out, mode)
-        if pretty:
-          app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
-        else:
-          app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
-        if len(data_list) < 2:
-          return response_handler(data_list[0], status, epsg_out)
-        else:
-          return response_handler(multiple_features_handler(data_list), status, epsg_out)
+      # if bbox is a true bbox (i.e. neither of zero width nor of zero height): loop through it and encode all pairs of coordinates if possible, return an error if not
+      if bbox_ne_x > bbox_sw_x and bbox_ne_y > bbox_sw_y:
+        # return a Mapbox Vector Tile if requested
+        if map_format == 'mvt':
+          tile, status = olc_loop_handler(bbox_sw_x, bbox_sw_y, bbox_ne_x, bbox_ne_y, epsg_in, epsg_out, mode, False, map_format)
+          if status != HTTP_OK_STATUS_:
+            return response_handler(tile, status, None)
+          return mvt_response_handler(tile)
+        # stream the features chunk by chunk as they are produced if requested
+        if stream:
+          features, status = olc_loop_handler(bbox_sw_x, bbox_sw_y, bbox_ne_x, bbox_ne_y, epsg_in, epsg_out, mode, True)
+          if status != HTTP_OK_STATUS_:
+            return response_handler(features, status, None)
+          return streamed_response_handler(features, epsg_out, map_format)
+        data_list, status = olc_loop_handler(bbox_sw_x, bbox_sw_y, bbox_ne_x, bbox_ne_y, epsg_in, epsg_out, mode, False, map_format)
+        if status != HTTP_OK_STATUS_:
+          return response_handler(data_list, status, None)
+        with stage_timer('serialisation'):
+          if map_format == 'topojson':
+            return response_handler(data_list, status, epsg_out, pretty)
+          if len(data_list) < 2:
+            return response_handler(data_list[0], status, epsg_out, pretty)
+          else:
+            return response_handler(multiple_features_handler(data_list), status, epsg_out, pretty)
       else:
         data = { 'message': DEFAULT_MAP_ERROR_MESSAGE_, 'status': HTTP_ERROR_STATUS_ }
         return response_handler(data, HTTP_ERROR_STATUS_, None)
@@ -619,6 +1776,42 @@ def map_query():
     return response_handler(data, HTTP_ERROR_STATUS_, None)
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics_query():
+
+  # return 404 Not Found if not enabled in settings
+  if not (app.config['METRICS'] if 'METRICS' in app.config else DEFAULT_METRICS_):
+    abort(404)
+
+  # derive the cache hit ratios from the cache lookups so far and take the current numbers of entries of the in-process caches
+  for cache in INSTRUMENTED_CACHES_:
+    hits = metrics.counter_getter(metrics_, 'olca_cache_lookups_total', { 'cache': cache, 'result': 'hit' })
+    misses = metrics.counter_getter(metrics_, 'olca_cache_lookups_total', { 'cache': cache, 'result': 'miss' })
+    if hits + misses > 0:
+      metrics.gauge_setter(metrics_, 'olca_cache_hit_ratio', { 'cache': cache }, hits / (hits + misses))
+  with response_cache_lock_:
+    metrics.gauge_setter(metrics_, 'olca_cache_entries', { 'cache': 'response' }, len(response_cache_))
+  with tile_cache_lock_:
+    metrics.gauge_setter(metrics_, 'olca_cache_entries', { 'cache': 'tile' }, len(tile_cache_))
+
+  # always Prometheus text-based exposition format
+  return Response(metrics.exposition_builder(metrics_), content_type = metrics.EXPOSITION_MIMETYPE_)
+
+
+
+# prepare transformations at startup if requested in settings
+
+if 'TRANSFORMER_PREWARM' in app.config and app.config['TRANSFORMER_PREWARM']:
+  transformer_prewarmer()
+
+
+
+# load municipality boundaries at startup if configured in settings
+
+if 'MUNICIPALITY_GAZETTEER_FILE' in app.config:
+  municipality_gazetteer_, municipality_names_ = gazetteer_loader()
+
+
 
 # custom error handling
 
@@ -56,10 +56,21 @@
 #   Recover the full code from a short code:
 #   recoverNearest('9G8F+6X', 47.4, 8.6)
 #   recoverNearest('8F+6X', 47.4, 8.6)
+#
+#   Enumerate the level 4 cells (code length 8) within a bbox:
+#   for code, latLo, lngLo, latHi, lngHi in gridCells(54.0, 12.0, 54.3, 12.35, 8):
+#
+#   Encode and decode many locations at once (requires NumPy):
+#   codes = encode_many(latitudes, longitudes, 10)
+#   columns = decode_many(codes)
 
-import re
 import math
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # A separator used to break the code into two parts to aid memorability.
 SEPARATOR_ = '+'
 
@@ -133,6 +144,87 @@ MIN_TRIMMABLE_CODE_LEN_ = 6
 
 GRID_SIZE_DEGREES_ = 0.000125
 
+# Lookup table with the two characters of a lat/lng pair, indexed by
+# latitude digit * ENCODING_BASE_ + longitude digit.
+PAIR_CODE_TABLE_ = tuple(
+    latCh + lngCh for latCh in CODE_ALPHABET_ for lngCh in CODE_ALPHABET_)
+
+# Lookup table with the character of a grid cell, indexed by
+# row * GRID_COLUMNS_ + column.
+GRID_CODE_TABLE_ = tuple(CODE_ALPHABET_)
+
+# Lookup table with the value of each (upper or lower case) code character.
+DECODE_TABLE_ = dict(
+    [(ch, i) for i, ch in enumerate(CODE_ALPHABET_)] +
+    [(ch.lower(), i) for i, ch in enumerate(CODE_ALPHABET_)])
+
+
+def classify(code):
+    """
+    Classifies a code in a single scan.
+    This applies the rules of isValid, isShort and isFull at once and records
+    the positions of the separator and the padding, so that callers needing
+    more than one of these answers do not have to scan the code repeatedly.
+    Args:
+      code: A character sequence that may be an Open Location Code.
+    Returns:
+      A ClassifiedCode object. It can be passed to decode, shorten and
+      recoverNearest instead of the code itself to skip their validation.
+    """
+    sep = -1
+    seps = 0
+    pad = -1
+    lastPad = -1
+    padGap = False
+    illegal = False
+    for i, ch in enumerate(code):
+        if ch == SEPARATOR_:
+            seps += 1
+            if sep == -1:
+                sep = i
+        elif ch == PADDING_CHARACTER_:
+            if pad == -1:
+                pad = i
+            elif lastPad != i - 1:
+                # There can only be one group of padding characters.
+                padGap = True
+            lastPad = i
+        elif ch not in DECODE_TABLE_:
+            illegal = True
+    valid = not (
+        # The separator is required, only once and not as the only
+        # character, and it must be in an even position up to the eighth
+        # digit.
+        illegal or seps != 1 or len(code) == 1 or sep > SEPARATOR_POSITION_ or
+        sep % 2 == 1 or
+        # If there are characters after the separator, there must be more
+        # than one of them.
+        len(code) - sep - 1 == 1 or
+        # Padding is only allowed in full codes, not at the start and as a
+        # single group of even length, and the code must end after it with
+        # the separator.
+        (pad != -1 and
+         (sep < SEPARATOR_POSITION_ or pad == 0 or padGap or
+          (lastPad + 1 - pad) % 2 == 1 or not code.endswith(SEPARATOR_))))
+    short = valid and sep < SEPARATOR_POSITION_
+    # The first latitude and longitude characters of a full code must not
+    # decode to values of >= 90 or >= 180 degrees.
+    full = (valid and not short and
+            DECODE_TABLE_.get(code[0], -1) * ENCODING_BASE_ <
+            LATITUDE_MAX_ * 2 and
+            DECODE_TABLE_.get(code[1], -1) * ENCODING_BASE_ <
+            LONGITUDE_MAX_ * 2)
+    return ClassifiedCode(code, valid, short, full, sep, pad)
+
+
+def _classified(code):
+    """
+    Returns the ClassifiedCode of a code, classifying it only if necessary.
+    """
+    if isinstance(code, ClassifiedCode):
+        return code
+    return classify(code)
+
 
 def isValid(code):
     """
@@ -141,45 +233,7 @@ def isValid(code):
     set with at most one separator. The separator can be in any even-numbered
     position up to the eighth digit.
     """
-    # The separator is required.
-    sep = code.find(SEPARATOR_)
-    if code.count(SEPARATOR_) > 1:
-        return False
-    # Is it the only character?
-    if len(code) == 1:
-        return False
-    # Is it in an illegal position?
-    if sep == -1 or sep > SEPARATOR_POSITION_ or sep % 2 == 1:
-        return False
-    # We can have an even number of padding characters before the separator,
-    # but then it must be the final character.
-    pad = code.find(PADDING_CHARACTER_)
-    if pad != -1:
-        # Short codes cannot have padding
-        if sep < SEPARATOR_POSITION_:
-            return False
-        # Not allowed to start with them!
-        if pad == 0:
-            return False
-
-        # There can only be one group and it must have even length.
-        rpad = code.rfind(PADDING_CHARACTER_) + 1
-        pads = code[pad:rpad]
-        if len(pads) % 2 == 1 or pads.count(PADDING_CHARACTER_) != len(pads):
-            return False
-        # If the code is long enough to end with a separator, make sure it does.
-        if not code.endswith(SEPARATOR_):
-            return False
-    # If there are characters after the separator, make sure there isn't just
-    # one of them (not legal).
-    if len(code) - sep - 1 == 1:
-        return False
-    # Check the code contains only valid characters.
-    sepPad = SEPARATOR_ + PADDING_CHARACTER_
-    for ch in code:
-        if ch.upper() not in CODE_ALPHABET_ and ch not in sepPad:
-            return False
-    return True
+    return _classified(code).valid
 
 
 def isShort(code):
@@ -189,14 +243,7 @@ def isShort(code):
     digits from an Open Location Code. It must include a separator
     character.
     """
-    # Check it's valid.
-    if not isValid(code):
-        return False
-    # If there are less characters than expected before the SEPARATOR.
-    sep = code.find(SEPARATOR_)
-    if sep >= 0 and sep < SEPARATOR_POSITION_:
-        return True
-    return False
+    return _classified(code).short
 
 
 def isFull(code):
@@ -208,23 +255,7 @@ def isFull(code):
     character is present, it must be the first character. If the separator
     character is present, it must be after four characters.
     """
-    if not isValid(code):
-        return False
-    # If it's short, it's not full
-    if isShort(code):
-        return False
-    # Work out what the first latitude character indicates for latitude.
-    firstLatValue = CODE_ALPHABET_.find(code[0].upper()) * ENCODING_BASE_
-    if firstLatValue >= LATITUDE_MAX_ * 2:
-        # The code would decode to a latitude of >= 90 degrees.
-        return False
-    if len(code) > 1:
-        # Work out what the first longitude character indicates for longitude.
-        firstLngValue = CODE_ALPHABET_.find(code[1].upper()) * ENCODING_BASE_
-    if firstLngValue >= LONGITUDE_MAX_ * 2:
-        # The code would decode to a longitude of >= 180 degrees.
-        return False
-    return True
+    return _classified(code).full
 
 
 def locationToIntegers(latitude, longitude):
@@ -292,38 +323,40 @@ def encodeIntegers(latVal, lngVal, codeLength):
         raise ValueError('Invalid Open Location Code length - ' +
                          str(codeLength))
     codeLength = min(codeLength, MAX_DIGIT_COUNT_)
-    # Initialise the code string.
-    code = ''
+    # Build the code from the most significant end, emitting only the digits
+    # that are needed. Each step takes a whole lat/lng pair or grid character
+    # from the lookup tables.
+    parts = []
 
-    # Compute the grid part of the code if necessary.
-    if codeLength > PAIR_CODE_LENGTH_:
-        for i in range(0, MAX_DIGIT_COUNT_ - PAIR_CODE_LENGTH_):
-            latDigit = latVal % GRID_ROWS_
-            lngDigit = lngVal % GRID_COLUMNS_
-            ndx = latDigit * GRID_COLUMNS_ + lngDigit
-            code = CODE_ALPHABET_[ndx] + code
-            latVal //= GRID_ROWS_
-            lngVal //= GRID_COLUMNS_
-    else:
-        latVal //= pow(GRID_ROWS_, GRID_CODE_LENGTH_)
-        lngVal //= pow(GRID_COLUMNS_, GRID_CODE_LENGTH_)
     # Compute the pair section of the code.
-    for i in range(0, PAIR_CODE_LENGTH_ // 2):
-        code = CODE_ALPHABET_[lngVal % ENCODING_BASE_] + code
-        code = CODE_ALPHABET_[latVal % ENCODING_BASE_] + code
-        latVal //= ENCODING_BASE_
-        lngVal //= ENCODING_BASE_
-
-    # Add the separator character.
-    code = code[:SEPARATOR_POSITION_] + SEPARATOR_ + code[SEPARATOR_POSITION_:]
-
-    # If we don't need to pad the code, return the requested section.
+    latPair = latVal // pow(GRID_ROWS_, GRID_CODE_LENGTH_)
+    lngPair = lngVal // pow(GRID_COLUMNS_, GRID_CODE_LENGTH_)
+    pv = ENCODING_BASE_**(PAIR_CODE_LENGTH_ // 2 - 1)
+    for i in range(0, min(codeLength, PAIR_CODE_LENGTH_) // 2):
+        parts.append(PAIR_CODE_TABLE_[latPair // pv % ENCODING_BASE_ *
+                                      ENCODING_BASE_ +
+                                      lngPair // pv % ENCODING_BASE_])
+        pv //= ENCODING_BASE_
+    # Compute the grid part of the code if necessary.
+    rowpv = GRID_LAT_FIRST_PLACE_VALUE_
+    colpv = GRID_LNG_FIRST_PLACE_VALUE_
+    for i in range(PAIR_CODE_LENGTH_, codeLength):
+        parts.append(GRID_CODE_TABLE_[latVal // rowpv % GRID_ROWS_ *
+                                      GRID_COLUMNS_ +
+                                      lngVal // colpv % GRID_COLUMNS_])
+        rowpv //= GRID_ROWS_
+        colpv //= GRID_COLUMNS_
+    code = ''.join(parts)
+
+    # If we don't need to pad the code, add the separator character and
+    # return the code.
     if codeLength >= SEPARATOR_POSITION_:
-        return code[0:codeLength + 1]
+        return (code[:SEPARATOR_POSITION_] + SEPARATOR_ +
+                code[SEPARATOR_POSITION_:])
 
     # Pad and return the code.
-    return code[0:codeLength] + ''.zfill(SEPARATOR_POSITION_ -
-                                         codeLength) + SEPARATOR_
+    return code + PADDING_CHARACTER_ * (SEPARATOR_POSITION_ -
+                                        codeLength) + SEPARATOR_
 
 
 def decode(code):
@@ -332,40 +365,79 @@ def decode(code):
     Returns a CodeArea object that includes the coordinates of the bounding
     box - the lower left, center and upper right.
     Args:
-      code: The Open Location Code to decode.
+      code: The Open Location Code to decode, or its ClassifiedCode.
     Returns:
       A CodeArea object that provides the latitude and longitude of two of the
       corners of the area, the center, and the length of the original code.
     """
-    if not isFull(code):
-        raise ValueError(
-            'Passed Open Location Code is not a valid full code - ' + str(code))
+    (latVal, lngVal, latPrecision, lngPrecision,
+     codeLength) = decodeIntegers(code)
+    # Convert the pair and grid parts of the integer values to degrees
+    # separately, the precisions as well.
+    latPair, latGrid = divmod(latVal, GRID_ROWS_**GRID_CODE_LENGTH_)
+    lngPair, lngGrid = divmod(lngVal, GRID_COLUMNS_**GRID_CODE_LENGTH_)
+    lat = (float(latPair - LATITUDE_MAX_ * PAIR_PRECISION_) / PAIR_PRECISION_ +
+           float(latGrid) / FINAL_LAT_PRECISION_)
+    lng = (float(lngPair - LONGITUDE_MAX_ * PAIR_PRECISION_) / PAIR_PRECISION_ +
+           float(lngGrid) / FINAL_LNG_PRECISION_)
+    if codeLength <= PAIR_CODE_LENGTH_:
+        latPrecision = float(latPrecision // GRID_ROWS_**GRID_CODE_LENGTH_
+                             ) / PAIR_PRECISION_
+        lngPrecision = float(lngPrecision // GRID_COLUMNS_**GRID_CODE_LENGTH_
+                             ) / PAIR_PRECISION_
+    else:
+        latPrecision = float(latPrecision) / FINAL_LAT_PRECISION_
+        lngPrecision = float(lngPrecision) / FINAL_LNG_PRECISION_
+    # Multiple values by 1e14, round and then divide. This reduces errors due
+    # to floating point precision.
+    return CodeArea(round(lat, 14), round(lng,
+                                          14), round(lat + latPrecision, 14),
+                    round(lng + lngPrecision, 14), codeLength)
+
+
+def decodeIntegers(code):
+    """
+    Decodes an Open Location Code into the integer representation of its area.
+    This does the work of decode without any float conversion or rounding and
+    without allocating a CodeArea, so callers that only need the position can
+    stay in integer space.
+    Args:
+      code: The Open Location Code to decode, or its ClassifiedCode.
+    Returns:
+      A tuple of the latitude and longitude of the SW corner as integers (in
+      the representation of locationToIntegers), the height and width of the
+      area in the same units, and the length of the original code.
+    """
+    classified = _classified(code)
+    if not classified.full:
+        raise ValueError('Passed Open Location Code is not a valid full code - '
+                         + str(classified.code))
     # Strip out separator character (we've already established the code is
     # valid so the maximum is one), and padding characters. Convert to upper
     # case and constrain to the maximum number of digits.
-    code = re.sub('[+0]', '', code)
+    code = classified.code.replace(SEPARATOR_, '').replace(
+        PADDING_CHARACTER_, '')
     code = code.upper()
     code = code[:MAX_DIGIT_COUNT_]
-    # Initialise the values for each section. We work them out as integers and
-    # convert them to floats at the end.
-    normalLat = -LATITUDE_MAX_ * PAIR_PRECISION_
-    normalLng = -LONGITUDE_MAX_ * PAIR_PRECISION_
+    # Initialise the values for each section.
+    normalLat = 0
+    normalLng = 0
     gridLat = 0
     gridLng = 0
     # How many digits do we have to process?
     digits = min(len(code), PAIR_CODE_LENGTH_)
     # Define the place value for the most significant pair.
-    pv = PAIR_FIRST_PLACE_VALUE_
+    pv = ENCODING_BASE_**(PAIR_CODE_LENGTH_ // 2 - 1)
     # Decode the paired digits.
     for i in range(0, digits, 2):
-        normalLat += CODE_ALPHABET_.find(code[i]) * pv
-        normalLng += CODE_ALPHABET_.find(code[i + 1]) * pv
+        normalLat += DECODE_TABLE_[code[i]] * pv
+        normalLng += DECODE_TABLE_[code[i + 1]] * pv
         if i < digits - 2:
             pv //= ENCODING_BASE_
 
-    # Convert the place value to a float in degrees.
-    latPrecision = float(pv) / PAIR_PRECISION_
-    lngPrecision = float(pv) / PAIR_PRECISION_
+    # Convert the place value to the units of the finest precision.
+    latPrecision = pv * GRID_ROWS_**GRID_CODE_LENGTH_
+    lngPrecision = pv * GRID_COLUMNS_**GRID_CODE_LENGTH_
     # Process any extra precision digits.
     if len(code) > PAIR_CODE_LENGTH_:
         # Initialise the place values for the grid.
@@ -374,30 +446,46 @@ def decode(code):
         # How many digits do we have to process?
         digits = min(len(code), MAX_DIGIT_COUNT_)
         for i in range(PAIR_CODE_LENGTH_, digits):
-            digitVal = CODE_ALPHABET_.find(code[i])
-            row = digitVal // GRID_COLUMNS_
-            col = digitVal % GRID_COLUMNS_
+            row, col = divmod(DECODE_TABLE_[code[i]], GRID_COLUMNS_)
             gridLat += row * rowpv
             gridLng += col * colpv
             if i < digits - 1:
                 rowpv //= GRID_ROWS_
                 colpv //= GRID_COLUMNS_
 
-        # Adjust the precisions from the integer values to degrees.
-        latPrecision = float(rowpv) / FINAL_LAT_PRECISION_
-        lngPrecision = float(colpv) / FINAL_LNG_PRECISION_
+        latPrecision = rowpv
+        lngPrecision = colpv
 
     # Merge the values from the normal and extra precision parts of the code.
-    lat = float(normalLat) / PAIR_PRECISION_ + float(
-        gridLat) / FINAL_LAT_PRECISION_
-    lng = float(normalLng) / PAIR_PRECISION_ + float(
-        gridLng) / FINAL_LNG_PRECISION_
-    # Multiple values by 1e14, round and then divide. This reduces errors due
-    # to floating point precision.
-    return CodeArea(round(lat, 14), round(lng,
-                                          14), round(lat + latPrecision, 14),
-                    round(lng + lngPrecision, 14),
-                    min(len(code), MAX_DIGIT_COUNT_))
+    return (normalLat * GRID_ROWS_**GRID_CODE_LENGTH_ + gridLat,
+            normalLng * GRID_COLUMNS_**GRID_CODE_LENGTH_ + gridLng,
+            latPrecision, lngPrecision, min(len(code), MAX_DIGIT_COUNT_))
+
+
+def codeHierarchy(code):
+    """
+    Derives the codes of all lat/lng pair levels containing a full code.
+    The codes are sliced from a single encoding of the decoded integer
+    representation instead of encoding the location once per level.
+    Args:
+      code: A full Open Location Code, or its ClassifiedCode.
+    Returns:
+      A list of the codes of length 2, 4, 6, 8 and 10 (padded where
+      necessary) that contain the code, up to the length of the code itself.
+    """
+    (latVal, lngVal, latPrecision, lngPrecision,
+     codeLength) = decodeIntegers(code)
+    digits = encodeIntegers(latVal, lngVal, PAIR_CODE_LENGTH_).replace(
+        SEPARATOR_, '')
+    hierarchy = []
+    for length in range(2, min(codeLength, PAIR_CODE_LENGTH_) + 1, 2):
+        if length < SEPARATOR_POSITION_:
+            hierarchy.append(digits[:length] + PADDING_CHARACTER_ *
+                             (SEPARATOR_POSITION_ - length) + SEPARATOR_)
+        else:
+            hierarchy.append(digits[:SEPARATOR_POSITION_] + SEPARATOR_ +
+                             digits[SEPARATOR_POSITION_:length])
+    return hierarchy
 
 
 def recoverNearest(code, referenceLatitude, referenceLongitude):
@@ -406,7 +494,7 @@ def recoverNearest(code, referenceLatitude, referenceLongitude):
      Given a short code of between four and seven characters, this recovers
      the nearest matching full code to the specified location.
      Args:
-       code: A valid OLC character sequence.
+       code: A valid OLC character sequence, or its ClassifiedCode.
        referenceLatitude: The latitude (in signed decimal degrees) to use to
            find the nearest matching full code.
        referenceLongitude: The longitude (in signed decimal degrees) to use
@@ -417,25 +505,29 @@ def recoverNearest(code, referenceLatitude, referenceLongitude):
        valid full code, it is returned with proper capitalization but otherwise
        unchanged.
     """
+    classified = _classified(code)
     # if code is a valid full code, return it properly capitalized
-    if isFull(code):
-        return code.upper()
-    if not isShort(code):
-        raise ValueError('Passed short code is not valid - ' + str(code))
+    if classified.full:
+        return classified.code.upper()
+    if not classified.short:
+        raise ValueError('Passed short code is not valid - ' +
+                         str(classified.code))
     # Ensure that latitude and longitude are valid.
     referenceLatitude = clipLatitude(referenceLatitude)
     referenceLongitude = normalizeLongitude(referenceLongitude)
     # Clean up the passed code.
-    code = code.upper()
+    code = classified.code.upper()
     # Compute the number of digits we need to recover.
-    paddingLength = SEPARATOR_POSITION_ - code.find(SEPARATOR_)
+    paddingLength = SEPARATOR_POSITION_ - classified.separatorPosition
     # The resolution (height and width) of the padded area in degrees.
     resolution = pow(20, 2 - (paddingLength / 2))
     # Distance from the center to an edge (in degrees).
     halfResolution = resolution / 2.0
     # Use the reference location to pad the supplied short code and decode it.
+    # The padded code is full by construction, so it is not validated again.
+    code = encode(referenceLatitude, referenceLongitude)[0:paddingLength] + code
     codeArea = decode(
-        encode(referenceLatitude, referenceLongitude)[0:paddingLength] + code)
+        ClassifiedCode(code, True, False, True, SEPARATOR_POSITION_, -1))
     # How many degrees latitude is the code from the reference? If it is more
     # than half the resolution, we need to move it north or south but keep it
     # within -90 to 90 degrees.
@@ -472,7 +564,7 @@ def shorten(code, latitude, longitude):
      that the shortened code will be able to be recovered using slightly different
      locations.
      Args:
-       code: A full, valid code to shorten.
+       code: A full, valid code to shorten, or its ClassifiedCode.
        latitude: A latitude, in signed decimal degrees, to use as the reference
            point.
        longitude: A longitude, in signed decimal degrees, to use as the reference
@@ -481,12 +573,15 @@ def shorten(code, latitude, longitude):
        Either the original code, if the reference location was not close enough,
        or the .
     """
-    if not isFull(code):
-        raise ValueError('Passed code is not valid and full: ' + str(code))
-    if code.find(PADDING_CHARACTER_) != -1:
-        raise ValueError('Cannot shorten padded codes: ' + str(code))
-    code = code.upper()
-    codeArea = decode(code)
+    classified = _classified(code)
+    if not classified.full:
+        raise ValueError('Passed code is not valid and full: ' +
+                         str(classified.code))
+    if classified.paddingPosition != -1:
+        raise ValueError('Cannot shorten padded codes: ' +
+                         str(classified.code))
+    code = classified.code.upper()
+    codeArea = decode(classified)
     if codeArea.codeLength < MIN_TRIMMABLE_CODE_LEN_:
         raise ValueError('Code length must be at least ' +
                          MIN_TRIMMABLE_CODE_LEN_)
@@ -540,6 +635,398 @@ def normalizeLongitude(longitude):
     return longitude
 
 
+def _gridIndexes(latitudeLo, longitudeLo, latitudeHi, longitudeHi,
+                 codeLength):
+    """
+     Compute the cell indexes of the grid of a code length within a bbox.
+     Returns:
+       A tuple of the cell size in units of the pair precision, the first and
+       (exclusive) last row index and the first and (exclusive) last column
+       index. Column indexes are not normalised to the range of longitudes.
+    """
+    if (codeLength < MIN_DIGIT_COUNT_ or codeLength > PAIR_CODE_LENGTH_ or
+            codeLength % 2 == 1):
+        raise ValueError('Invalid Open Location Code length for a grid - ' +
+                         str(codeLength))
+    step = ENCODING_BASE_**((PAIR_CODE_LENGTH_ - codeLength) // 2)
+    latUnit = step * GRID_ROWS_**GRID_CODE_LENGTH_
+    lngUnit = step * GRID_COLUMNS_**GRID_CODE_LENGTH_
+    numRows = 2 * LATITUDE_MAX_ * PAIR_PRECISION_ // step
+    numColumns = 2 * LONGITUDE_MAX_ * PAIR_PRECISION_ // step
+    latLo = int(math.floor(latitudeLo * FINAL_LAT_PRECISION_)
+                ) + LATITUDE_MAX_ * FINAL_LAT_PRECISION_
+    latHi = int(math.floor(latitudeHi * FINAL_LAT_PRECISION_)
+                ) + LATITUDE_MAX_ * FINAL_LAT_PRECISION_
+    lngLo = int(math.floor(longitudeLo * FINAL_LNG_PRECISION_)
+                ) + LONGITUDE_MAX_ * FINAL_LNG_PRECISION_
+    lngHi = int(math.floor(longitudeHi * FINAL_LNG_PRECISION_)
+                ) + LONGITUDE_MAX_ * FINAL_LNG_PRECISION_
+    if latHi < latLo or lngHi < lngLo:
+        return (step, 0, 0, 0, 0)
+    # Every cell touched by the bbox is part of the grid, the cells the bbox
+    # only touches with its north or east edge excepted. A bbox that is just a
+    # line or a point still covers one cell.
+    rowFirst = min(max(latLo // latUnit, 0), numRows - 1)
+    rowEnd = min(max(-(-latHi // latUnit), rowFirst + 1), numRows)
+    columnFirst = lngLo // lngUnit
+    columnEnd = max(-(-lngHi // lngUnit), columnFirst + 1)
+    columnEnd = min(columnEnd, columnFirst + numColumns)
+    return (step, rowFirst, rowEnd, columnFirst, columnEnd)
+
+
+def gridDimensions(latitudeLo, longitudeLo, latitudeHi, longitudeHi,
+                   codeLength):
+    """
+     Compute the number of rows and columns gridCells yields for a bbox.
+     Args:
+       latitudeLo: The latitude of the SW corner of the bbox in degrees.
+       longitudeLo: The longitude of the SW corner of the bbox in degrees.
+       latitudeHi: The latitude of the NE corner of the bbox in degrees.
+       longitudeHi: The longitude of the NE corner of the bbox in degrees.
+       codeLength: The length of the codes of the grid cells.
+     Returns:
+       A tuple of the number of rows and columns.
+    """
+    (step, rowFirst, rowEnd, columnFirst,
+     columnEnd) = _gridIndexes(latitudeLo, longitudeLo, latitudeHi,
+                               longitudeHi, codeLength)
+    return (rowEnd - rowFirst, columnEnd - columnFirst)
+
+
+def _pairPrefix(latIndex, lngIndex, pairs):
+    """
+     Encode the most significant lat/lng pairs of a grid cell from the cell
+     indexes of its parent.
+    """
+    parts = []
+    pv = ENCODING_BASE_**(pairs - 1) if pairs else 0
+    for i in range(0, pairs):
+        parts.append(PAIR_CODE_TABLE_[latIndex // pv % ENCODING_BASE_ *
+                                      ENCODING_BASE_ +
+                                      lngIndex // pv % ENCODING_BASE_])
+        pv //= ENCODING_BASE_
+    return ''.join(parts)
+
+
+def gridCells(latitudeLo, longitudeLo, latitudeHi, longitudeHi, codeLength):
+    """
+     Enumerate the cells of the grid of a code length within a bbox.
+     The cells are stepped through by their integer indexes, row by row from
+     south to north and from west to east within a row. Each code is derived
+     from the one of its western neighbour by replacing the last lat/lng pair,
+     and the bounds are computed from the indexes, so neither encode nor
+     decode are called and no cell is produced twice. The grid covers every
+     cell the bbox intersects, wrapping around at the antimeridian.
+     Args:
+       latitudeLo: The latitude of the SW corner of the bbox in degrees.
+       longitudeLo: The longitude of the SW corner of the bbox in degrees.
+       latitudeHi: The latitude of the NE corner of the bbox in degrees.
+       longitudeHi: The longitude of the NE corner of the bbox in degrees.
+       codeLength: The length of the codes of the grid cells, one of the
+           lat/lng pair lengths (2, 4, 6, 8 or 10).
+     Returns:
+       A generator of (code, latitudeLo, longitudeLo, latitudeHi, longitudeHi)
+       tuples, with the same bounds decode returns for the code.
+    """
+    (step, rowFirst, rowEnd, columnFirst,
+     columnEnd) = _gridIndexes(latitudeLo, longitudeLo, latitudeHi,
+                               longitudeHi, codeLength)
+    numColumns = 2 * LONGITUDE_MAX_ * PAIR_PRECISION_ // step
+    prefixPairs = codeLength // 2 - 1
+    # The characters following the last lat/lng pair, or the separator put in
+    # front of it for full length codes.
+    if codeLength >= SEPARATOR_POSITION_ + 2:
+        separator, tail = SEPARATOR_, ''
+    else:
+        separator, tail = '', PADDING_CHARACTER_ * (
+            SEPARATOR_POSITION_ - codeLength) + SEPARATOR_
+    # The size of the cells in degrees. The north and east bounds are rounded
+    # like decode does.
+    resolution = float(step) / PAIR_PRECISION_
+    for row in range(rowFirst, rowEnd):
+        rowParent, latDigit = divmod(row, ENCODING_BASE_)
+        latDigit *= ENCODING_BASE_
+        lat = float(row * step - LATITUDE_MAX_ * PAIR_PRECISION_
+                    ) / PAIR_PRECISION_
+        latHi = round(lat + resolution, 14)
+        prefixParent = -1
+        for column in range(columnFirst, columnEnd):
+            columnParent, lngDigit = divmod(column % numColumns,
+                                            ENCODING_BASE_)
+            # The leading pairs only change when crossing a parent cell.
+            if columnParent != prefixParent:
+                prefix = _pairPrefix(rowParent, columnParent,
+                                     prefixPairs) + separator
+                prefixParent = columnParent
+                lng = float(columnParent * ENCODING_BASE_ * step -
+                            LONGITUDE_MAX_ * PAIR_PRECISION_)
+            lngLo = (lng + lngDigit * step) / PAIR_PRECISION_
+            lngHi = round(lngLo + resolution, 14)
+            yield (prefix + PAIR_CODE_TABLE_[latDigit + lngDigit] + tail, lat,
+                   lngLo, latHi, lngHi)
+
+
+def _requireNumpy():
+    """
+     Raise an ImportError if NumPy, needed by the batch functions, is missing.
+    """
+    if np is None:
+        raise ImportError('NumPy is required for encode_many and decode_many')
+
+
+def locationsToIntegers(latitudes, longitudes):
+    """
+     Convert arrays of locations in degrees into the integer representations.
+     This is the array counterpart of locationToIntegers.
+     Args:
+       latitudes: An array-like (or a scalar) of latitudes in signed decimal
+           degrees.
+       longitudes: An array-like (or a scalar) of longitudes in signed decimal
+           degrees.
+     Returns:
+       A tuple of two int64 arrays with the latitude and longitude values,
+       with the same shape as the input (0-d for scalar input).
+    """
+    _requireNumpy()
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    if latitudes.shape != longitudes.shape:
+        raise ValueError('Latitude and longitude arrays differ in shape')
+    if not (np.isfinite(latitudes).all() and np.isfinite(longitudes).all()):
+        raise ValueError('Latitudes and longitudes must be finite numbers')
+    latVals = np.floor(latitudes * FINAL_LAT_PRECISION_).astype(np.int64)
+    latVals += LATITUDE_MAX_ * FINAL_LAT_PRECISION_
+    # Assign the results instead of computing in place, since scalar input
+    # yields NumPy scalars (and 0-d arrays cannot be used as output arrays).
+    latVals = np.clip(latVals, 0, 2 * LATITUDE_MAX_ * FINAL_LAT_PRECISION_ - 1)
+    lngVals = np.floor(longitudes * FINAL_LNG_PRECISION_).astype(np.int64)
+    lngVals += LONGITUDE_MAX_ * FINAL_LNG_PRECISION_
+    # As with Python's % operator, the result of np.mod takes the sign of the
+    # divisor, so negative values wrap around into the valid range.
+    lngVals = np.mod(lngVals, 2 * LONGITUDE_MAX_ * FINAL_LNG_PRECISION_)
+    return (np.asarray(latVals), np.asarray(lngVals))
+
+
+def encode_many(latitudes, longitudes, codeLength=PAIR_CODE_LENGTH_):
+    """
+     Encode arrays of locations into Open Location Codes.
+     This produces the same codes as calling encode for every location, but
+     does the integer arithmetic on whole arrays at once.
+     Args:
+       latitudes: An array-like (or a scalar) of latitudes in signed decimal
+           degrees. They will be clipped to the range -90 to 90.
+       longitudes: An array-like (or a scalar) of longitudes in signed decimal
+           degrees. They will be normalised to the range -180 to 180.
+       codeLength: The number of significant digits in the output codes, not
+           including any separator characters.
+     Returns:
+       A NumPy array of strings with the same shape as the input arrays (a
+       0-d array for scalar input).
+    """
+    (latVals, lngVals) = locationsToIntegers(latitudes, longitudes)
+    return encodeIntegers_many(latVals, lngVals, codeLength)
+
+
+def encodeIntegers_many(latVals, lngVals, codeLength):
+    """
+     Encode arrays of locations, as integer values, into codes.
+     This is the array counterpart of encodeIntegers.
+    """
+    _requireNumpy()
+    if codeLength < MIN_DIGIT_COUNT_ or (codeLength < PAIR_CODE_LENGTH_ and
+                                         codeLength % 2 == 1):
+        raise ValueError('Invalid Open Location Code length - ' +
+                         str(codeLength))
+    codeLength = min(codeLength, MAX_DIGIT_COUNT_)
+    latVals = np.asarray(latVals, dtype=np.int64)
+    lngVals = np.asarray(lngVals, dtype=np.int64)
+    shape = latVals.shape
+    latVals = latVals.ravel()
+    lngVals = lngVals.ravel()
+    # One row of digit values (indexes into the alphabet) per location.
+    digits = np.zeros((latVals.size, MAX_DIGIT_COUNT_), dtype=np.uint8)
+    # Compute the grid part of the codes if necessary.
+    if codeLength > PAIR_CODE_LENGTH_:
+        for i in range(MAX_DIGIT_COUNT_ - 1, PAIR_CODE_LENGTH_ - 1, -1):
+            digits[:, i] = (latVals % GRID_ROWS_) * GRID_COLUMNS_ + (
+                lngVals % GRID_COLUMNS_)
+            latVals = latVals // GRID_ROWS_
+            lngVals = lngVals // GRID_COLUMNS_
+    else:
+        latVals = latVals // pow(GRID_ROWS_, GRID_CODE_LENGTH_)
+        lngVals = lngVals // pow(GRID_COLUMNS_, GRID_CODE_LENGTH_)
+    # Compute the pair section of the codes.
+    for i in range(PAIR_CODE_LENGTH_ - 2, -1, -2):
+        digits[:, i] = latVals % ENCODING_BASE_
+        digits[:, i + 1] = lngVals % ENCODING_BASE_
+        latVals = latVals // ENCODING_BASE_
+        lngVals = lngVals // ENCODING_BASE_
+    # Translate the digit values into characters and insert the separator,
+    # padding the codes if they are shorter than the separator position.
+    alphabet = np.frombuffer(CODE_ALPHABET_.encode('ascii'), dtype=np.uint8)
+    chars = alphabet[digits]
+    if codeLength >= SEPARATOR_POSITION_:
+        width = codeLength + 1
+        out = np.empty((latVals.size, width), dtype=np.uint8)
+        out[:, :SEPARATOR_POSITION_] = chars[:, :SEPARATOR_POSITION_]
+        out[:, SEPARATOR_POSITION_ + 1:] = chars[:, SEPARATOR_POSITION_:
+                                                 codeLength]
+    else:
+        width = SEPARATOR_POSITION_ + 1
+        out = np.empty((latVals.size, width), dtype=np.uint8)
+        out[:, :codeLength] = chars[:, :codeLength]
+        out[:, codeLength:SEPARATOR_POSITION_] = ord(PADDING_CHARACTER_)
+    out[:, SEPARATOR_POSITION_] = ord(SEPARATOR_)
+    codes = out.view('S' + str(width)).ravel().astype('U' + str(width))
+    return codes.reshape(shape)
+
+
+def decode_many(codes):
+    """
+     Decode an array of full Open Location Codes into the location coordinates.
+     This is the array counterpart of decode. Instead of one CodeArea object
+     per code it returns one array per CodeArea attribute. The coordinates
+     are computed from the exact integer values, so they agree with the
+     rounded values of decode to within 1e-14 degrees.
+     Args:
+       codes: An array-like of full Open Location Codes.
+     Returns:
+       A dictionary with the arrays latitudeLo, longitudeLo, latitudeHi,
+       longitudeHi, latitudeCenter, longitudeCenter and codeLength.
+     Raises:
+       ValueError: If any of the codes is not a valid full code.
+    """
+    _requireNumpy()
+    codes = np.asarray(codes)
+    shape = codes.shape
+    codes = codes.ravel()
+    try:
+        codes = codes.astype('S')
+    except UnicodeEncodeError:
+        raise ValueError('Passed Open Location Codes are not all valid full '
+                         'codes')
+    width = max(codes.itemsize, MAX_DIGIT_COUNT_ + 1)
+    chars = np.zeros((codes.size, width), dtype=np.uint8)
+    if codes.size:
+        raw = codes.view(np.uint8).reshape(codes.size, codes.itemsize)
+        chars[:, :codes.itemsize] = raw
+    # Character values, -1 for characters that are not digits.
+    lookup = np.full(256, -1, dtype=np.int64)
+    for i, ch in enumerate(CODE_ALPHABET_):
+        lookup[ord(ch)] = i
+        lookup[ord(ch.lower())] = i
+    values = lookup[chars]
+    lengths = np.count_nonzero(chars, axis=1)
+    # The separator must follow the eighth character. Any padding must start at
+    # an even position, run up to the separator and end the code.
+    prefix = chars[:, :SEPARATOR_POSITION_]
+    isPadding = prefix == ord(PADDING_CHARACTER_)
+    padStart = np.where(isPadding.any(axis=1), isPadding.argmax(axis=1),
+                        SEPARATOR_POSITION_)
+    positions = np.arange(SEPARATOR_POSITION_)
+    beforePad = positions < padStart[:, None]
+    valid = chars[:, SEPARATOR_POSITION_] == ord(SEPARATOR_)
+    valid &= np.where(beforePad, values[:, :SEPARATOR_POSITION_] >= 0,
+                      isPadding).all(axis=1)
+    valid &= (padStart % 2 == 0) & (padStart >= MIN_DIGIT_COUNT_)
+    valid &= (padStart == SEPARATOR_POSITION_) | (
+        lengths == SEPARATOR_POSITION_ + 1)
+    # Characters after the separator must be digits, and there must not be
+    # just one of them.
+    suffixLengths = lengths - SEPARATOR_POSITION_ - 1
+    valid &= suffixLengths != 1
+    suffix = values[:, SEPARATOR_POSITION_ + 1:]
+    inSuffix = np.arange(suffix.shape[1]) < suffixLengths[:, None]
+    valid &= np.where(inSuffix, suffix >= 0, True).all(axis=1)
+    # The first latitude and longitude characters must stay within range.
+    valid &= values[:, 0] * ENCODING_BASE_ < LATITUDE_MAX_ * 2
+    valid &= values[:, 1] * ENCODING_BASE_ < LONGITUDE_MAX_ * 2
+    if not valid.all():
+        raise ValueError(
+            'Passed Open Location Code is not a valid full code - ' +
+            str(np.asarray(codes)[~valid][0].decode('ascii', 'replace')))
+    # Line up the significant digits, dropping the separator and padding.
+    digits = np.concatenate(
+        (values[:, :SEPARATOR_POSITION_],
+         values[:, SEPARATOR_POSITION_ + 1:SEPARATOR_POSITION_ + 1 +
+                MAX_DIGIT_COUNT_ - SEPARATOR_POSITION_]),
+        axis=1)
+    digitCounts = np.minimum(np.where(padStart < SEPARATOR_POSITION_,
+                                      padStart, lengths - 1), MAX_DIGIT_COUNT_)
+    digits = np.where(np.arange(MAX_DIGIT_COUNT_) < digitCounts[:, None],
+                      digits, 0)
+    # Sum up the place values in units of the finest precision.
+    latVals = np.zeros(codes.size, dtype=np.int64)
+    lngVals = np.zeros(codes.size, dtype=np.int64)
+    for i in range(0, PAIR_CODE_LENGTH_, 2):
+        pv = ENCODING_BASE_**((PAIR_CODE_LENGTH_ - 2 - i) // 2)
+        latVals += digits[:, i] * (pv * GRID_ROWS_**GRID_CODE_LENGTH_)
+        lngVals += digits[:, i + 1] * (pv * GRID_COLUMNS_**GRID_CODE_LENGTH_)
+    for i in range(PAIR_CODE_LENGTH_, MAX_DIGIT_COUNT_):
+        latVals += (digits[:, i] // GRID_COLUMNS_) * GRID_ROWS_**(
+            MAX_DIGIT_COUNT_ - 1 - i)
+        lngVals += (digits[:, i] % GRID_COLUMNS_) * GRID_COLUMNS_**(
+            MAX_DIGIT_COUNT_ - 1 - i)
+    # The size of the areas, also in units of the finest precision.
+    pairPrecision = ENCODING_BASE_**np.maximum(
+        (PAIR_CODE_LENGTH_ - digitCounts) // 2, 0)
+    gridDigits = np.maximum(MAX_DIGIT_COUNT_ - digitCounts, 0)
+    latPrecisions = np.where(
+        digitCounts <= PAIR_CODE_LENGTH_,
+        pairPrecision * GRID_ROWS_**GRID_CODE_LENGTH_,
+        GRID_ROWS_**np.minimum(gridDigits, GRID_CODE_LENGTH_))
+    lngPrecisions = np.where(
+        digitCounts <= PAIR_CODE_LENGTH_,
+        pairPrecision * GRID_COLUMNS_**GRID_CODE_LENGTH_,
+        GRID_COLUMNS_**np.minimum(gridDigits, GRID_CODE_LENGTH_))
+    latVals -= LATITUDE_MAX_ * FINAL_LAT_PRECISION_
+    lngVals -= LONGITUDE_MAX_ * FINAL_LNG_PRECISION_
+    latitudeLo = latVals / FINAL_LAT_PRECISION_
+    longitudeLo = lngVals / FINAL_LNG_PRECISION_
+    latitudeHi = (latVals + latPrecisions) / FINAL_LAT_PRECISION_
+    longitudeHi = (lngVals + lngPrecisions) / FINAL_LNG_PRECISION_
+    columns = {
+        'latitudeLo': latitudeLo,
+        'longitudeLo': longitudeLo,
+        'latitudeHi': latitudeHi,
+        'longitudeHi': longitudeHi,
+        'latitudeCenter': np.minimum(
+            latitudeLo + (latitudeHi - latitudeLo) / 2, LATITUDE_MAX_),
+        'longitudeCenter': np.minimum(
+            longitudeLo + (longitudeHi - longitudeLo) / 2, LONGITUDE_MAX_),
+        'codeLength': digitCounts
+    }
+    return dict((key, value.reshape(shape)) for key, value in columns.items())
+
+
+class ClassifiedCode(object):
+    """
+     Result of classifying a character sequence with classify.
+     Attributes:
+       code: The classified character sequence, unchanged.
+       valid: Whether the code is valid (see isValid).
+       short: Whether the code is a valid short code (see isShort).
+       full: Whether the code is a valid full code (see isFull).
+       separatorPosition: The position of the first separator, or -1.
+       paddingPosition: The position of the first padding character, or -1.
+    """
+
+    def __init__(self, code, valid, short, full, separatorPosition,
+                 paddingPosition):
+        self.code = code
+        self.valid = valid
+        self.short = short
+        self.full = full
+        self.separatorPosition = separatorPosition
+        self.paddingPosition = paddingPosition
+
+    def __repr__(self):
+        return str([
+            self.code, self.valid, self.short, self.full,
+            self.separatorPosition, self.paddingPosition
+        ])
+
+
 class CodeArea(object):
     """
      Coordinates of a decoded Open Location Code.
@@ -557,6 +1044,9 @@ class CodeArea(object):
            This excludes the separator.
     """
 
+    __slots__ = ('latitudeLo', 'longitudeLo', 'latitudeHi', 'longitudeHi',
+                 'codeLength', 'latitudeCenter', 'longitudeCenter')
+
     def __init__(self, latitudeLo, longitudeLo, latitudeHi, longitudeHi,
                  codeLength):
         self.latitudeLo = latitudeLo
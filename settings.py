@@ -15,6 +15,8 @@ CODE_REGIONAL_OUT = True
 
 # optional
 
+# pretty-print JSONified output (compact if not)?
+DEFAULT_PRETTY = True
 # how to deal with Cross-Origin Resource Sharing?
 ACCESS_CONTROL_ALLOW_ORIGIN = '*'
 # base URL of OpenStreeMap based search engine Nominatim in forward geocoder mode (returning municipality centroids on querying municipality names)
@@ -30,6 +32,38 @@ MUNICIPALITY_PROXY = {
 CUSTOM_REQUEST_HEADERS = {
   'User-Agent': 'geodienste@rostock.de'
 }
+# maximum number of pooled keep-alive connections to Nominatim (should be at least the number of threads per process)
+MUNICIPALITY_POOL_SIZE = 10
+# number of retries of failed requests to Nominatim (on connection errors only, not on timeouts or HTTP error status codes)
+MUNICIPALITY_RETRIES = 0
+# file of the persistent cache (an SQLite database) for the results of Nominatim, shared by all threads and processes
+# remove or comment out if not necessary!
+# put it into a folder owned by the application (not into /tmp, where other users could tamper with it and which systemd's PrivateTmp empties on every restart)
+# and make sure the user running the application has write access to this file and its folder (SQLite creates temporary files next to it)
+#MUNICIPALITY_CACHE_FILE = '/var/lib/olca/municipality_cache.sqlite'
+# time to live of the results in the cache (in seconds)
+MUNICIPALITY_CACHE_TTL = 2592000
+# time to live of the information that no municipality was found for a municipality name in the cache (in seconds)
+MUNICIPALITY_CACHE_NEGATIVE_TTL = 86400
+# maximum number of results in the cache (per Nominatim mode)
+MUNICIPALITY_CACHE_SIZE = 100000
+# level of the parent Plus codes the results of Nominatim in reverse geocoder mode are cached for (1 to 5)
+MUNICIPALITY_REVERSE_CACHE_LEVEL = 4
+# file of municipality boundaries (a GeoJSON or GeoPackage file with polygons or multipolygons) for looking up municipality names and centroids without Nominatim (which is used only for pairs of coordinates outside of all municipalities and for municipality names not matching any municipality then)
+# remove or comment out if not necessary!
+#MUNICIPALITY_GAZETTEER_FILE = '/path/to/municipalities.gpkg'
+# field of the file of municipality boundaries containing the municipality names
+MUNICIPALITY_GAZETTEER_NAME_FIELD = 'name'
+# layer of the file of municipality boundaries (GeoPackage only)
+# remove or comment out if not necessary (the first layer is used then)!
+#MUNICIPALITY_GAZETTEER_LAYER = 'municipalities'
+# minimum score (between 0 and 1) a municipality name must match with for a regional Plus code to be accepted:
+# results of Nominatim and exact matches score 1, while prefix and fuzzy matches (via the file of municipality boundaries only) score the share of the municipality name typed and the similarity of the names respectively
+MUNICIPALITY_NAME_MIN_SCORE = 0.5
+# maximum number of responses to keep in the response cache (per process)
+RESPONSE_CACHE_SIZE = 10000
+# time clients, proxies and the response cache may cache responses for (in seconds), limiting how long municipality names in regional Plus codes may be outdated
+RESPONSE_CACHE_MAX_AGE = 3600
 
 
 # application (route /map, i.e. the map-like entry point)
@@ -37,29 +71,95 @@ CUSTOM_REQUEST_HEADERS = {
 # required
 
 # possible operation modes the map-like entry point can run in
-MAP_MODES = ['labels'] # currently: 'labels'
+MAP_MODES = ['labels', 'cells'] # currently: 'labels' and 'cells'
 # default operation mode the map-like entry point runs in
 DEFAULT_MAP_MODE = 'labels'
 # default EPSG code for provided bbox (default EPSG code of OLC: 4326)
 DEFAULT_MAP_EPSG_IN = 4326
 # default EPSG code for all returned pairs of coordinates
 DEFAULT_MAP_EPSG_OUT = 4326
-# pretty-print JSONified output?
+# pretty-print JSONified output (compact if not)?
 DEFAULT_MAP_PRETTY = False
 
+# optional
+
+# possible output formats the map-like entry point can return
+MAP_FORMATS = ['geojson', 'ndjson', 'topojson', 'mvt'] # currently: 'geojson' (a GeoJSON FeatureCollection), 'ndjson' (newline-delimited GeoJSON features, always streamed), 'topojson' (a TopoJSON topology with each edge of the grid stored only once, never streamed) and 'mvt' (a Mapbox Vector Tile with the provided bbox as its extent, never streamed)
+# default output format the map-like entry point returns
+DEFAULT_MAP_FORMAT = 'geojson'
+# stream output chunk by chunk (so that clients can start rendering before all features are produced)?
+DEFAULT_MAP_STREAM = False
+# number of features produced (and streamed) per chunk
+MAP_CHUNK_SIZE = 1000
+# target number of features (i.e. cells of the grid) per response, counted exactly before any of them is produced: the highest OLC level keeping within it is taken (OLC level 1 if none does)
+MAP_TARGET_FEATURES = 400
+# maximum number of features per response (should be well above the target number of features): requests exceeding it even on OLC level 1 are rejected
+MAP_MAX_FEATURES = 10000
+# extent of Mapbox Vector Tiles (i.e. their width and height in pixel coordinates)
+MVT_EXTENT = 4096
+
+
+# application (route /tiles, i.e. the tile entry point)
+
+# optional
+
+# possible output formats the tile entry point can return
+TILE_FORMATS = ['geojson', 'mvt'] # currently: 'geojson' (a GeoJSON FeatureCollection) and 'mvt' (a Mapbox Vector Tile)
+# default output format the tile entry point returns
+DEFAULT_TILE_FORMAT = 'geojson'
+# minimum zoom level per OLC level of the grid the tile entry point returns (operation modes as configured for the map-like entry point)
+TILE_LEVELS = { 1: 0, 2: 5, 3: 9, 4: 14, 5: 18 }
+# maximum zoom level
+TILE_MAX_ZOOM = 22
+# maximum number of generated tiles to keep in the cache (per process)
+TILE_CACHE_SIZE = 10000
+# time clients and proxies may cache tiles for (in seconds)
+TILE_MAX_AGE = 86400
+
+
+# application (route /batch, i.e. the batch entry point)
+
+# optional
+
+# maximum number of queries per request
+BATCH_MAX_QUERIES = 10000
+# maximum number of lookups querying Nominatim (i.e. those neither answered by the file of municipality boundaries nor by the cache) per request:
+# regional Plus codes beyond are rejected, and regional Plus codes to be returned beyond are 'not definable'
+BATCH_MAX_UPSTREAM_LOOKUPS = 10
+
+
+# application (route /metrics, i.e. the metrics entry point)
+
+# optional
+
+# provide the durations of requests and of their stages, requests to Nominatim, cache lookups and grid cells (aggregated per process) in Prometheus text-based exposition format via the metrics entry point?
+METRICS = True
+# add the durations of the stages of each request to its response as a Server-Timing header (all entry points)?
+SERVER_TIMING = True
+
+
+# application (coordinate transformations, i.e. all entry points)
+
+# optional
+
+# maximum number of coordinate transformations (i.e. pairs of EPSG codes) to keep prepared per thread
+TRANSFORMER_CACHE_SIZE = 16
+# prepare the coordinate transformations from and to the default EPSG codes and the EPSG codes listed below at startup?
+TRANSFORMER_PREWARM = True
+# EPSG codes (in addition to the default ones) to prepare the coordinate transformations from and to at startup
+TRANSFORMER_PREWARM_EPSG_CODES = [25833]
+
 
 # Flask
 
 # optional
 
-# convert JSONified strings to ASCII?
+# convert JSONified strings to ASCII? (JSON is serialised via the optional orjson module, if installed, only if not)
 JSON_AS_ASCII = False
 # sort all keys in JSONified output (alphabetically)?
 JSON_SORT_KEYS = True
 # default MIME type of JSONified output
 JSONIFY_MIMETYPE = 'application/json; charset=utf-8'
-# pretty-print JSONified output?
-JSONIFY_PRETTYPRINT_REGULAR = True
 # redirection URLs for HTTP error codes
 REDIRECT_URL_403 = 'https://geo.sv.rostock.de/403.html'
 REDIRECT_URL_404 = 'https://geo.sv.rostock.de/404.html'
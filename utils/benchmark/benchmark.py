@@ -0,0 +1,132 @@
+import random
+import re
+import sys
+import timeit
+sys.path.append('../../')
+import openlocationcode as olc
+
+
+
+# settings: required
+
+# number of random locations (and corresponding codes) to benchmark with
+NUM_LOCATIONS = 10000
+# number of repetitions of each benchmark (the best one is reported)
+REPEAT = 15
+
+
+
+# settings: optional
+
+# seed for the random locations, so that results are reproducible
+SEED = 42
+# code lengths to benchmark
+CODE_LENGTHS = (2, 4, 6, 8, 10, 11, 15)
+
+
+
+# functions
+
+# reference implementation: encodes a location, as two integer values, by prepending one character at a time
+def legacy_encode_integers(lat_val, lng_val, code_length):
+
+  code_length = min(code_length, olc.MAX_DIGIT_COUNT_)
+  code = ''
+  if code_length > olc.PAIR_CODE_LENGTH_:
+    for i in range(0, olc.MAX_DIGIT_COUNT_ - olc.PAIR_CODE_LENGTH_):
+      lat_digit = lat_val % olc.GRID_ROWS_
+      lng_digit = lng_val % olc.GRID_COLUMNS_
+      code = olc.CODE_ALPHABET_[lat_digit * olc.GRID_COLUMNS_ + lng_digit] + code
+      lat_val //= olc.GRID_ROWS_
+      lng_val //= olc.GRID_COLUMNS_
+  else:
+    lat_val //= pow(olc.GRID_ROWS_, olc.GRID_CODE_LENGTH_)
+    lng_val //= pow(olc.GRID_COLUMNS_, olc.GRID_CODE_LENGTH_)
+  for i in range(0, olc.PAIR_CODE_LENGTH_ // 2):
+    code = olc.CODE_ALPHABET_[lng_val % olc.ENCODING_BASE_] + code
+    code = olc.CODE_ALPHABET_[lat_val % olc.ENCODING_BASE_] + code
+    lat_val //= olc.ENCODING_BASE_
+    lng_val //= olc.ENCODING_BASE_
+  code = code[:olc.SEPARATOR_POSITION_] + olc.SEPARATOR_ + code[olc.SEPARATOR_POSITION_:]
+  if code_length >= olc.SEPARATOR_POSITION_:
+    return code[0:code_length + 1]
+  return code[0:code_length] + ''.zfill(olc.SEPARATOR_POSITION_ - code_length) + olc.SEPARATOR_
+
+
+# reference implementation: decodes a full code by stripping it via a regular expression and searching the alphabet for every digit
+def legacy_decode(code):
+
+  if not olc.isFull(code):
+    raise ValueError('Passed Open Location Code is not a valid full code - ' + str(code))
+  code = re.sub('[+0]', '', code)
+  code = code.upper()
+  code = code[:olc.MAX_DIGIT_COUNT_]
+  normal_lat = -olc.LATITUDE_MAX_ * olc.PAIR_PRECISION_
+  normal_lng = -olc.LONGITUDE_MAX_ * olc.PAIR_PRECISION_
+  grid_lat, grid_lng = 0, 0
+  digits = min(len(code), olc.PAIR_CODE_LENGTH_)
+  pv = olc.PAIR_FIRST_PLACE_VALUE_
+  for i in range(0, digits, 2):
+    normal_lat += olc.CODE_ALPHABET_.find(code[i]) * pv
+    normal_lng += olc.CODE_ALPHABET_.find(code[i + 1]) * pv
+    if i < digits - 2:
+      pv //= olc.ENCODING_BASE_
+  lat_precision = float(pv) / olc.PAIR_PRECISION_
+  lng_precision = float(pv) / olc.PAIR_PRECISION_
+  if len(code) > olc.PAIR_CODE_LENGTH_:
+    rowpv, colpv = olc.GRID_LAT_FIRST_PLACE_VALUE_, olc.GRID_LNG_FIRST_PLACE_VALUE_
+    digits = min(len(code), olc.MAX_DIGIT_COUNT_)
+    for i in range(olc.PAIR_CODE_LENGTH_, digits):
+      digit_val = olc.CODE_ALPHABET_.find(code[i])
+      grid_lat += (digit_val // olc.GRID_COLUMNS_) * rowpv
+      grid_lng += (digit_val % olc.GRID_COLUMNS_) * colpv
+      if i < digits - 1:
+        rowpv //= olc.GRID_ROWS_
+        colpv //= olc.GRID_COLUMNS_
+    lat_precision = float(rowpv) / olc.FINAL_LAT_PRECISION_
+    lng_precision = float(colpv) / olc.FINAL_LNG_PRECISION_
+  lat = float(normal_lat) / olc.PAIR_PRECISION_ + float(grid_lat) / olc.FINAL_LAT_PRECISION_
+  lng = float(normal_lng) / olc.PAIR_PRECISION_ + float(grid_lng) / olc.FINAL_LNG_PRECISION_
+  return olc.CodeArea(round(lat, 14), round(lng, 14), round(lat + lat_precision, 14), round(lng + lng_precision, 14), min(len(code), olc.MAX_DIGIT_COUNT_))
+
+
+# returns the attributes of a decoded code area, to compare the results of both implementations
+def area_attributes(area):
+
+  return (area.latitudeLo, area.longitudeLo, area.latitudeHi, area.longitudeHi, area.codeLength)
+
+
+# runs a function on all items and returns the best time per item in microseconds
+def timer(function, items):
+
+  best = min(timeit.repeat(lambda: [function(*item) for item in items], number = 1, repeat = REPEAT))
+  return best / len(items) * 1e6
+
+
+# prints a result line comparing a reference and a candidate timing
+def reporter(name, reference, candidate):
+
+  print(name.ljust(32) + str(round(reference, 3)).rjust(10) + ' µs' + str(round(candidate, 3)).rjust(10) + ' µs' + (str(round(reference / candidate, 2)) + 'x').rjust(10))
+
+
+
+# core
+
+random.seed(SEED)
+locations = [(random.uniform(-90, 90), random.uniform(-180, 180)) for i in range(NUM_LOCATIONS)]
+integers = [olc.locationToIntegers(latitude, longitude) for latitude, longitude in locations]
+
+print('benchmark'.ljust(32) + 'reference'.rjust(13) + 'olc'.rjust(13) + 'speedup'.rjust(10))
+
+for code_length in CODE_LENGTHS:
+  items = [(lat_val, lng_val, code_length) for lat_val, lng_val in integers]
+  # make sure both implementations agree before timing them
+  if any(legacy_encode_integers(*item) != olc.encodeIntegers(*item) for item in items):
+    sys.exit('encodeIntegers differs from reference implementation at code length ' + str(code_length))
+  reporter('encodeIntegers (length ' + str(code_length) + ')', timer(legacy_encode_integers, items), timer(olc.encodeIntegers, items))
+
+for code_length in CODE_LENGTHS:
+  codes = [(olc.encode(latitude, longitude, code_length),) for latitude, longitude in locations]
+  if any(area_attributes(legacy_decode(*code)) != area_attributes(olc.decode(*code)) for code in codes):
+    sys.exit('decode differs from reference implementation at code length ' + str(code_length))
+  reporter('decode (length ' + str(code_length) + ')', timer(legacy_decode, codes), timer(olc.decode, codes))
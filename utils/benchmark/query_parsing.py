@@ -0,0 +1,156 @@
+import re
+import sys
+import timeit
+from urllib.parse import quote_plus, unquote
+sys.path.append('../../')
+import olca
+import openlocationcode as olc
+
+
+
+# settings: required
+
+# number of passes over the corpus per benchmark run
+NUMBER = 100
+# number of repetitions of each benchmark (the best one is reported)
+REPEAT = 5
+
+
+
+# settings: optional
+
+# corpus of real-world query strings (as typed into search fields: coordinates, full codes, short codes and regional codes with municipality names, in all kinds of spellings)
+CORPUS = (
+  '54.0924,12.1405',
+  '54.0924, 12.1405',
+  '54.0924 12.1405',
+  '12.1405,54.0924',
+  '313401.2,6001245.8',
+  '313401.2 6001245.8',
+  '-33.8568 151.2153',
+  '9F6J3V2R+XQ',
+  '9f6j3v2r+xq',
+  '9F6J3V2R+XQ2',
+  '9F6J3V2R+XQ2V',
+  '9F6J3V2R XQ',
+  '9F6J3V2R xq2',
+  '9F6J0000+',
+  '9F6J3V00+',
+  '9F6J3V2R',
+  '9F6J3V2R+',
+  '3V2R+XQ',
+  '3v2r+xq',
+  '2R+XQ',
+  '3V2R XQ',
+  '3V2R+XQ Rostock',
+  '3V2R+XQ, Rostock',
+  '3V2R+XQ,Rostock',
+  '3V2R XQ Rostock',
+  '3v2r xq rostock',
+  '3V2R+XQ2 Rostock',
+  '3V2R XQ2 Rostock',
+  'Rostock 3V2R+XQ',
+  'Rostock, 3V2R+XQ',
+  'Rostock 3V2R XQ',
+  'Rostock,3V2R XQ2',
+  '3V2R+XQ Bad Doberan',
+  'Bad Doberan 3V2R+XQ',
+  '3V2R+XQ Rostock, Germany',
+  'Rostock',
+  'Kröpeliner Straße 42',
+  '',
+  ',',
+  '9F6J+3V2R'
+)
+
+
+
+# functions
+
+# reference implementation: normalises a query via a series of regular expression substitutions
+def legacy_normalizer(query):
+
+  query = query.replace(' ', ',')
+  query = unquote(quote_plus(query.encode('utf-8')))
+  query = str.upper(query)
+  query = re.sub(r',+', ',', query)
+  query = re.sub(r',([23456789CFGHJMPQRVWX]{2})$', r'+\1', query)
+  query = re.sub(r',([23456789CFGHJMPQRVWX]{2,3}),', r'+\1,', query)
+  query = re.sub(r',$', r'+', query)
+  query = re.sub(r'\+([23456789CFGHJMPQRVWX]{2})[23456789CFGHJMPQRVWX],', r'+\1,', query)
+  return query
+
+
+# reference implementation: splits a normalised query into its type and its parts, then classifies a code as olc_handler did afterwards
+def legacy_parser(query):
+
+  query = legacy_normalizer(query)
+  if ',' in query:
+    if olca.app.config['CODE_REGIONAL_IN'] and '+' in query:
+      query = query.split(',')
+      if '+' in query[0] and len(query[0]) in (7, 8):
+        return ('regional', query[0], ' '.join(query[1:]))
+      elif '+' in query[len(query) - 1] and len(query[len(query) - 1]) in (7, 8):
+        return ('regional', query[len(query) - 1], ' '.join(query[:len(query) - 1]))
+      return ('error', olca.DEFAULT_ERROR_REGIONAL_MESSAGE_)
+    query = query.split(',')
+    try:
+      return ('coordinates', float(query[0]), float(query[1]))
+    except (ValueError, IndexError):
+      return ('error', olca.DEFAULT_ERROR_MESSAGE_)
+  if olc.isFull(query):
+    return ('full', query)
+  elif olc.isShort(query):
+    return ('short', query)
+  return ('error', olca.DEFAULT_ERROR_MESSAGE_)
+
+
+# single-pass tokeniser of olca, with its result converted to the form of the reference implementation
+def tokenizer_parser(query):
+
+  try:
+    query = olca.query_tokenizer(query)
+  except ValueError as e:
+    return ('error', str(e))
+  if query.type == 'regional':
+    return ('regional', query.code, query.municipality_name)
+  elif query.type == 'coordinates':
+    return ('coordinates', query.x, query.y)
+  return (query.type, query.code)
+
+
+# runs a parser over the whole corpus and returns the best time per query in microseconds
+def timer(parser, corpus):
+
+  def run():
+    for query in corpus:
+      parser(query)
+  return min(timeit.repeat(run, number = NUMBER, repeat = REPEAT)) / NUMBER / len(corpus) * 1e6
+
+
+# prints a result line comparing the timings of both parsers
+def reporter(name, size, reference, candidate):
+
+  print(name.ljust(32) + str(size).rjust(10) + str(round(reference, 2)).rjust(10) + ' µs' + str(round(candidate, 2)).rjust(10) + ' µs' + (str(round(reference / candidate, 2)) + 'x').rjust(10))
+
+
+
+# core
+
+print('benchmark'.ljust(32) + 'queries'.rjust(10) + 'legacy'.rjust(13) + 'olca'.rjust(13) + 'speedup'.rjust(10))
+
+with olca.app.app_context():
+  for regional_in in (True, False):
+    olca.app.config['CODE_REGIONAL_IN'] = regional_in
+    # make sure both parsers agree on every query before timing them
+    for query in CORPUS:
+      if legacy_parser(query) != tokenizer_parser(query):
+        sys.exit('parsers disagree on query ' + repr(query))
+    name = 'regional codes ' + ('on' if regional_in else 'off')
+    reporter(name + ' (whole corpus)', len(CORPUS), timer(legacy_parser, CORPUS), timer(tokenizer_parser, CORPUS))
+    # per query type (as classified by olca)
+    types = {}
+    for query in CORPUS:
+      types.setdefault(tokenizer_parser(query)[0], []).append(query)
+    for query_type, corpus in sorted(types.items()):
+      reporter(name + ' (' + query_type + ')', len(corpus), timer(legacy_parser, corpus), timer(tokenizer_parser, corpus))
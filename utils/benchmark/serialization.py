@@ -0,0 +1,70 @@
+import json
+import sys
+import timeit
+sys.path.append('../../')
+import olca
+
+
+
+# settings: required
+
+# (approximate) numbers of features of the FeatureCollections to benchmark with (square grids of OLC level 5)
+SIZES = (1000, 10000, 100000)
+# number of repetitions of each benchmark (the best one is reported)
+REPEAT = 5
+
+
+
+# settings: optional
+
+# operation modes of the map-like entry point to benchmark
+MODES = ('labels', 'cells')
+# southwest corner (longitude, latitude) of the grids
+ORIGIN = (12.0, 54.0)
+
+
+
+# functions
+
+# reference implementation: serialises like jsonify did with the former settings (sorted keys, pretty-printed)
+def legacy_serializer(data):
+
+  return json.dumps(data, ensure_ascii = False, sort_keys = True, indent = 2).encode('utf-8')
+
+
+# standard library counterpart of olca.json_serializer (compact)
+def stdlib_serializer(data):
+
+  return json.dumps(data, ensure_ascii = False, sort_keys = True, separators = (',', ':')).encode('utf-8')
+
+
+# runs a serialiser on a FeatureCollection and returns the best time in milliseconds
+def timer(serializer, data):
+
+  return min(timeit.repeat(lambda: serializer(data), number = 1, repeat = REPEAT)) * 1e3
+
+
+# prints a result line comparing the timings of all serialisers
+def reporter(name, size, reference, stdlib, candidate):
+
+  print(name.ljust(32) + str(size).rjust(10) + str(round(reference, 2)).rjust(10) + ' ms' + str(round(stdlib, 2)).rjust(10) + ' ms' + str(round(candidate, 2)).rjust(10) + ' ms' + (str(round(reference / candidate, 2)) + 'x').rjust(10))
+
+
+
+# core
+
+print('orjson: ' + ('available' if olca.orjson is not None else 'not available (standard library fallback only)'))
+print('benchmark'.ljust(32) + 'features'.rjust(10) + 'legacy'.rjust(13) + 'stdlib'.rjust(13) + 'olca'.rjust(13) + 'speedup'.rjust(10))
+
+with olca.app.app_context():
+  for mode in MODES:
+    for size in SIZES:
+      # a square grid of (about) the requested number of cells of OLC level 5, all of them strictly within the bbox
+      side = round(size ** 0.5) * 0.000125 - 0.0000625
+      min_x, min_y = ORIGIN[0] + 0.0000625, ORIGIN[1] + 0.0000625
+      features = list(olca.olc_grid_features_generator(min_x, min_y, min_x + side, min_y + side, 10, 5, None, mode == 'labels'))
+      data = olca.multiple_features_handler(features)
+      # make sure all serialisers agree before timing them
+      if not json.loads(legacy_serializer(data)) == json.loads(stdlib_serializer(data)) == json.loads(olca.json_serializer(data)):
+        sys.exit('serialisers disagree on ' + mode + ' mode')
+      reporter(mode + ' mode', len(features), timer(legacy_serializer, data), timer(stdlib_serializer, data), timer(olca.json_serializer, data))
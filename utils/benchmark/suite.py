@@ -0,0 +1,256 @@
+import io
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+import types
+sys.path.append('../../')
+import olca
+import openlocationcode as olc
+
+
+
+# settings: required
+
+# file to store the results in (as JSON), may also be passed as the first argument
+RESULTS_FILE = '/tmp/olca_benchmark.json'
+# number of repetitions of each benchmark (the best one is reported)
+REPEAT = 5
+
+
+
+# settings: optional
+
+# file with the results of an earlier run (e.g. of another commit) to compare the results with, may also be passed as the second argument
+# set to None if not necessary!
+BASELINE_FILE = None
+# factor by which a benchmark may be slower than in the earlier run before it counts as a regression (making this script exit with status 1)
+REGRESSION_THRESHOLD = 1.1
+# seed for the random locations, so that results are reproducible
+SEED = 42
+# number of random locations (and corresponding codes) to benchmark the OLC core with
+NUM_LOCATIONS = 10000
+# code lengths to benchmark the OLC core with
+CODE_LENGTHS = (2, 4, 6, 8, 10, 11, 12, 13, 14, 15)
+# number of random locations (within Rostock) to benchmark the OLC handler and the main entry point with
+NUM_QUERIES = 1000
+# EPSG code to benchmark reprojection with
+EPSG_CODE = 25833
+# bboxes (southwest longitude, southwest latitude, northeast longitude, northeast latitude) to benchmark the OLC loop handler and the map-like entry point with, one per OLC level (as taken with the default target number of features)
+BBOXES = {
+  1: (-70.0, -40.0, 80.0, 40.0),
+  2: (9.0, 52.0, 15.0, 56.0),
+  3: (12.0, 54.0, 12.5, 54.3),
+  4: (12.09, 54.08, 12.12, 54.1),
+  5: (12.099, 54.088, 12.101, 54.089)
+}
+# operation modes of the map-like entry point to benchmark
+MODES = ('labels', 'cells')
+# extent (southwest longitude, southwest latitude, northeast longitude, northeast latitude) and OLC level of the grid loops of the utils scripts
+GRID_EXTENT = (12.0, 54.0, 12.05, 54.05)
+GRID_LEVEL = 5
+
+
+
+# functions
+
+# stand-in for querying Nominatim via the pooled session, answering instantly with a municipality name (reverse geocoder mode) or a municipality centroid (forward geocoder mode)
+def nominatim_stub(url, timeout = None):
+
+  if 'reverse' in url:
+    data = { 'name': 'Rostock' }
+  else:
+    data = [ { 'type': 'city', 'lon': '12.1316', 'lat': '54.0924' } ]
+  return types.SimpleNamespace(json = lambda: data)
+
+
+# runs a function on all items and returns the best time per item in microseconds
+def timer(function, items):
+
+  best = min(timeit.repeat(lambda: [function(*item) for item in items], number = 1, repeat = REPEAT))
+  return best / len(items) * 1e6
+
+
+# times a benchmark, stores its result and prints a result line
+def benchmark(results, name, function, items):
+
+  value = timer(function, items)
+  results[name] = { 'value': value, 'unit': 'µs', 'items': len(items) }
+  print(name.ljust(56) + str(len(items)).rjust(10) + str(round(value, 3)).rjust(14) + ' µs')
+
+
+# returns the commit of the working copy (or None if it is not a Git repository)
+def commit_getter():
+
+  try:
+    return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd = '../../', stderr = subprocess.DEVNULL).decode('utf-8').strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+# compares the results with the results of an earlier run and returns the names of all regressions
+def comparer(results, baseline):
+
+  regressions = []
+  print()
+  print('comparison'.ljust(56) + 'baseline'.rjust(14) + 'current'.rjust(14) + 'ratio'.rjust(10))
+  for name, result in results.items():
+    if name not in baseline:
+      continue
+    ratio = result['value'] / baseline[name]['value']
+    if ratio > REGRESSION_THRESHOLD:
+      regressions.append(name)
+    print(name.ljust(56) + (str(round(baseline[name]['value'], 3)) + ' µs').rjust(14) + (str(round(result['value'], 3)) + ' µs').rjust(14) + (str(round(ratio, 2)) + 'x').rjust(10) + ('  REGRESSION' if ratio > REGRESSION_THRESHOLD else ''))
+  return regressions
+
+
+# queries the main entry point with an empty response cache
+def uncached_query(query_string):
+
+  with olca.response_cache_lock_:
+    olca.response_cache_.clear()
+  client.get('/', query_string = query_string)
+
+
+# queries the main entry point (with the response cache as is)
+def cached_query(query_string):
+
+  client.get('/', query_string = query_string)
+
+
+# queries the map-like entry point
+def map_query(query_string):
+
+  client.get('/map', query_string = query_string)
+
+
+# the loop of the CSV exporter: one line per cell, written to one file per line of the grid
+def csv_exporter_loop(min_x, min_y, max_x, max_y, code_length):
+
+  num_lines, num_rows = olc.gridDimensions(min_y, min_x, max_y, max_x, code_length)
+  counter = 0
+  for code, lat_lo, lng_lo, lat_hi, lng_hi in olc.gridCells(min_y, min_x, max_y, max_x, code_length):
+    if counter % num_rows == 0:
+      temp_file = io.StringIO()
+      temp_file.write('code;bbox\n')
+    temp_file.write(code + ';' + str(lng_lo) + ',' + str(lat_lo) + ',' + str(lng_hi) + ',' + str(lat_hi) + '\n')
+    counter += 1
+    if counter % num_rows != 0:
+      continue
+    temp_file.close()
+
+
+# the loop of the PostGIS importer: one row of parameters per cell, committed per line of the grid (without a database, the rows are collected only)
+def postgis_importer_loop(min_x, min_y, max_x, max_y, code_length):
+
+  num_lines, num_rows = olc.gridDimensions(min_y, min_x, max_y, max_x, code_length)
+  counter = 0
+  for code, lat_lo, lng_lo, lat_hi, lng_hi in olc.gridCells(min_y, min_x, max_y, max_x, code_length):
+    if counter % num_rows == 0:
+      rows = []
+    rows.append((code, str(lng_lo), str(lat_lo), str(lng_hi), str(lat_hi)))
+    counter += 1
+    if counter % num_rows != 0:
+      continue
+    rows.clear()
+
+
+
+# core
+
+if len(sys.argv) > 1:
+  RESULTS_FILE = sys.argv[1]
+if len(sys.argv) > 2:
+  BASELINE_FILE = sys.argv[2]
+
+# replace Nominatim by the stand-in, and neither use the persistent cache nor the gazetteer, so that only OLCA itself is benchmarked
+olca.municipality_session_.get = nominatim_stub
+olca.app.config.pop('MUNICIPALITY_CACHE_FILE', None)
+olca.municipality_gazetteer_, olca.municipality_names_ = None, None
+olca.app.config['CODE_REGIONAL_IN'] = True
+olca.app.config['CODE_REGIONAL_OUT'] = True
+olca.app.config['SERVER_TIMING'] = False
+
+random.seed(SEED)
+locations = [(random.uniform(-90, 90), random.uniform(-180, 180)) for i in range(NUM_LOCATIONS)]
+queries = [(random.uniform(12.0, 12.2), random.uniform(54.05, 54.2)) for i in range(NUM_QUERIES)]
+olc_epsg = olca.OLC_EPSG_
+transformer = olca.transformer_getter(olc_epsg, EPSG_CODE)
+projected_queries = [tuple(transformer.transform(x, y)) for x, y in queries]
+results = {}
+
+print('benchmark'.ljust(56) + 'items'.rjust(10) + 'per item'.rjust(17))
+
+# OLC core
+for code_length in CODE_LENGTHS:
+  items = [(latitude, longitude, code_length) for latitude, longitude in locations]
+  benchmark(results, 'olc.encode (length ' + str(code_length) + ')', olc.encode, items)
+  codes = [(olc.encode(*item),) for item in items]
+  benchmark(results, 'olc.decode (length ' + str(code_length) + ')', olc.decode, codes)
+  # only codes without padding can be shortened (and recovered then)
+  if code_length >= olc.PAIR_CODE_LENGTH_ - 2:
+    # reference locations close to the codes, so that they are actually shortened
+    items = [(code, olc.decode(code).latitudeCenter + 0.001, olc.decode(code).longitudeCenter + 0.001) for code, in codes]
+    benchmark(results, 'olc.shorten (length ' + str(code_length) + ')', olc.shorten, items)
+    items = [(olc.shorten(*item), item[1], item[2]) for item in items]
+    benchmark(results, 'olc.recoverNearest (length ' + str(code_length) + ')', olc.recoverNearest, items)
+
+# OLC handler, without and with reprojection (of the queried pair of coordinates and of all returned pairs of coordinates)
+coordinates_queries = [(olca.Query('coordinates', x, y, None, None), olc_epsg, olc_epsg) for x, y in queries]
+benchmark(results, 'olc_handler (coordinates)', olca.olc_handler, coordinates_queries)
+benchmark(results, 'olc_handler (coordinates, reprojected)', olca.olc_handler, [(olca.Query('coordinates', x, y, None, None), EPSG_CODE, EPSG_CODE) for x, y in projected_queries])
+code_queries = [(olca.Query('full', None, None, olc.encode(y, x), None), olc_epsg, olc_epsg) for x, y in queries]
+benchmark(results, 'olc_handler (full code)', olca.olc_handler, code_queries)
+benchmark(results, 'olc_handler (full code, reprojected)', olca.olc_handler, [(query, olc_epsg, EPSG_CODE) for query, _, _ in code_queries])
+regional_queries = [(olca.Query('regional', None, None, olc.encode(y, x)[4:], 'Rostock'), olc_epsg, olc_epsg) for x, y in queries]
+benchmark(results, 'olc_handler (regional code)', olca.olc_handler, regional_queries)
+
+# OLC loop handler, for bboxes at each level, with all returned pairs of coordinates in the EPSG code of OLC and reprojected
+for level, bbox in sorted(BBOXES.items()):
+  for mode in MODES:
+    benchmark(results, 'olc_loop_handler (level ' + str(level) + ', ' + mode + ')', olca.olc_loop_handler, [bbox + (olc_epsg, olc_epsg, mode)])
+    benchmark(results, 'olc_loop_handler (level ' + str(level) + ', ' + mode + ', reprojected)', olca.olc_loop_handler, [bbox + (olc_epsg, EPSG_CODE, mode)])
+
+# main and map-like entry points, through the Flask test client
+client = olca.app.test_client()
+query_strings = [({ 'query': str(x) + ',' + str(y) },) for x, y in queries]
+benchmark(results, '/ (coordinates)', uncached_query, query_strings)
+benchmark(results, '/ (coordinates, reprojected)', uncached_query, [({ 'query': str(x) + ',' + str(y), 'epsg_in': EPSG_CODE, 'epsg_out': EPSG_CODE },) for x, y in projected_queries])
+benchmark(results, '/ (full code)', uncached_query, [({ 'query': query.code },) for query, _, _ in code_queries])
+benchmark(results, '/ (regional code)', uncached_query, [({ 'query': query.code + ' ' + query.municipality_name },) for query, _, _ in regional_queries])
+for query_string in query_strings:
+  cached_query(*query_string)
+benchmark(results, '/ (coordinates, cached)', cached_query, query_strings)
+for level, bbox in sorted(BBOXES.items()):
+  for mode in MODES:
+    benchmark(results, '/map (level ' + str(level) + ', ' + mode + ')', map_query, [({ 'bbox': ','.join(str(value) for value in bbox), 'mode': mode },)])
+    benchmark(results, '/map (level ' + str(level) + ', ' + mode + ', reprojected)', map_query, [({ 'bbox': ','.join(str(value) for value in bbox), 'mode': mode, 'epsg_out': EPSG_CODE },)])
+
+# grid loops of the utils scripts
+benchmark(results, 'csv_exporter loop (level ' + str(GRID_LEVEL) + ')', csv_exporter_loop, [GRID_EXTENT + (GRID_LEVEL * 2,)])
+benchmark(results, 'postgis_importer loop (level ' + str(GRID_LEVEL) + ')', postgis_importer_loop, [GRID_EXTENT + (GRID_LEVEL * 2,)])
+
+# store the results (with everything needed to tell runs apart)
+with open(RESULTS_FILE, 'w', encoding = 'utf-8') as results_file:
+  json.dump({
+    'commit': commit_getter(),
+    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+    'orjson': olca.orjson is not None,
+    'repeat': REPEAT,
+    'results': results
+  }, results_file, ensure_ascii = False, indent = 2)
+print()
+print('results stored in ' + RESULTS_FILE)
+
+# compare the results with the results of an earlier run if provided
+if BASELINE_FILE is not None:
+  with open(BASELINE_FILE, encoding = 'utf-8') as baseline_file:
+    baseline = json.load(baseline_file)
+  regressions = comparer(results, baseline['results'])
+  if regressions:
+    sys.exit(str(len(regressions)) + ' regression(s) compared to commit ' + str(baseline.get('commit')))
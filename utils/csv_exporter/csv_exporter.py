@@ -66,19 +66,11 @@ else:
     level = 2
   else:
     level = 1
-# calculate the OLC level resolution value
-level_resolution = olc.PAIR_RESOLUTIONS_[level - 1]
 # calculate the OLC code length
 code_length = level * 2
-# calculate the precision of level resolution
-level_resolution_precision = len(str(level_resolution - int(level_resolution))[2:])
-# calculate the buffer in degrees to prevent multiple encodings
-buffer = 10**-level_resolution_precision if level_resolution_precision > 1 else 1
-# calculate the number of lines (of encodings)
-num_lines = int(math.ceil((round(round(MAX_Y, level_resolution_precision) - round(MIN_Y, level_resolution_precision), level_resolution_precision)) / level_resolution))
-# calculate the number of rows (of encodings)
-num_rows = int(math.ceil((round(round(MAX_X, level_resolution_precision) - round(MIN_X, level_resolution_precision), level_resolution_precision)) / level_resolution))
-# calculate the number of bboxes (hopefully) to be created
+# calculate the number of lines and rows (of encodings)
+num_lines, num_rows = olc.gridDimensions(MIN_Y, MIN_X, MAX_Y, MAX_X, code_length)
+# calculate the number of bboxes to be created
 num_bboxes = num_lines * num_rows
 # get the number of digits in the number of lines (just to get nicer filenames later on...)
 num_digits_in_num_lines = len(str(num_lines))
@@ -90,31 +82,27 @@ if not os.path.exists(TARGET_FOLDER):
 # initial counter (needed for progress information output)
 counter = 0
 
-# loop through all lines
-for line in range(num_lines):
-  # calculate current y
-  y = MIN_Y + (level_resolution * line) + buffer
-  # create a new file in target folder and open it for write access
-  file_name = FILE_NAME_PREFIX + str(line).rjust(num_digits_in_num_lines, '0') + FILE_NAME_SUFFIX
-  temp_file = open(TARGET_FOLDER + '/' + file_name, 'w')
-  # write header with column names to file
-  temp_file.write('code;bbox\n')
-  # loop through all rows
-  for row in range(num_rows):
-    # calculate current x
-    x = MIN_X + (level_resolution * row) + buffer
-    # encode
-    code = olc.encode(y, x, code_length)
-    # decode again to calculate the center pair of coordinates
-    coord = olc.decode(code)
-    # create new line for file
-    csv = code + ';' + str(coord.longitudeLo) + ',' + str(coord.latitudeLo) + ',' + str(coord.longitudeHi) + ',' + str(coord.latitudeHi)
-    # write new line to file
-    temp_file.write(csv + '\n')
-    # update counter (needed for progress information output)
-    counter += 1
+# loop through all bboxes (line by line, row by row)
+for code, lat_lo, lng_lo, lat_hi, lng_hi in olc.gridCells(MIN_Y, MIN_X, MAX_Y, MAX_X, code_length):
+  # at the start of each line…
+  if counter % num_rows == 0:
+    line = counter // num_rows
+    # create a new file in target folder and open it for write access
+    file_name = FILE_NAME_PREFIX + str(line).rjust(num_digits_in_num_lines, '0') + FILE_NAME_SUFFIX
+    temp_file = open(TARGET_FOLDER + '/' + file_name, 'w')
+    # write header with column names to file
+    temp_file.write('code;bbox\n')
+  # create new line for file
+  csv = code + ';' + str(lng_lo) + ',' + str(lat_lo) + ',' + str(lng_hi) + ',' + str(lat_hi)
+  # write new line to file
+  temp_file.write(csv + '\n')
+  # update counter (needed for progress information output)
+  counter += 1
+  # at the end of each line…
+  if counter % num_rows != 0:
+    continue
   # save and close file
   temp_file.close()
   # print progress information
   progress_percentage = round(float(counter) / float(num_bboxes) * 100, 2)
-  print(str(counter) + ' of ~ ' + str(num_bboxes) + ' processed (~ ' + str(progress_percentage) + ' %)')
+  print(str(counter) + ' of ' + str(num_bboxes) + ' processed (' + str(progress_percentage) + ' %)')
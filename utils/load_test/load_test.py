@@ -0,0 +1,309 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from wsgiref import simple_server
+import requests
+sys.path.append('../../')
+import olca
+import openlocationcode as olc
+
+
+
+# settings: required
+
+# number of threads serving the application (like the threads of a mod_wsgi daemon process)
+THREADS = 15
+# number of clients sending requests concurrently (each one sending its next request as soon as it got the response to its last one)
+CLIENTS = 30
+# duration of the load test (in seconds)
+DURATION = 30
+# shares of the request types of the traffic:
+# pairs of coordinates, Plus codes and regional Plus codes to the main entry point, bboxes to the map-like entry point
+TRAFFIC_MIX = { 'coordinates': 0.5, 'code': 0.1, 'regional': 0.2, 'map': 0.2 }
+# latency of the local Nominatim stand-in (in seconds), varied randomly by up to the jitter in either direction
+NOMINATIM_LATENCY = 0.2
+NOMINATIM_LATENCY_JITTER = 0.1
+# share of requests the local Nominatim stand-in answers with HTTP status 500
+NOMINATIM_ERROR_RATE = 0.01
+# maximum number of requests per second the local Nominatim stand-in answers (with HTTP status 429 beyond), None for no limit
+NOMINATIM_RATE_LIMIT = 50
+
+
+
+# settings: optional
+
+# share of requests the local Nominatim stand-in answers only after the slow latency (in seconds), i.e. after the timeout of OLCA (3 seconds)
+NOMINATIM_SLOW_RATE = 0.02
+NOMINATIM_SLOW_LATENCY = 5
+# use the persistent cache for the results of Nominatim as configured in settings (so that repeated lookups do not reach the stand-in)?
+MUNICIPALITY_CACHE = False
+# add the regional Plus code (looked up via Nominatim) to all results of the main entry point?
+CODE_REGIONAL_OUT = True
+# extent (southwest longitude, southwest latitude, northeast longitude, northeast latitude) all queries and bboxes lie within
+EXTENT = (12.0, 54.05, 12.2, 54.2)
+# width and height of the bboxes of the map-like entry point (in degrees)
+BBOX_SIZE = (0.004, 0.002)
+# interval to sample the number of busy application threads in (in seconds)
+SAMPLING_INTERVAL = 0.01
+# file to store the results in (as JSON)
+# set to None if not necessary!
+RESULTS_FILE = None
+# seed for the random queries, so that the traffic is reproducible
+SEED = 42
+
+
+
+# functions
+
+# WSGI server handing each connection to a fixed pool of threads (instead of a new thread per connection), keeping track of the busy threads and of the time connections wait for a thread
+class PooledWSGIServer(simple_server.WSGIServer):
+
+  request_queue_size = 1024
+
+  def __init__(self, server_address, threads):
+    super().__init__(server_address, QuietWSGIRequestHandler)
+    self.connections = queue.Queue()
+    self.busy_threads = 0
+    self.queue_waits = []
+    self.statistics_lock = threading.Lock()
+    for i in range(threads):
+      threading.Thread(target = self.worker, daemon = True).start()
+
+  def process_request(self, request, client_address):
+    self.connections.put((request, client_address, time.perf_counter()))
+
+  def worker(self):
+    while True:
+      request, client_address, accepted = self.connections.get()
+      with self.statistics_lock:
+        self.busy_threads += 1
+        self.queue_waits.append(time.perf_counter() - accepted)
+      try:
+        self.finish_request(request, client_address)
+      except Exception:
+        self.handle_error(request, client_address)
+      finally:
+        self.shutdown_request(request)
+        with self.statistics_lock:
+          self.busy_threads -= 1
+
+
+# WSGI request handler without logging every request
+class QuietWSGIRequestHandler(simple_server.WSGIRequestHandler):
+
+  def log_message(self, format, *args):
+    pass
+
+
+# local Nominatim stand-in, answering in forward (/search) and reverse (/reverse) geocoder mode after the configured latency, with the configured errors and rate limit
+class NominatimHandler(BaseHTTPRequestHandler):
+
+  protocol_version = 'HTTP/1.1'
+
+  def do_GET(self):
+    if not rate_limiter():
+      nominatim_counter('rate limited (429)')
+      return self.responder(429, { 'error': 'rate limit exceeded' })
+    if random.random() < NOMINATIM_SLOW_RATE:
+      time.sleep(NOMINATIM_SLOW_LATENCY)
+    else:
+      time.sleep(max(0, NOMINATIM_LATENCY + random.uniform(-NOMINATIM_LATENCY_JITTER, NOMINATIM_LATENCY_JITTER)))
+    if random.random() < NOMINATIM_ERROR_RATE:
+      nominatim_counter('error (500)')
+      return self.responder(500, { 'error': 'internal server error' })
+    nominatim_counter('success')
+    if self.path.startswith('/reverse'):
+      return self.responder(200, { 'name': 'Rostock' })
+    return self.responder(200, [ { 'type': 'city', 'lon': '12.1316', 'lat': '54.0924' } ])
+
+  def responder(self, status, data):
+    body = json.dumps(data).encode('utf-8')
+    try:
+      self.send_response(status)
+      self.send_header('Content-Type', 'application/json')
+      self.send_header('Content-Length', str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+    except OSError:
+      # the client (i.e. OLCA) gave up waiting
+      pass
+
+  def log_message(self, format, *args):
+    pass
+
+
+# token bucket limiting the requests per second answered by the local Nominatim stand-in, returning whether a request may be answered
+def rate_limiter():
+
+  if NOMINATIM_RATE_LIMIT is None:
+    return True
+  with rate_limiter_lock:
+    now = time.perf_counter()
+    rate_limiter_state['tokens'] = min(NOMINATIM_RATE_LIMIT, rate_limiter_state['tokens'] + (now - rate_limiter_state['updated']) * NOMINATIM_RATE_LIMIT)
+    rate_limiter_state['updated'] = now
+    if rate_limiter_state['tokens'] < 1:
+      return False
+    rate_limiter_state['tokens'] -= 1
+    return True
+
+
+# counts the requests answered by the local Nominatim stand-in by outcome
+def nominatim_counter(outcome):
+
+  with nominatim_statistics_lock:
+    nominatim_statistics[outcome] = nominatim_statistics.get(outcome, 0) + 1
+
+
+# starts a server in a background thread
+def server_starter(server):
+
+  threading.Thread(target = server.serve_forever, daemon = True).start()
+  return server
+
+
+# returns a random request (its type and its URL path with query string) according to the traffic mix
+def request_builder(rng, base_url):
+
+  request_type = rng.choices(list(TRAFFIC_MIX), weights = list(TRAFFIC_MIX.values()))[0]
+  x, y = rng.uniform(EXTENT[0], EXTENT[2]), rng.uniform(EXTENT[1], EXTENT[3])
+  if request_type == 'coordinates':
+    return request_type, base_url + '/', { 'query': str(x) + ',' + str(y) }
+  elif request_type == 'code':
+    return request_type, base_url + '/', { 'query': olc.encode(y, x) }
+  elif request_type == 'regional':
+    return request_type, base_url + '/', { 'query': olc.encode(y, x)[4:] + ' Rostock' }
+  return request_type, base_url + '/map', { 'bbox': ','.join(str(value) for value in (x, y, x + BBOX_SIZE[0], y + BBOX_SIZE[1])) }
+
+
+# client sending requests one after the other until the end of the load test, recording the type, the HTTP status and the latency of each one
+def client(index, base_url, end, records):
+
+  rng = random.Random(SEED + index)
+  session = requests.Session()
+  session.trust_env = False
+  while time.perf_counter() < end:
+    request_type, url, params = request_builder(rng, base_url)
+    start = time.perf_counter()
+    try:
+      status = session.get(url, params = params, timeout = 60).status_code
+    except requests.RequestException:
+      status = 'connection error'
+    records.append((request_type, status, time.perf_counter() - start))
+
+
+# samples the number of busy application threads until the end of the load test
+def sampler(server, end, samples):
+
+  while time.perf_counter() < end:
+    samples.append(server.busy_threads)
+    time.sleep(SAMPLING_INTERVAL)
+
+
+# returns the percentile (nearest rank) of sorted values
+def percentile(sorted_values, share):
+
+  if not sorted_values:
+    return None
+  return sorted_values[min(len(sorted_values) - 1, max(0, int(round(share * len(sorted_values) + 0.5)) - 1))]
+
+
+# returns throughput, statuses and latency percentiles (in milliseconds) of records
+def latency_summarizer(records, duration):
+
+  latencies = sorted(record[2] * 1e3 for record in records)
+  statuses = {}
+  for record in records:
+    statuses[str(record[1])] = statuses.get(str(record[1]), 0) + 1
+  return {
+    'requests': len(records),
+    'throughput': len(records) / duration,
+    'statuses': statuses,
+    'p50': percentile(latencies, 0.5),
+    'p95': percentile(latencies, 0.95),
+    'p99': percentile(latencies, 0.99),
+    'max': latencies[-1] if latencies else None
+  }
+
+
+# formats a number of milliseconds
+def milliseconds_formatter(value):
+
+  return (str(round(value, 1)) + ' ms' if value is not None else '-').rjust(12)
+
+
+
+# core
+
+# state of the token bucket and requests answered by the local Nominatim stand-in (shared by all of its threads)
+rate_limiter_state = { 'tokens': float(NOMINATIM_RATE_LIMIT or 0), 'updated': time.perf_counter() }
+rate_limiter_lock = threading.Lock()
+nominatim_statistics = {}
+nominatim_statistics_lock = threading.Lock()
+
+# start the local Nominatim stand-in and point OLCA to it (directly, i.e. without proxies)
+nominatim_server = server_starter(ThreadingHTTPServer(('127.0.0.1', 0), NominatimHandler))
+nominatim_url = 'http://127.0.0.1:' + str(nominatim_server.server_address[1])
+olca.app.config['MUNICIPALITY_FORWARD_URL'] = nominatim_url + '/search?format=json'
+olca.app.config['MUNICIPALITY_REVERSE_URL'] = nominatim_url + '/reverse?format=jsonv2&zoom=10'
+olca.municipality_session_.proxies.clear()
+olca.municipality_session_.trust_env = False
+olca.app.config['CODE_REGIONAL_IN'] = True
+olca.app.config['CODE_REGIONAL_OUT'] = CODE_REGIONAL_OUT
+if not MUNICIPALITY_CACHE:
+  olca.app.config.pop('MUNICIPALITY_CACHE_FILE', None)
+
+# start OLCA under the pooled WSGI server
+application_server = server_starter(PooledWSGIServer(('127.0.0.1', 0), THREADS))
+application_server.set_app(olca.app)
+base_url = 'http://127.0.0.1:' + str(application_server.server_address[1])
+
+print('OLCA: ' + base_url + ' (' + str(THREADS) + ' threads), Nominatim stand-in: ' + nominatim_url)
+print('driving ' + str(CLIENTS) + ' clients for ' + str(DURATION) + ' s…')
+
+# drive the traffic and sample the busy application threads meanwhile
+start = time.perf_counter()
+end = start + DURATION
+records, samples = [], []
+threads = [ threading.Thread(target = client, args = (index, base_url, end, records)) for index in range(CLIENTS) ]
+threads.append(threading.Thread(target = sampler, args = (application_server, end, samples)))
+for thread in threads:
+  thread.start()
+for thread in threads:
+  thread.join()
+duration = time.perf_counter() - start
+
+# summarise latencies per request type and overall
+summaries = { request_type: latency_summarizer([ record for record in records if record[0] == request_type ], duration) for request_type in TRAFFIC_MIX }
+summaries['all'] = latency_summarizer(records, duration)
+print()
+print('requests'.ljust(14) + 'count'.rjust(8) + 'req/s'.rjust(10) + 'p50'.rjust(12) + 'p95'.rjust(12) + 'p99'.rjust(12) + 'max'.rjust(12) + '  statuses')
+for request_type, summary in summaries.items():
+  print(request_type.ljust(14) + str(summary['requests']).rjust(8) + str(round(summary['throughput'], 1)).rjust(10) + milliseconds_formatter(summary['p50']) + milliseconds_formatter(summary['p95']) + milliseconds_formatter(summary['p99']) + milliseconds_formatter(summary['max']) + '  ' + ', '.join(status + ': ' + str(count) for status, count in sorted(summary['statuses'].items())))
+
+# summarise the saturation of the application threads
+with application_server.statistics_lock:
+  queue_waits = sorted(wait * 1e3 for wait in application_server.queue_waits)
+saturation = {
+  'threads': THREADS,
+  'busy_mean': sum(samples) / len(samples) if samples else None,
+  'busy_max': max(samples) if samples else None,
+  'saturated_share': sum(1 for sample in samples if sample >= THREADS) / len(samples) if samples else None,
+  'queue_wait_p50': percentile(queue_waits, 0.5),
+  'queue_wait_p95': percentile(queue_waits, 0.95),
+  'queue_wait_p99': percentile(queue_waits, 0.99)
+}
+print()
+print('application threads: ' + str(THREADS) + ', busy on average: ' + str(round(saturation['busy_mean'], 1)) + ', busy at most: ' + str(saturation['busy_max']) + ', all busy: ' + str(round(saturation['saturated_share'] * 100, 1)) + ' % of the time')
+print('waiting for a thread: p50' + milliseconds_formatter(saturation['queue_wait_p50']) + ', p95' + milliseconds_formatter(saturation['queue_wait_p95']) + ', p99' + milliseconds_formatter(saturation['queue_wait_p99']))
+with nominatim_statistics_lock:
+  print('Nominatim stand-in: ' + ', '.join(outcome + ': ' + str(count) for outcome, count in sorted(nominatim_statistics.items())))
+
+# store the results if requested
+if RESULTS_FILE is not None:
+  with open(RESULTS_FILE, 'w', encoding = 'utf-8') as results_file:
+    json.dump({ 'settings': { 'threads': THREADS, 'clients': CLIENTS, 'duration': DURATION, 'traffic_mix': TRAFFIC_MIX, 'nominatim_latency': NOMINATIM_LATENCY, 'nominatim_error_rate': NOMINATIM_ERROR_RATE, 'nominatim_rate_limit': NOMINATIM_RATE_LIMIT, 'nominatim_slow_rate': NOMINATIM_SLOW_RATE }, 'requests': summaries, 'saturation': saturation, 'nominatim': nominatim_statistics }, results_file, ensure_ascii = False, indent = 2)
+  print('results stored in ' + RESULTS_FILE)
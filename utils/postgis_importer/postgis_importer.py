@@ -67,19 +67,11 @@ else:
     level = 2
   else:
     level = 1
-# calculate the OLC level resolution value
-level_resolution = olc.PAIR_RESOLUTIONS_[level - 1]
 # calculate the OLC code length
 code_length = level * 2
-# calculate the precision of level resolution
-level_resolution_precision = len(str(level_resolution - int(level_resolution))[2:])
-# calculate the buffer in degrees to prevent multiple encodings
-buffer = 10**-level_resolution_precision if level_resolution_precision > 1 else 1
-# calculate the number of lines (of encodings)
-num_lines = int(math.ceil((round(round(MAX_Y, level_resolution_precision) - round(MIN_Y, level_resolution_precision), level_resolution_precision)) / level_resolution))
-# calculate the number of rows (of encodings)
-num_rows = int(math.ceil((round(round(MAX_X, level_resolution_precision) - round(MIN_X, level_resolution_precision), level_resolution_precision)) / level_resolution))
-# calculate the number of bboxes (hopefully) to be created
+# calculate the number of lines and rows (of encodings)
+num_lines, num_rows = olc.gridDimensions(MIN_Y, MIN_X, MAX_Y, MAX_X, code_length)
+# calculate the number of bboxes to be created
 num_bboxes = num_lines * num_rows
 
 # open database connection
@@ -88,30 +80,24 @@ db_connection = psycopg2.connect(host = DB_HOST, port = DB_PORT, dbname = DB_NAM
 # initial counter (needed for progress information output)
 counter = 0
 
-# loop through all lines
-for line in range(num_lines):
-  # calculate current y
-  y = MIN_Y + (level_resolution * line) + buffer
-  # open a cursor to perform database operations
-  db_cursor = db_connection.cursor()
-  # loop through all rows
-  for row in range(num_rows):
-    # calculate current x
-    x = MIN_X + (level_resolution * row) + buffer
-    # encode
-    code = olc.encode(y, x, code_length)
-    # decode again to calculate the center pair of coordinates
-    coord = olc.decode(code)
-    # insert new line to database table
-    db_cursor.execute('INSERT INTO ' + DB_SCHEMA + '.' + DB_TABLE + '(' + DB_COL_CODE + ', ' + DB_COL_SW + ', ' + DB_COL_NE + ') VALUES (%s, ST_SetSRID(ST_MakePoint(%s, %s), 4326), ST_SetSRID(ST_MakePoint(%s, %s), 4326))', (code, str(coord.longitudeLo), str(coord.latitudeLo), str(coord.longitudeHi), str(coord.latitudeHi)))
-    # update counter (needed for progress information output)
-    counter += 1
+# loop through all bboxes (line by line, row by row)
+for code, lat_lo, lng_lo, lat_hi, lng_hi in olc.gridCells(MIN_Y, MIN_X, MAX_Y, MAX_X, code_length):
+  # at the start of each line: open a cursor to perform database operations
+  if counter % num_rows == 0:
+    db_cursor = db_connection.cursor()
+  # insert new line to database table
+  db_cursor.execute('INSERT INTO ' + DB_SCHEMA + '.' + DB_TABLE + '(' + DB_COL_CODE + ', ' + DB_COL_SW + ', ' + DB_COL_NE + ') VALUES (%s, ST_SetSRID(ST_MakePoint(%s, %s), 4326), ST_SetSRID(ST_MakePoint(%s, %s), 4326))', (code, str(lng_lo), str(lat_lo), str(lng_hi), str(lat_hi)))
+  # update counter (needed for progress information output)
+  counter += 1
+  # at the end of each line…
+  if counter % num_rows != 0:
+    continue
   # make changes to database persistent and close database cursor
   db_connection.commit()
   db_cursor.close()
   # print progress information
   progress_percentage = round(float(counter) / float(num_bboxes) * 100, 2)
-  print(str(counter) + ' of ~ ' + str(num_bboxes) + ' processed (~ ' + str(progress_percentage) + ' %)')
+  print(str(counter) + ' of ' + str(num_bboxes) + ' processed (' + str(progress_percentage) + ' %)')
 
 # close database connection
 db_connection.close()
@@ -0,0 +1,183 @@
+import sys
+import types
+sys.path.append('../../')
+import gazetteer
+import olca
+import openlocationcode as olc
+
+
+
+# settings: required
+
+# municipality (its name and its centroid) Nominatim stands in for, and a location within it
+MUNICIPALITY_NAME = 'Rostock'
+MUNICIPALITY_CENTROID = (12.1316, 54.0924)
+LOCATION = (12.1405, 54.0924)
+
+
+
+# settings: optional
+
+# municipality in the file of municipality boundaries matching the municipality name only weakly (i.e. below the minimum score), with its bbox
+WEAK_MATCH_NAME = 'Roggentin'
+WEAK_MATCH_BBOX = (12.19, 54.04, 12.23, 54.07)
+# bbox (southwest longitude, southwest latitude, northeast longitude, northeast latitude) whose OLC level 5 grid (of 4608 cells) exceeds the target number of features, but keeps within the maximum number of features, and that target and maximum
+MAP_BBOX = (12.1, 54.09, 12.11, 54.095)
+MAP_TARGET_FEATURES = 400
+MAP_MAX_FEATURES = 10000
+# number of pairs of coordinates (each one in another OLC level 4 parent Plus code, so that each one needs a lookup of its own) and maximum number of lookups querying Nominatim of a batch
+BATCH_SIZE = 8
+BATCH_MAX_UPSTREAM_LOOKUPS = 3
+# bboxes of zero width and of zero height respectively
+DEGENERATE_BBOXES = ((12.1, 54.09, 12.1, 54.1), (12.1, 54.09, 12.11, 54.09))
+
+
+
+# functions
+
+# stand-in for querying Nominatim via the pooled session, answering instantly with the municipality name (reverse geocoder mode) or the municipality centroid (forward geocoder mode), or failing if set to do so
+def nominatim_stub(url, timeout = None):
+
+  mode = 'reverse' if 'reverse' in url else 'forward'
+  nominatim_state[mode] += 1
+  if nominatim_state['failing']:
+    raise olca.req.ConnectionError('Nominatim not reachable')
+  if mode == 'reverse':
+    data = { 'name': MUNICIPALITY_NAME }
+  else:
+    data = [ { 'type': 'city', 'lon': str(MUNICIPALITY_CENTROID[0]), 'lat': str(MUNICIPALITY_CENTROID[1]) } ]
+  return types.SimpleNamespace(json = lambda: data)
+
+
+# resets the response cache, the gazetteer and the Nominatim stand-in (its request counts per geocoder mode, and to answering) before each check
+def state_resetter():
+
+  with olca.response_cache_lock_:
+    olca.response_cache_.clear()
+  olca.municipality_gazetteer_, olca.municipality_names_ = None, None
+  nominatim_state.update( { 'forward': 0, 'reverse': 0, 'failing': False } )
+
+
+# checks that a regional Plus code is recovered via Nominatim if its municipality name matches a municipality in the file of municipality boundaries only weakly
+def weak_gazetteer_match_checker():
+
+  failures = []
+  state_resetter()
+  min_x, min_y, max_x, max_y = WEAK_MATCH_BBOX
+  municipalities = [ (WEAK_MATCH_NAME, [ [ (min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y), (min_x, min_y) ] ]) ]
+  olca.municipality_gazetteer_, olca.municipality_names_ = gazetteer.index_builder(municipalities), gazetteer.name_index_builder(municipalities)
+  match = gazetteer.name_finder(olca.municipality_names_, MUNICIPALITY_NAME)
+  min_score = olca.app.config['MUNICIPALITY_NAME_MIN_SCORE'] if 'MUNICIPALITY_NAME_MIN_SCORE' in olca.app.config else olca.DEFAULT_MUNICIPALITY_NAME_MIN_SCORE_
+  if match is None or match[3] >= min_score:
+    failures.append('setup: ' + MUNICIPALITY_NAME + ' should match ' + WEAK_MATCH_NAME + ' weakly, but matched ' + str(match))
+  code = olc.encode(LOCATION[1], LOCATION[0])
+  response = client.get('/', query_string = { 'query': code[4:] + ' ' + MUNICIPALITY_NAME })
+  data = response.get_json()
+  if response.status_code != olca.HTTP_OK_STATUS_ or data['properties']['code_level_5'] != code:
+    failures.append('regional Plus code ' + code[4:] + ' ' + MUNICIPALITY_NAME + ' = ' + str(response.status_code) + ' ' + str(data) + ', expected ' + code)
+  if nominatim_state['forward'] != 1:
+    failures.append('regional Plus code ' + code[4:] + ' ' + MUNICIPALITY_NAME + ' queried Nominatim (forward geocoder mode) ' + str(nominatim_state['forward']) + ' time(s), expected once')
+  return failures
+
+
+# checks that a response whose regional Plus code is not definable since Nominatim failed is neither cached nor allowed to be cached, while the next one (with Nominatim answering again) is
+def failed_reverse_lookup_checker():
+
+  failures = []
+  state_resetter()
+  query = { 'query': str(LOCATION[0]) + ',' + str(LOCATION[1]) }
+  nominatim_state['failing'] = True
+  response = client.get('/', query_string = query)
+  data = response.get_json()
+  if response.status_code != olca.HTTP_OK_STATUS_ or data['properties']['code_regional'] != olca.CODE_REGIONAL_NOT_DEFINABLE_:
+    failures.append('pair of coordinates ' + query['query'] + ' with Nominatim failing = ' + str(response.status_code) + ' ' + str(data) + ', expected a regional Plus code not definable')
+  if response.cache_control.public or response.cache_control.max_age is not None or response.get_etag()[0] is not None:
+    failures.append('pair of coordinates ' + query['query'] + ' with Nominatim failing allowed caching: ' + str(response.headers.get('Cache-Control')))
+  if len(olca.response_cache_) != 0:
+    failures.append('pair of coordinates ' + query['query'] + ' with Nominatim failing was stored in the response cache')
+  nominatim_state['failing'] = False
+  response = client.get('/', query_string = query)
+  data = response.get_json()
+  if nominatim_state['reverse'] != 2 or not data['properties']['code_regional'].endswith(', ' + MUNICIPALITY_NAME):
+    failures.append('pair of coordinates ' + query['query'] + ' with Nominatim answering again = ' + str(data['properties']['code_regional']) + ' after ' + str(nominatim_state['reverse']) + ' request(s) to Nominatim (reverse geocoder mode), expected a regional Plus code after 2')
+  if not response.cache_control.public or len(olca.response_cache_) != 1:
+    failures.append('pair of coordinates ' + query['query'] + ' with Nominatim answering again was not cached')
+  return failures
+
+
+# checks that the map-like entry point takes the highest OLC level keeping within the target number of features (or within the maximum number of features, if lower), and returns an error if not even OLC level 1 keeps within the maximum number of features
+def map_level_checker():
+
+  failures = []
+  state_resetter()
+  bbox = ','.join(str(value) for value in MAP_BBOX)
+  for target_features, max_features, expected_level in ((MAP_TARGET_FEATURES, MAP_MAX_FEATURES, 4), (MAP_MAX_FEATURES, MAP_MAX_FEATURES, 5), (MAP_MAX_FEATURES, MAP_TARGET_FEATURES, 4), (MAP_TARGET_FEATURES, 0, None)):
+    olca.app.config['MAP_TARGET_FEATURES'], olca.app.config['MAP_MAX_FEATURES'] = target_features, max_features
+    response = client.get('/map', query_string = { 'bbox': bbox })
+    data = response.get_json()
+    name = 'bbox ' + bbox + ' with a target of ' + str(target_features) + ' and a maximum of ' + str(max_features) + ' feature(s)'
+    if expected_level is None:
+      if response.status_code != olca.HTTP_ERROR_STATUS_:
+        failures.append(name + ' = ' + str(response.status_code) + ', expected ' + str(olca.HTTP_ERROR_STATUS_))
+      continue
+    levels = set(feature['properties']['level'] for feature in data['features']) if response.status_code == olca.HTTP_OK_STATUS_ else set()
+    if levels != { expected_level } or len(data['features']) > min(target_features, max_features):
+      failures.append(name + ' = ' + str(response.status_code) + ' with OLC level(s) ' + str(sorted(levels)) + ', expected OLC level ' + str(expected_level))
+  olca.app.config.pop('MAP_TARGET_FEATURES')
+  olca.app.config['MAP_MAX_FEATURES'] = MAP_MAX_FEATURES
+  return failures
+
+
+# checks that a batch queries Nominatim at most as many times as configured, returning regional Plus codes not definable beyond
+def batch_upstream_lookups_checker():
+
+  failures = []
+  state_resetter()
+  olca.app.config['BATCH_MAX_UPSTREAM_LOOKUPS'] = BATCH_MAX_UPSTREAM_LOOKUPS
+  queries = [ str(LOCATION[0] + i * 0.01) + ',' + str(LOCATION[1]) for i in range(BATCH_SIZE) ]
+  response = client.post('/batch', json = queries)
+  regional_codes = [ feature['properties'].get('code_regional') for feature in response.get_json()['features'] ]
+  not_definable = regional_codes.count(olca.CODE_REGIONAL_NOT_DEFINABLE_)
+  if nominatim_state['reverse'] != BATCH_MAX_UPSTREAM_LOOKUPS:
+    failures.append('batch of ' + str(BATCH_SIZE) + ' pairs of coordinates queried Nominatim (reverse geocoder mode) ' + str(nominatim_state['reverse']) + ' time(s), expected ' + str(BATCH_MAX_UPSTREAM_LOOKUPS))
+  if not_definable != BATCH_SIZE - BATCH_MAX_UPSTREAM_LOOKUPS or regional_codes[:BATCH_MAX_UPSTREAM_LOOKUPS].count(olca.CODE_REGIONAL_NOT_DEFINABLE_) != 0:
+    failures.append('batch of ' + str(BATCH_SIZE) + ' pairs of coordinates = ' + str(regional_codes) + ', expected the first ' + str(BATCH_MAX_UPSTREAM_LOOKUPS) + ' regional Plus code(s) only to be definable')
+  olca.app.config.pop('BATCH_MAX_UPSTREAM_LOOKUPS')
+  return failures
+
+
+# checks that the map-like entry point rejects bboxes of zero width or zero height in all output formats
+def degenerate_bbox_checker():
+
+  failures = []
+  state_resetter()
+  for bbox in DEGENERATE_BBOXES:
+    bbox = ','.join(str(value) for value in bbox)
+    for map_format in olca.DEFAULT_MAP_FORMATS_:
+      response = client.get('/map', query_string = { 'bbox': bbox, 'format': map_format })
+      if response.status_code != olca.HTTP_ERROR_STATUS_:
+        failures.append('bbox ' + bbox + ' in format ' + map_format + ' = ' + str(response.status_code) + ', expected ' + str(olca.HTTP_ERROR_STATUS_))
+  return failures
+
+
+
+# core
+
+# replace Nominatim by the stand-in and do not use the persistent cache, so that every lookup reaches the stand-in
+nominatim_state = { 'forward': 0, 'reverse': 0, 'failing': False }
+olca.municipality_session_.get = nominatim_stub
+olca.app.config.pop('MUNICIPALITY_CACHE_FILE', None)
+olca.app.config['CODE_REGIONAL_IN'] = True
+olca.app.config['CODE_REGIONAL_OUT'] = True
+client = olca.app.test_client()
+
+total_failures = 0
+
+for name, checker in (('weak gazetteer match', weak_gazetteer_match_checker), ('failed reverse lookup', failed_reverse_lookup_checker), ('batch upstream lookups', batch_upstream_lookups_checker), ('map level', map_level_checker), ('degenerate bbox', degenerate_bbox_checker)):
+  failures = checker()
+  total_failures += len(failures)
+  print(name + ': ' + ('ok' if not failures else str(len(failures)) + ' failure(s)'))
+  for failure in failures:
+    print('  ' + failure)
+
+sys.exit(1 if total_failures else 0)